@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Time parse.build_pool for synthetic arrays of 10 to 1000 devices and
+estimate the scaling exponent, which should be close to one.
+"""
+
+import math
+import timeit
+
+from dtocean_reliability.parse import (check_nodes,
+                                       complete_networks,
+                                       combine_networks,
+                                       build_pool)
+
+from synthetic import make_networks
+
+N_DEVICES = (10, 30, 100, 300, 1000)
+REPEAT = 3
+
+
+def time_build_pool(n_devices):
+    
+    networks = make_networks(n_devices, n_strings=4)
+    check_nodes(*networks[:2])
+    networks = complete_networks(*networks)
+    array_hierarchy, device_hierarchy = combine_networks(*networks)
+    
+    def run():
+        build_pool(array_hierarchy, device_hierarchy)
+    
+    return min(timeit.repeat(run, number=1, repeat=REPEAT))
+
+
+def main():
+    
+    times = [time_build_pool(n) for n in N_DEVICES]
+    
+    print "{:>10}{:>14}{:>18}".format("Devices", "Time (s)", "Per device (ms)")
+    
+    for n, t in zip(N_DEVICES, times):
+        print "{:>10}{:>14.4f}{:>18.4f}".format(n, t, 1e3 * t / n)
+    
+    exponent = (math.log(times[-1] / times[0]) /
+                math.log(float(N_DEVICES[-1]) / N_DEVICES[0]))
+    
+    print ""
+    print "Scaling exponent: {:.2f}".format(exponent)
+    
+    return
+
+
+if __name__ == "__main__":
+    main()
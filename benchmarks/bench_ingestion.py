@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measure the time and peak memory used to ingest synthetic arrays of 10 to
+1000 devices, from the input SubNetworks to the finished pool. Each size is
+measured in a fresh process, as the peak resident set size can not be reset.
+Unix only.
+"""
+
+import multiprocessing
+import resource
+import time
+
+from dtocean_reliability.parse import (check_nodes,
+                                       complete_networks,
+                                       combine_networks,
+                                       build_pool)
+
+from synthetic import make_networks
+
+N_DEVICES = (10, 30, 100, 300, 1000)
+
+
+def get_peak_memory():
+    # Peak resident set size in MB (ru_maxrss is given in kB on Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+
+
+def ingest(n_devices, queue):
+    
+    networks = make_networks(n_devices, n_strings=4)
+    start_memory = get_peak_memory()
+    start_time = time.time()
+    
+    check_nodes(*networks[:2])
+    networks = complete_networks(*networks)
+    array_hierarchy, device_hierarchy = combine_networks(*networks)
+    build_pool(array_hierarchy, device_hierarchy)
+    
+    queue.put((time.time() - start_time,
+               start_memory,
+               get_peak_memory() - start_memory))
+    
+    return
+
+
+def measure(n_devices):
+    
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=ingest,
+                                      args=(n_devices, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    
+    return result
+
+
+def main():
+    
+    print "{:>10}{:>14}{:>16}{:>16}".format("Devices",
+                                            "Time (s)",
+                                            "Start (MB)",
+                                            "Peak inc. (MB)")
+    
+    for n in N_DEVICES:
+        
+        duration, start_memory, increase = measure(n)
+        
+        print "{:>10}{:>14.4f}{:>16.1f}{:>16.1f}".format(n,
+                                                         duration,
+                                                         start_memory,
+                                                         increase)
+    
+    return
+
+
+if __name__ == "__main__":
+    main()
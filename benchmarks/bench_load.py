@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compare the time taken to load the hierarchy and bill of materials files of
+synthetic arrays of 10 to 1000 devices using eval, the literal parser of the
+load module and the JSON files written by load.convert.
+"""
+
+# pylint: disable=eval-used
+
+import os
+import pprint
+import shutil
+import tempfile
+import timeit
+from collections import Counter # pylint: disable=unused-import
+
+from dtocean_reliability.load import convert, load
+
+from synthetic import make_networks
+
+N_DEVICES = (10, 100, 1000)
+REPEAT = 5
+
+
+def write_files(n_devices, directory):
+    
+    # Write the hierarchy and bill of materials of each network as Python
+    # literals and as JSON, returning the paths of both
+    
+    txt_paths = []
+    
+    for i, network in enumerate(make_networks(n_devices, n_strings=4)):
+        for name, data in (("hier", network.hierarchy),
+                           ("bom", network.bill_of_materials)):
+            
+            path = os.path.join(directory, "{}{}.txt".format(name, i))
+            
+            with open(path, "w") as f:
+                f.write(pprint.pformat(data))
+            
+            txt_paths.append(path)
+    
+    json_paths = [convert(x) for x in txt_paths]
+    
+    return txt_paths, json_paths
+
+
+def time_loads(n_devices):
+    
+    directory = tempfile.mkdtemp()
+    
+    try:
+        
+        txt_paths, json_paths = write_files(n_devices, directory)
+        n_bytes = sum(os.path.getsize(x) for x in txt_paths)
+        
+        def run_eval():
+            for path in txt_paths:
+                eval(open(path).read())
+        
+        def run_literal():
+            for path in txt_paths:
+                load(path)
+        
+        def run_json():
+            for path in json_paths:
+                load(path)
+        
+        times = [min(timeit.repeat(x, number=1, repeat=REPEAT))
+                                for x in (run_eval, run_literal, run_json)]
+    
+    finally:
+        
+        shutil.rmtree(directory)
+    
+    return [n_bytes / 1024.] + times
+
+
+def main():
+    
+    print "{:>10}{:>12}{:>12}{:>14}{:>12}".format("Devices",
+                                                  "Size (kB)",
+                                                  "Eval (s)",
+                                                  "Literal (s)",
+                                                  "JSON (s)")
+    
+    for n in N_DEVICES:
+        print "{:>10}{:>12.0f}{:>12.4f}{:>14.4f}{:>12.4f}".format(
+                                                            n,
+                                                            *time_loads(n))
+    
+    return
+
+
+if __name__ == "__main__":
+    main()
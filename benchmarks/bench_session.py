@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compare the time taken to change the k-factor of a single component and
+recalculate the systems metrics, either by calling set_failure_rates again
+or by updating an EvaluationSession, for synthetic arrays of 10 to 1000
+devices.
+"""
+
+import timeit
+
+from dtocean_reliability import Network
+
+from synthetic import make_database, make_networks
+
+N_DEVICES = (10, 100, 1000)
+REPEAT = 5
+
+
+def time_updates(n_devices):
+    
+    network = Network(make_database(), *make_networks(n_devices,
+                                                      n_strings=4))
+    network.set_failure_rates(inplace=True)
+    
+    # Dummy components share the marker -1, so use the last real marker
+    markers = network.get_components()["Marker"]
+    marker = max(markers)
+    failure_rate = network._failure_rates[ # pylint: disable=protected-access
+                                                    markers.index(marker)]
+    session = network.start_session()
+    
+    def run_network():
+        network.set_failure_rates(k_factors={marker: 2.}, inplace=True)
+        network.get_systems_metrics()
+    
+    def run_session():
+        session.update_component(marker, 2. * failure_rate)
+        session.get_systems_metrics()
+    
+    network_time = min(timeit.repeat(run_network, number=1, repeat=REPEAT))
+    session_time = min(timeit.repeat(run_session, number=1, repeat=REPEAT))
+    
+    return network_time, session_time
+
+
+def main():
+    
+    print "{:>10}{:>16}{:>16}{:>10}".format("Devices",
+                                            "Network (s)",
+                                            "Session (s)",
+                                            "Speed up")
+    
+    for n in N_DEVICES:
+        
+        network_time, session_time = time_updates(n)
+        
+        print "{:>10}{:>16.4f}{:>16.4f}{:>10.1f}".format(
+                                                n,
+                                                network_time,
+                                                session_time,
+                                                network_time / session_time)
+    
+    return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Time the main operations of the Network class for a set of synthetic arrays
+and compare the results to stored baselines. Operations which take longer
+than the baseline by more than the given tolerance are marked as
+regressions. Baselines are machine dependent, so they should be saved again
+(using --save) before comparing on a new machine.
+
+The memory used by the links of each pool is also reported, in bytes per
+node, and compared to its baseline in the same way.
+
+Graph export is only timed if the graphviz package is installed.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import OrderedDict
+
+from dtocean_reliability import Network
+
+from synthetic import make_database, make_networks
+
+try:
+    import graphviz as gv
+    HAS_GRAPHVIZ = True
+except ImportError:
+    HAS_GRAPHVIZ = False
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              "baselines.json")
+
+CASES = OrderedDict([
+    ("devices_10", {"n_devices": 10, "n_strings": 2}),
+    ("devices_100", {"n_devices": 100, "n_strings": 4}),
+    ("devices_500", {"n_devices": 500, "n_strings": 8}),
+    ("subhubs_100", {"n_devices": 100, "n_subhubs": 5, "n_strings": 2}),
+    ("lines_50", {"n_devices": 50, "n_lines": 12}),
+    ("foundations_50", {"n_devices": 50, "n_foundations": 4})])
+
+SUBSYSTEM = "Station keeping"
+REPEAT = 3
+MEMORY_KEY = "bytes_per_node"
+
+
+def time_case(kwargs, repeat=REPEAT):
+    
+    # Returns the minimum time taken for each operation over the repeats.
+    # Every repeat starts from a new network, so cached evaluations are not
+    # reused between operations.
+    
+    database = make_database()
+    networks = make_networks(**kwargs)
+    times = OrderedDict()
+    
+    def record(name, func, *args):
+        
+        start = time.time()
+        result = func(*args)
+        duration = time.time() - start
+        
+        times[name] = min(times.get(name, duration), duration)
+        
+        return result
+    
+    for _ in xrange(repeat): # pylint: disable=undefined-variable
+        
+        network = record("init", Network, database, *networks)
+        rated = record("set_failure_rates", network.set_failure_rates)
+        record("get_systems_metrics", rated.get_systems_metrics)
+        
+        rated = network.set_failure_rates()
+        record("get_subsystem_metrics",
+               rated.get_subsystem_metrics,
+               SUBSYSTEM)
+        
+        record("display", rated.display)
+        
+        if HAS_GRAPHVIZ: record("graph", export_graph, rated)
+    
+    return times
+
+
+def measure_case(kwargs):
+    network = Network(make_database(), *make_networks(**kwargs))
+    return get_pool_memory(network._pool) # pylint: disable=protected-access
+
+
+def get_pool_memory(pool):
+    
+    # Bytes per node held by the links of the pool, including their
+    # attribute dictionaries and item containers. Labels and markers shared
+    # between links are only counted once.
+    
+    total = 0
+    seen = set()
+    
+    def add_shared(obj):
+        if id(obj) in seen: return 0
+        seen.add(id(obj))
+        return sys.getsizeof(obj)
+    
+    for link in pool.itervalues():
+        
+        total += sys.getsizeof(link)
+        
+        if hasattr(link, "__dict__"):
+            total += sys.getsizeof(link.__dict__)
+        
+        if hasattr(link, "items"):
+            total += sys.getsizeof(link.items)
+        
+        total += add_shared(link.label)
+        if hasattr(link, "marker"): total += add_shared(link.marker)
+    
+    return total / float(len(pool))
+
+
+def export_graph(network):
+    
+    pool = network._get_rated_pool() # pylint: disable=protected-access
+    dot = gv.Digraph()
+    pool["array"].graph(pool, dot, levels=10)
+    
+    return dot.source
+
+
+def load_baselines(path=BASELINES_PATH):
+    
+    if not os.path.isfile(path): return {}
+    
+    with open(path) as f:
+        baselines = json.load(f)
+    
+    return baselines
+
+
+def save_baselines(results, path=BASELINES_PATH):
+    
+    with open(path, "w") as f:
+        json.dump(results, f, indent=4, sort_keys=True)
+    
+    return
+
+
+def main(save=False, tolerance=1.5, cases=None):
+    
+    if cases is None: cases = CASES.keys()
+    
+    baselines = load_baselines()
+    results = {}
+    regressions = 0
+    
+    print "{:<16}{:<24}{:>12}{:>14}{:>10}".format("Case",
+                                                 "Operation",
+                                                 "Time (s)",
+                                                 "Baseline (s)",
+                                                 "Ratio")
+    
+    memory = OrderedDict()
+    
+    for case in cases:
+        
+        times = time_case(CASES[case])
+        memory[case] = measure_case(CASES[case])
+        results[case] = OrderedDict(times)
+        results[case][MEMORY_KEY] = memory[case]
+        
+        for operation, duration in times.iteritems():
+            
+            baseline = baselines.get(case, {}).get(operation)
+            
+            if baseline is None:
+                print "{:<16}{:<24}{:>12.4f}{:>14}{:>10}".format(case,
+                                                                 operation,
+                                                                 duration,
+                                                                 "-",
+                                                                 "-")
+                continue
+            
+            ratio = duration / baseline
+            flag = ""
+            
+            if ratio > tolerance:
+                flag = " *"
+                regressions += 1
+            
+            print "{:<16}{:<24}{:>12.4f}{:>14.4f}{:>10.2f}{}".format(
+                                                                case,
+                                                                operation,
+                                                                duration,
+                                                                baseline,
+                                                                ratio,
+                                                                flag)
+    
+    print ""
+    print "{:<16}{:<24}{:>12}{:>14}{:>10}".format("Case",
+                                                 "Memory",
+                                                 "B/node",
+                                                 "Baseline",
+                                                 "Ratio")
+    
+    for case, bytes_per_node in memory.iteritems():
+        
+        baseline = baselines.get(case, {}).get(MEMORY_KEY)
+        
+        if baseline is None:
+            print "{:<16}{:<24}{:>12.1f}{:>14}{:>10}".format(case,
+                                                             "pool",
+                                                             bytes_per_node,
+                                                             "-",
+                                                             "-")
+            continue
+        
+        ratio = bytes_per_node / baseline
+        flag = ""
+        
+        if ratio > tolerance:
+            flag = " *"
+            regressions += 1
+        
+        print "{:<16}{:<24}{:>12.1f}{:>14.1f}{:>10.2f}{}".format(
+                                                            case,
+                                                            "pool",
+                                                            bytes_per_node,
+                                                            baseline,
+                                                            ratio,
+                                                            flag)
+    
+    if regressions:
+        print ""
+        print "{} regression(s) marked with *".format(regressions)
+    
+    if save:
+        baselines.update(results)
+        save_baselines(baselines)
+        print ""
+        print "Baselines saved to {}".format(BASELINES_PATH)
+    
+    return regressions
+
+
+def cli():
+    
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("cases",
+                        nargs="*",
+                        help="cases to run, from: {} (default: all)".format(
+                                                    ", ".join(CASES.keys())))
+    parser.add_argument("--save",
+                        action="store_true",
+                        help="store the results as the new baselines")
+    parser.add_argument("--tolerance",
+                        type=float,
+                        default=1.5,
+                        help=("ratio to the baseline above which an "
+                              "operation is marked as a regression "
+                              "(default: 1.5)"))
+    
+    args = parser.parse_args()
+    unknown = [x for x in args.cases if x not in CASES]
+    
+    if unknown:
+        parser.error("unknown case(s): {}".format(", ".join(unknown)))
+    
+    main(args.save, args.tolerance, args.cases or None)
+    
+    return
+
+
+if __name__ == "__main__":
+    cli()
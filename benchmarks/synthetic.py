@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Synthetic array networks for benchmarking, modelled on the files in the
+example_data directory.
+"""
+
+from collections import Counter
+
+from dtocean_reliability import SubNetwork
+
+
+def make_database():
+    
+    def item(lower, mean, upper):
+        return {'item10': {'failratecrit': [lower, mean, upper],
+                           'failratenoncrit': [lower, mean, upper]}}
+    
+    database = {'id3': item(42.0, 42.72, 43.0),      # busbar
+                'id4': item(0.0, 73.12, 0.0),        # breaker
+                'id5': item(2.3, 2.46, 2.5),         # transformer
+                'id6': item(17.3, 17.33, 17.5),      # cable
+                'id7': item(0.001, 0.0023, 0.003),   # disconnector
+                'id9': item(1.1864, 1.1864, 1.1864), # pile
+                'id13': item(0.04609, 0.04609, 0.04609), # rope
+                'id16': item(4.1, 4.2, 4.3),         # umbilical
+                'id17': item(3.4223, 19.963, 59.320),    # generator
+                'id18': item(5.7039, 20.5339, 45.6308)}  # gearbox
+    
+    return database
+
+
+def make_networks(n_devices,
+                  n_subhubs=0,
+                  n_strings=1,
+                  n_lines=4,
+                  n_foundations=1):
+    
+    # Returns electrical, moorings and user SubNetworks for an array of
+    # n_devices. If n_subhubs is zero the devices are connected to the
+    # array in n_strings parallel strings, otherwise the devices are split
+    # evenly between the subhubs, each with n_strings parallel strings.
+    # Each device has n_lines mooring lines and each line has a foundation
+    # of n_foundations piles and a grouted joint.
+    
+    markers = iter(xrange(10 ** 9)) # pylint: disable=undefined-variable
+    
+    def bom(ids, nested=False):
+        
+        if nested:
+            marker = [[next(markers) for _ in x] for x in ids]
+            quantity = Counter(y for x in ids for y in x)
+        else:
+            marker = [next(markers) for _ in ids]
+            quantity = Counter(ids)
+        
+        return {'quantity': quantity, 'marker': marker}
+    
+    devices = ["device{:03d}".format(i + 1) for i in xrange(n_devices)] # pylint: disable=undefined-variable
+    substation = ['id3', 'id4', 'id5', 'id4', 'id3']
+    
+    elec_hierarchy = {'array': {'Export cable': [['id6', 'id4']],
+                                'Substation': substation}}
+    elec_bom = {'array': {'Export cable': bom([['id6', 'id4']], True),
+                          'Substation': bom(substation)}}
+    
+    moor_hierarchy = {'array': {'Substation foundation': ['id9']}}
+    moor_bom = {'array': {'Substation foundation': bom(['id9'])}}
+    
+    if n_subhubs:
+        
+        subhubs = ["subhub{:03d}".format(i + 1) for i in xrange(n_subhubs)] # pylint: disable=undefined-variable
+        groups = _split(devices, n_subhubs)
+        elec_hierarchy['array']['layout'] = [[x] for x in subhubs]
+        
+        for subhub, group in zip(subhubs, groups):
+            
+            cable = [['id7', 'id6', 'id7', 'id4']]
+            
+            elec_hierarchy[subhub] = {'Substation': substation,
+                                      'Elec sub-system': cable,
+                                      'layout': _split(group, n_strings)}
+            elec_bom[subhub] = {'Substation': bom(substation),
+                                'Elec sub-system': bom(cable, True)}
+            
+            moor_hierarchy[subhub] = {'Substation foundation': ['id9']}
+            moor_bom[subhub] = {'Substation foundation': bom(['id9'])}
+    
+    else:
+        
+        elec_hierarchy['array']['layout'] = _split(devices, n_strings)
+    
+    user_hierarchy = {}
+    user_bom = {}
+    
+    for device in devices:
+        
+        elec_hierarchy[device] = {'Elec sub-system': ['id7', 'id6', 'id7']}
+        elec_bom[device] = bom(['id7', 'id6', 'id7'])
+        
+        foundations = [['id9'] * n_foundations + ['grout']] * n_lines
+        lines = [['id13']] * n_lines
+        
+        moor_hierarchy[device] = {'Foundation': foundations,
+                                  'Umbilical': ['id16'],
+                                  'Mooring system': lines}
+        moor_bom[device] = {'Foundation': bom(foundations, True),
+                            'Umbilical': bom(['id16']),
+                            'Mooring system': bom(lines, True)}
+        
+        user_hierarchy[device] = {'Pto': ['id17', 'id18']}
+        user_bom[device] = {'Pto': {'quantity': Counter(['id17', 'id18'])}}
+    
+    electrical_network = SubNetwork(elec_hierarchy, elec_bom)
+    moorings_network = SubNetwork(moor_hierarchy, moor_bom)
+    user_network = SubNetwork(user_hierarchy, user_bom)
+    
+    return electrical_network, moorings_network, user_network
+
+
+def _split(items, n):
+    
+    # Split items into at most n contiguous groups of near equal size
+    
+    size, remainder = divmod(len(items), n)
+    groups = []
+    start = 0
+    
+    for i in xrange(n): # pylint: disable=undefined-variable
+        stop = start + size + (1 if i < remainder else 0)
+        groups.append(items[start:stop])
+        start = stop
+    
+    return [x for x in groups if x]
@@ -25,6 +25,8 @@ from polite.configuration import Logger
 # Convenience import
 from .parse import SubNetwork
 from .main import Network
+from .cache import PoolCache
+from .store import MemmapComponentStore, SQLiteComponentStore
 
 # Set default logging handler to avoid "No handler found" warnings.
 try:  # Python 2.7+
@@ -35,7 +37,11 @@ except ImportError:
             pass
 
 # credentials
-__all__ = ["Network", "SubNetwork"]
+__all__ = ["MemmapComponentStore",
+           "Network",
+           "PoolCache",
+           "SQLiteComponentStore",
+           "SubNetwork"]
 __authors__ = ['DTOcean Developers']
 __version__ = get_distribution('dtocean-reliability').version
 
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+DTOcean Reliability Assessment Module (RAM)
+
+Persistent cache of built pools, keyed by the content of the input networks.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+# Built in modules
+import os
+import json
+import marshal
+import hashlib
+import logging
+import zipfile
+import tempfile
+
+import numpy as np
+
+from .graph import Component, KofN, Parallel, Serial
+from .plan import COMPONENT, KOFN, SERIAL, EvaluationPlan
+
+# Start logging
+module_logger = logging.getLogger(__name__)
+
+# Increment if the pool building or the stored format changes, so that old
+# entries are no longer found
+_FORMAT_VERSION = 4
+_EXTENSION = ".pool"
+
+# Arrays of the evaluation plan stored in each entry. The other contents of
+# the entry are stored as JSON, so entries are loaded without unpickling.
+_PLAN_ARRAYS = ("node_types", "indptr", "indices", "heights", "classes", "ks")
+
+
+class PoolCache(object):
+    
+    # On-disk cache of the pool, evaluation plan, subhub and device indices
+    # and curtailments built by a Network. Each entry is stored in its own
+    # compressed NumPy archive, named by the hash of the input networks.
+    # Once the files in the directory exceed max_bytes, the least recently
+    # used entries are deleted.
+    
+    def __init__(self, directory, max_bytes=100 * 2 ** 20):
+        
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        
+        self.directory = directory
+        self.max_bytes = max_bytes
+    
+    def get(self, key):
+        
+        path = self._get_path(key)
+        if not os.path.isfile(path): return None
+        
+        try:
+            
+            with open(path, "rb") as f:
+                entry = _read_entry(f)
+        
+        except (IOError, OSError, zipfile.BadZipfile, EOFError, KeyError,
+                IndexError, ValueError, TypeError) as e:
+            
+            msg = "Removing unreadable cache entry {}: {}".format(path, e)
+            module_logger.warning(msg)
+            _remove(path)
+            
+            return None
+        
+        # Record the use for the eviction order
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        
+        return entry
+    
+    def put(self, key,
+                  pool,
+                  plan,
+                  subhub_indices,
+                  device_indices,
+                  curtailments):
+        
+        # Write to a temporary file first, so that other processes never
+        # read a partial entry
+        handle, temp_path = tempfile.mkstemp(dir=self.directory)
+        path = self._get_path(key)
+        
+        try:
+            
+            with os.fdopen(handle, "wb") as f:
+                _write_entry(f,
+                             pool,
+                             plan,
+                             subhub_indices,
+                             device_indices,
+                             curtailments)
+            
+            if os.name == "nt" and os.path.isfile(path): _remove(path)
+            os.rename(temp_path, path)
+        
+        except Exception:
+            _remove(temp_path)
+            raise
+        
+        self._evict(keep=path)
+        
+        return
+    
+    def clear(self):
+        
+        for path in self._get_entry_paths():
+            _remove(path)
+        
+        return
+    
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + _EXTENSION)
+    
+    def _get_entry_paths(self):
+        return [os.path.join(self.directory, x)
+                                    for x in os.listdir(self.directory)
+                                                if x.endswith(_EXTENSION)]
+    
+    def _evict(self, keep=None):
+        
+        entries = []
+        
+        for path in self._get_entry_paths():
+            
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total_bytes = sum(x[1] for x in entries)
+        
+        for _, size, path in sorted(entries):
+            
+            if total_bytes <= self.max_bytes: break
+            if path == keep: continue
+            
+            _remove(path)
+            total_bytes -= size
+        
+        return
+
+
+def get_networks_key(electrical_network,
+                     moorings_network,
+                     user_network):
+    
+    # Hash of the content of the networks, which is independent of the
+    # order in which dictionaries were filled
+    
+    content = [_FORMAT_VERSION]
+    
+    for network in (electrical_network, moorings_network, user_network):
+        
+        if network is None:
+            content.append(None)
+            continue
+        
+        content.append((_canonical(network.hierarchy),
+                        _canonical(network.bill_of_materials)))
+    
+    # Version 0 writes interned and other strings in the same way, so the
+    # key does not depend on which strings have been interned
+    try:
+        data = marshal.dumps(content, 0)
+    except ValueError:
+        data = repr(content)
+    
+    return hashlib.sha256(data).hexdigest()
+
+
+def _canonical(obj):
+    
+    if isinstance(obj, dict):
+        return ("dict", sorted((_canonical(key), _canonical(value))
+                                            for key, value in obj.iteritems()))
+    
+    if isinstance(obj, (list, tuple)):
+        
+        # Lists of ids or markers need no conversion
+        if not any(isinstance(x, (dict, list, tuple)) for x in obj):
+            return tuple(obj)
+        
+        return tuple(_canonical(x) for x in obj)
+    
+    return obj
+
+
+def _write_entry(f, pool,
+                     plan,
+                     subhub_indices,
+                     device_indices,
+                     curtailments):
+    
+    # The structure of the pool is already held by the plan, so only the
+    # labels and markers of the links are stored alongside it. Links which
+    # can not be reached from the array are not stored. Labels and the
+    # device names of the curtailments repeat often, so they are stored as
+    # codes into a table of names.
+    
+    names = {}
+    
+    def get_code(name):
+        return names.setdefault(name, len(names))
+    
+    label_codes = [get_code(pool[key].label) for key in plan.keys]
+    curtailment_keys = list(curtailments)
+    curtailment_indptr = [0]
+    curtailment_codes = []
+    
+    for key in curtailment_keys:
+        curtailment_codes.extend(get_code(x) for x in curtailments[key])
+        curtailment_indptr.append(len(curtailment_codes))
+    
+    metadata = {"keys": plan.keys,
+                "names": sorted(names, key=names.get),
+                "markers": [pool[key].marker for key in plan.component_keys],
+                "subhub_indices": subhub_indices,
+                "device_indices": device_indices,
+                "curtailment_keys": curtailment_keys}
+    
+    arrays = {name: getattr(plan, name) for name in _PLAN_ARRAYS}
+    arrays["version"] = np.array(_FORMAT_VERSION)
+    arrays["metadata"] = np.frombuffer(json.dumps(metadata), dtype=np.uint8)
+    arrays["label_codes"] = np.array(label_codes, dtype=np.int32)
+    arrays["curtailment_indptr"] = np.array(curtailment_indptr,
+                                            dtype=np.int32)
+    arrays["curtailment_codes"] = np.array(curtailment_codes, dtype=np.int32)
+    
+    np.savez_compressed(f, **arrays)
+    
+    return
+
+
+def _read_entry(f):
+    
+    with np.load(f, allow_pickle=False) as data:
+        
+        version = int(data["version"])
+        
+        if version != _FORMAT_VERSION:
+            err_str = "Cache format version {} not supported".format(version)
+            raise ValueError(err_str)
+        
+        plan_arrays = [data[name] for name in _PLAN_ARRAYS]
+        metadata = json.loads(data["metadata"].tobytes())
+        label_codes = data["label_codes"].tolist()
+        curtailment_indptr = data["curtailment_indptr"].tolist()
+        curtailment_codes = data["curtailment_codes"].tolist()
+    
+    plan = EvaluationPlan(_get_strs(metadata["keys"]), *plan_arrays)
+    
+    keys = plan.keys
+    names = _get_strs(metadata["names"])
+    labels = [names[i] for i in label_codes]
+    markers = metadata["markers"]
+    subhub_indices = _get_str_dict(metadata["subhub_indices"])
+    device_indices = _get_str_dict(metadata["device_indices"])
+    curtailments = {}
+    
+    for i, key in enumerate(_get_strs(metadata["curtailment_keys"])):
+        codes = curtailment_codes[curtailment_indptr[i]:
+                                                curtailment_indptr[i + 1]]
+        curtailments[key] = [names[j] for j in codes]
+    node_types = plan.node_types.tolist()
+    indptr = plan.indptr.tolist()
+    indices = plan.indices.tolist()
+    
+    pool = {}
+    
+    for i, key in enumerate(keys):
+        
+        if node_types[i] == COMPONENT:
+            pool[key] = Component(labels[i], markers[i])
+            continue
+        
+        if node_types[i] == SERIAL:
+            link = Serial(labels[i])
+        elif node_types[i] == KOFN:
+            link = KofN(int(plan.ks[i]), labels[i])
+        else:
+            link = Parallel(labels[i])
+        
+        for j in indices[indptr[i]:indptr[i + 1]]:
+            link.add_item(keys[j])
+        
+        pool[key] = link
+    
+    return pool, plan, subhub_indices, device_indices, curtailments
+
+
+def _get_strs(values):
+    
+    # JSON strings are loaded as unicode, so ASCII strings are converted
+    # back to byte strings
+    
+    try:
+        return [str(x) if isinstance(x, unicode) else x for x in values] # pylint: disable=undefined-variable
+    except UnicodeEncodeError:
+        pass
+    
+    result = []
+    
+    for value in values:
+        
+        try:
+            value = str(value) if isinstance(value, unicode) else value # pylint: disable=undefined-variable
+        except UnicodeEncodeError:
+            pass
+        
+        result.append(value)
+    
+    return result
+
+
+def _get_str_dict(values):
+    
+    # Dictionaries of the entry have string keys and values which are
+    # scalars or lists of scalars
+    
+    if values is None: return None
+    
+    keys = _get_strs(values.keys())
+    values = [_get_strs(x) if isinstance(x, list) else _get_strs([x])[0]
+                                                    for x in values.values()]
+    
+    return dict(zip(keys, values))
+
+
+def _remove(path):
+    
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    
+    return
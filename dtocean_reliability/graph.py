@@ -27,17 +27,30 @@ DTOcean Reliability Assessment Module (RAM)
 # pylint: disable=unused-argument
 
 import abc
-import random
-import string
+from copy import copy
+from collections import defaultdict, namedtuple
 
-from .numerics import binomial, reliability, rpn
+from .numerics import kofn_mttf, parallel_mttf, reliability, rpn
+
+
+_SLOT_NAMES = {}
+
+LinkMetrics = namedtuple("LinkMetrics", ["failure_rate",
+                                         "mttf",
+                                         "rpn",
+                                         "reliability"])
 
 
 class Link(object):
     
+    # The links and components of a network are numerous, so their
+    # attributes are stored in slots, rather than per instance dictionaries
+    
+    __slots__ = ("label", "_items")
+    
     def __init__(self, label=None):
         
-        self.label = label
+        self.label = _intern(label)
         self._items = []
     
     @property
@@ -50,6 +63,12 @@ class Link(object):
     def __len__(self):
         return len(self._items)
     
+    def __getstate__(self):
+        return _get_slot_state(self)
+    
+    def __setstate__(self, state):
+        _set_slot_state(self, state)
+    
     def __str__(self):
         
         out = "["
@@ -69,11 +88,34 @@ class Link(object):
 class ReliabilityBase(object):
     
     __metaclass__ = abc.ABCMeta
-    nodenames = []
+    __slots__ = ()
     
     def __init__(self):
         self._severity_level = "critical"
+    
+    def __copy__(self):
         
+        # Shallow copy of the slots, which is much faster than the generic
+        # copy protocol
+        
+        cls = type(self)
+        result = cls.__new__(cls)
+        
+        for name in _get_slot_names(cls):
+            setattr(result, name, getattr(self, name))
+        
+        return result
+    
+    def __getstate__(self):
+        return _get_slot_state(self)
+    
+    def __setstate__(self, state):
+        _set_slot_state(self, state)
+    
+    @property
+    def severity_level(self):
+        return self._severity_level
+    
     def set_severity_level(self, set_severity_level):
         self._severity_level = set_severity_level
     
@@ -85,6 +127,10 @@ class ReliabilityBase(object):
     def get_mttf(self, pool):
         return
     
+    @abc.abstractmethod
+    def reduce_failure_rates(self, failure_rates):
+        return
+    
     def get_rpn(self, pool):
         
         failure_rate = self.get_failure_rate(pool)
@@ -115,26 +161,15 @@ class ReliabilityBase(object):
     def display(self, pool, pad=0):
         return
     
-    def get_node_name(self):
-        
-        for _ in range(pow(10, 6)):
-            
-            data = [random.choice(string.ascii_uppercase + string.digits)
-                                                            for _ in range(10)]
-            candidate = ''.join(data)
-            
-            if candidate not in self.nodenames:
-                self.nodenames.append(candidate)
-                return candidate
-        
-        raise RuntimeError("No unique node name found")
 
 
 class Component(ReliabilityBase):
     
+    __slots__ = ("label", "marker", "_failure_rate", "_severity_level")
+    
     def __init__(self, label, marker=-1):
         ReliabilityBase.__init__(self)
-        self.label = label
+        self.label = _intern(label)
         self.marker = marker
         self._failure_rate = None
     
@@ -153,6 +188,10 @@ class Component(ReliabilityBase):
     def get_mttf(self, pool):
         return _comp_ser_get_mttf(self, pool)
     
+    def reduce_failure_rates(self, failure_rates=None):
+        failure_rate = self.get_failure_rate()
+        return failure_rate, _failure_rate_to_mttf(failure_rate)
+    
     def get_probability_proportion(self, pool, label):
         
         if label == self.label:
@@ -174,9 +213,12 @@ class Component(ReliabilityBase):
                     dot,
                     levels=None,
                     label=None,
-                    force_horizontal=False):
+                    force_horizontal=False,
+                    handles=None):
         
-        handle = self.get_node_name()
+        if handles is None: handles = _get_node_handles(dot)
+        
+        handle = next(handles)
         failure_rate = self.get_failure_rate(pool)
         
         if failure_rate is None:
@@ -197,24 +239,24 @@ class Component(ReliabilityBase):
 
 class Serial(Link, ReliabilityBase):
     
+    __slots__ = ("_severity_level",)
+    
     def __init__(self, label=None):
         
         Link.__init__(self, label)
         ReliabilityBase.__init__(self)
     
     def get_failure_rate(self, pool):
-        
-        failure_rates = [pool[x].get_failure_rate(pool) for x in self._items
-                             if pool[x].get_failure_rate(pool) is not None]
-        
-        if not failure_rates:
-            return None
-        
-        return sum(failure_rates)
+        failure_rates = [pool[x].get_failure_rate(pool) for x in self._items]
+        return _serial_failure_rate(failure_rates)
     
     def get_mttf(self, pool):
         return _comp_ser_get_mttf(self, pool)
     
+    def reduce_failure_rates(self, failure_rates):
+        failure_rate = _serial_failure_rate(failure_rates)
+        return failure_rate, _failure_rate_to_mttf(failure_rate)
+    
     def get_probability_proportion(self, pool, label):
         return _ser_par_get_probability_proportion(self, pool, label)
     
@@ -243,7 +285,14 @@ class Serial(Link, ReliabilityBase):
         
         return out
     
-    def graph(self, pool, dot, levels=1, label=None, force_horizontal=False):
+    def graph(self, pool,
+                    dot,
+                    levels=1,
+                    label=None,
+                    force_horizontal=False,
+                    handles=None):
+        
+        if handles is None: handles = _get_node_handles(dot)
         
         handle = None
         reverse_first_edge = False
@@ -253,7 +302,7 @@ class Serial(Link, ReliabilityBase):
         
         if self.label is not None:
             
-            handle = self.get_node_name()
+            handle = next(handles)
             failure_rate = self.get_failure_rate(pool)
             
             if failure_rate is not None:
@@ -295,7 +344,8 @@ class Serial(Link, ReliabilityBase):
                 check_handle = link.graph(pool,
                                           s,
                                           levels,
-                                          item)
+                                          item,
+                                          handles=handles)
                 
                 if last_handle is not None and check_handle is not None:
                     
@@ -325,29 +375,24 @@ class Serial(Link, ReliabilityBase):
 
 class Parallel(Link, ReliabilityBase):
     
+    __slots__ = ("_severity_level",)
+    
     def __init__(self, label=None):
         
         Link.__init__(self, label)
         ReliabilityBase.__init__(self)
     
     def get_failure_rate(self, pool):
-        
         mttf = self.get_mttf(pool)
-        
-        if mttf is None:
-            return None
-        
-        return 1. / mttf
+        return _mttf_to_failure_rate(mttf)
     
     def get_mttf(self, pool):
-        
-        failure_rates = [pool[x].get_failure_rate(pool) for x in self._items
-                             if pool[x].get_failure_rate(pool) is not None]
-        
-        if not failure_rates:
-            return None
-        
-        return binomial(failure_rates)
+        failure_rates = [pool[x].get_failure_rate(pool) for x in self._items]
+        return _parallel_mttf(failure_rates)
+    
+    def reduce_failure_rates(self, failure_rates):
+        mttf = _parallel_mttf(failure_rates)
+        return _mttf_to_failure_rate(mttf), mttf
     
     def get_probability_proportion(self, pool, label):
         return _ser_par_get_probability_proportion(self, pool, label)
@@ -378,9 +423,16 @@ class Parallel(Link, ReliabilityBase):
         
         return out
     
-    def graph(self, pool, dot, levels=1, label=None, force_horizontal=False):
+    def graph(self, pool,
+                    dot,
+                    levels=1,
+                    label=None,
+                    force_horizontal=False,
+                    handles=None):
+        
+        if handles is None: handles = _get_node_handles(dot)
         
-        out_handle = self.get_node_name()
+        out_handle = next(handles)
         
         if self.label is not None:
             dot.node(out_handle, self.label, style="rounded", shape="box")
@@ -396,11 +448,11 @@ class Parallel(Link, ReliabilityBase):
         port_handles = []
         
         if self.label is not None:
-            handle = self.get_node_name()
+            handle = next(handles)
         else:
             handle = out_handle
         
-        dot.node(handle, shape="point", width="0.05")
+        self._graph_junction(dot, handle)
         
         with dot.subgraph() as s:
             
@@ -408,7 +460,7 @@ class Parallel(Link, ReliabilityBase):
             
             for _ in xrange(len(self._items)): # pylint: disable=undefined-variable
                 
-                port_handle = self.get_node_name()
+                port_handle = next(handles)
                 s.node(port_handle, shape="point", width="0.01")
                 port_handles.append(port_handle)
         
@@ -420,9 +472,18 @@ class Parallel(Link, ReliabilityBase):
             link = pool[item]
             
             if levels == 0:
-                check_handle = link.graph(pool, dot, levels, item, True)
+                check_handle = link.graph(pool,
+                                          dot,
+                                          levels,
+                                          item,
+                                          True,
+                                          handles)
             else:
-                check_handle = link.graph(pool, dot, levels, item)
+                check_handle = link.graph(pool,
+                                          dot,
+                                          levels,
+                                          item,
+                                          handles=handles)
             
             if check_handle is not None:
                 
@@ -438,28 +499,163 @@ class Parallel(Link, ReliabilityBase):
         
         return out_handle
     
+    def _graph_junction(self, dot, handle):
+        dot.node(handle, shape="point", width="0.05")
+    
     def __str__(self):
         out = "Parallel: {}".format(Link.__str__(self))
         return out
 
 
+class KofN(Parallel):
+    
+    # Redundant link which survives while at least k of its items survive.
+    # Parallel links are the special case where k is one.
+    
+    __slots__ = ("k",)
+    
+    def __init__(self, k, label=None):
+        
+        if k < 1:
+            err_str = "Argument 'k' must be at least one"
+            raise ValueError(err_str)
+        
+        Parallel.__init__(self, label)
+        self.k = k
+    
+    def get_mttf(self, pool):
+        failure_rates = [pool[x].get_failure_rate(pool) for x in self._items]
+        return _kofn_mttf(failure_rates, self.k)
+    
+    def reduce_failure_rates(self, failure_rates):
+        mttf = _kofn_mttf(failure_rates, self.k)
+        return _mttf_to_failure_rate(mttf), mttf
+    
+    def display(self, pool, pad=0):
+        
+        out = "<{} of {}: ".format(self.k, len(self._items))
+        
+        if self.label is not None:
+            failure_rate = self.get_failure_rate(pool)
+            if failure_rate is not None:
+                out += "{}: {:e}: ".format(self.label, failure_rate)
+            else:
+                out += "{}: ".format(self.label)
+        
+        nllen = 2 + pad + len(out)
+        
+        for item in self._items:
+            link = pool[item]
+            out += "{} ".format(link.display(pool, nllen)) + \
+                                                "\n" + " " * (nllen - 1)
+        
+        out = out.strip()
+        out += ">"
+        
+        return out
+    
+    def _graph_junction(self, dot, handle):
+        dot.node(handle,
+                 "{}/{}".format(self.k, len(self._items)),
+                 shape="circle",
+                 width="0.3",
+                 fixedsize="true",
+                 fontsize="10")
+    
+    def __str__(self):
+        out = "KofN ({} of {}): {}".format(self.k,
+                                           len(self._items),
+                                           Link.__str__(self))
+        return out
+
+
+class NodeHandles(object):
+    
+    # Iterator of unique node handles for a single graph
+    
+    def __init__(self, prefix="n"):
+        self._prefix = prefix
+        self._count = 0
+    
+    def __iter__(self):
+        return self
+    
+    def next(self):
+        handle = "{}{}".format(self._prefix, self._count)
+        self._count += 1
+        return handle
+
+
+class RatedPool(object):
+    
+    # Read-only view of a pool which overlays failure rates and severity
+    # levels onto its links, without modifying the underlying pool. Failure
+    # rates and severity levels are given as dictionaries keyed by the pool
+    # keys of the components, while severity_level is used for all other
+    # links.
+    
+    def __init__(self, pool, failure_rates, severity_levels, severity_level):
+        self._pool = pool
+        self._failure_rates = failure_rates
+        self._severity_levels = severity_levels
+        self._severity_level = severity_level
+    
+    def keys(self):
+        return self._pool.keys()
+    
+    def __getitem__(self, key):
+        
+        link = copy(self._pool[key])
+        
+        if isinstance(link, Component):
+            link.set_failure_rate(self._failure_rates.get(key))
+            severity_level = self._severity_levels.get(key,
+                                                       self._severity_level)
+        else:
+            severity_level = self._severity_level
+        
+        link.set_severity_level(severity_level)
+        
+        return link
+    
+    def __contains__(self, key):
+        return key in self._pool
+    
+    def __iter__(self):
+        return iter(self._pool)
+    
+    def __len__(self):
+        return len(self._pool)
+
+
 class ReliabilityWrapper(object):
     
-    def __init__(self, pool, key):
+    def __init__(self, pool, key, table=None):
+        
+        if table is None:
+            table = evaluate_pool(pool, root=key)
+        
         self._pool = pool
         self._link = self._pool[key]
+        self._metrics = table[key]
     
     def get_failure_rate(self):
-        return self._link.get_failure_rate(self._pool)
+        return self._metrics.failure_rate
     
     def get_mttf(self):
-        return self._link.get_mttf(self._pool)
+        return self._metrics.mttf
     
     def get_rpn(self):
-        return self._link.get_rpn(self._pool)
+        return self._metrics.rpn
     
     def get_reliability(self, time_hours):
-        return self._link.get_reliability(self._pool, time_hours)
+        
+        failure_rate = self._metrics.failure_rate
+        
+        if failure_rate is None:
+            return None
+        
+        return reliability(failure_rate, time_hours)
     
     def get_probability_proportion(self, label):
         return self._link.get_probability_proportion(self._pool, label)
@@ -474,30 +670,174 @@ class ReliabilityWrapper(object):
         return self._link.__str__()
 
 
+def evaluate_pool(pool, time_hours=None, root="array"):
+    
+    # Collect the metrics of every link below root (inclusive) in a single
+    # post-order traversal, so that each link is only evaluated once
+    
+    table = {}
+    stack = [(root, False)]
+    
+    while stack:
+        
+        key, expanded = stack.pop()
+        if key in table: continue
+        
+        link = pool[key]
+        
+        if not expanded and not isinstance(link, Component):
+            stack.append((key, True))
+            stack.extend((x, False) for x in reversed(link.items))
+            continue
+        
+        if isinstance(link, Component):
+            failure_rates = None
+        else:
+            failure_rates = [table[x].failure_rate for x in link.items]
+        
+        failure_rate, mttf = link.reduce_failure_rates(failure_rates)
+        
+        if failure_rate is None:
+            link_rpn = None
+            link_reliability = None
+        else:
+            link_rpn = rpn(failure_rate, link.severity_level)
+            if time_hours is None:
+                link_reliability = None
+            else:
+                link_reliability = reliability(failure_rate, time_hours)
+        
+        table[key] = LinkMetrics(failure_rate,
+                                 mttf,
+                                 link_rpn,
+                                 link_reliability)
+    
+    return table
+
+
+class LabelIndex(object):
+    
+    # Index of the labelled links of a pool, built in a single depth first
+    # traversal from the root. Each match is returned as a (label path, pool
+    # index) pair, where the label path holds the labels of the labelled
+    # ancestors of the link followed by its own label. As for find_labels,
+    # links below a match are not matched again and only the first link
+    # with a given label path is returned, in depth first order.
+    
+    def __init__(self, pool, root="array"):
+        
+        self._occurrences = defaultdict(list)
+        self._exact = defaultdict(list)
+        self._ngrams = defaultdict(set)
+        self._partial = {}
+        
+        self._build(pool, root)
+    
+    def find(self, label, partial_match=False):
+        
+        if not partial_match:
+            return self._exact.get(label, [])
+        
+        if label not in self._partial:
+            self._partial[label] = self._find_partial(label)
+        
+        return self._partial[label]
+    
+    def _build(self, pool, root):
+        
+        seen_paths = set()
+        position = 0
+        stack = [(root, ())]
+        
+        while stack:
+            
+            pool_index, path = stack.pop()
+            link = pool[pool_index]
+            
+            if link.label is not None:
+                
+                label = link.label
+                ancestors = path
+                path = path + (label,)
+                
+                self._occurrences[label].append((position,
+                                                 path,
+                                                 pool_index))
+                position += 1
+                
+                if label not in ancestors and path not in seen_paths:
+                    self._exact[label].append((list(path), pool_index))
+                    seen_paths.add(path)
+            
+            # Only Serial and Parallel links have items. Testing for Link
+            # is faster than testing for the abstract Component class.
+            if not isinstance(link, Link): continue
+            
+            stack.extend((x, path) for x in reversed(link.items))
+        
+        for label in self._occurrences:
+            
+            if not isinstance(label, basestring): continue # pylint: disable=undefined-variable
+            
+            for ngram in _get_ngrams(label):
+                self._ngrams[ngram].add(label)
+        
+        return
+    
+    def _find_partial(self, label):
+        
+        candidates = self._get_candidates(label)
+        occurrences = sorted(x for candidate in candidates
+                                 for x in self._occurrences[candidate])
+        
+        seen_paths = set()
+        result = []
+        
+        for _, path, pool_index in occurrences:
+            
+            if any(_is_partial_match(label, x) for x in path[:-1]):
+                continue
+            
+            if path in seen_paths: continue
+            
+            result.append((list(path), pool_index))
+            seen_paths.add(path)
+        
+        return result
+    
+    def _get_candidates(self, label):
+        
+        # Labels containing every n-gram of the given label, which are then
+        # checked for the full substring
+        
+        ngrams = _get_ngrams(label)
+        
+        if ngrams:
+            labels = set.intersection(*[self._ngrams.get(x, set())
+                                                        for x in ngrams])
+        else:
+            labels = self._occurrences.keys()
+        
+        return [x for x in labels if _is_partial_match(label, x)]
+
+
 def find_all_labels(label,
                     pool,
                     partial_match=False,
                     filter_label=None,
-                    return_one=False):
+                    return_one=False,
+                    label_index=None):
     
-    all_labels = []
-    all_indexes = []
+    if label_index is None:
+        label_index = LabelIndex(pool)
     
-    found_labels = -1
+    matches = label_index.find(label, partial_match)
     
-    while len(all_labels) > found_labels:
-        
-        found_labels += 1
-        labels, index = find_labels(label,
-                                    pool,
-                                    exclude_labels=all_labels,
-                                    partial_match=partial_match)
-        
-        if (labels is not None and
-            (filter_label is None or filter_label in labels)):
-            
-            all_labels.append(labels)
-            all_indexes.append(index)
+    if filter_label is not None:
+        matches = [x for x in matches if filter_label in x[0]]
+    
+    all_labels = [list(x[0]) for x in matches]
+    all_indexes = [x[1] for x in matches]
     
     if return_one:
         
@@ -603,10 +943,106 @@ def find_strings(pool, hub_link="array"):
     return all_strings
 
 
-def _comp_ser_get_mttf(link, pool):
+def _get_node_handles(dot):
+    
+    # The handles are stored with the graph, so that links drawn into the
+    # same graph by separate calls are given different handles
     
+    if not hasattr(dot, "_reliability_handles"):
+        dot._reliability_handles = NodeHandles() # pylint: disable=protected-access
+    
+    return dot._reliability_handles # pylint: disable=protected-access
+
+
+def _get_ngrams(label, n=3):
+    return set(label[i:i + n] for i in xrange(len(label) - n + 1)) # pylint: disable=undefined-variable
+
+
+def _is_partial_match(label, test_label):
+    return (isinstance(test_label, basestring) and # pylint: disable=undefined-variable
+            label in test_label)
+
+
+def _comp_ser_get_mttf(link, pool):
     failure_rate = link.get_failure_rate(pool)
-        
+    return _failure_rate_to_mttf(failure_rate)
+
+
+def _serial_failure_rate(failure_rates):
+    
+    failure_rates = [x for x in failure_rates if x is not None]
+    
+    if not failure_rates:
+        return None
+    
+    return sum(failure_rates)
+
+
+def _parallel_mttf(failure_rates):
+    
+    failure_rates = [x for x in failure_rates if x is not None]
+    
+    if not failure_rates:
+        return None
+    
+    return parallel_mttf(failure_rates)
+
+
+def _kofn_mttf(failure_rates, k):
+    
+    failure_rates = [x for x in failure_rates if x is not None]
+    
+    if not failure_rates:
+        return None
+    
+    return kofn_mttf(failure_rates, k)
+
+
+def _get_slot_names(cls):
+    
+    if cls in _SLOT_NAMES: return _SLOT_NAMES[cls]
+    
+    names = []
+    
+    for base in cls.__mro__:
+        for name in base.__dict__.get("__slots__", ()):
+            if name not in names: names.append(name)
+    
+    _SLOT_NAMES[cls] = names
+    
+    return names
+
+
+def _get_slot_state(obj):
+    
+    # Classes with slots need explicit state to be pickled with protocols
+    # below 2
+    
+    return {name: getattr(obj, name)
+                    for name in _get_slot_names(type(obj)) if hasattr(obj, name)}
+
+
+def _set_slot_state(obj, state):
+    
+    for name, value in state.iteritems():
+        if name == "label": value = _intern(value)
+        setattr(obj, name, value)
+    
+    return
+
+
+def _intern(label):
+    
+    # Labels are repeated for every device, so byte string labels share a
+    # single copy
+    
+    if type(label) is str: return intern(label) # pylint: disable=unidiomatic-typecheck
+    
+    return label
+
+
+def _failure_rate_to_mttf(failure_rate):
+    
     if failure_rate is None:
         return None
     elif failure_rate == 0:
@@ -615,6 +1051,14 @@ def _comp_ser_get_mttf(link, pool):
     return 1 / failure_rate
 
 
+def _mttf_to_failure_rate(mttf):
+    
+    if mttf is None:
+        return None
+    
+    return 1. / mttf
+
+
 def _ser_par_get_probability_proportion(link, pool, label):
     
     if label == link.label:
@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+DTOcean Reliability Assessment Module (RAM)
+
+Safe loading of hierarchy, bill of materials and database files, written
+either as Python literals, like the files in the example_data directory, or
+as JSON.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+# Built in modules
+import os
+import re
+import json
+import logging
+import tempfile
+from collections import Counter
+
+from .parse import SubNetwork
+
+# Start logging
+module_logger = logging.getLogger(__name__)
+
+_FORMAT = "dtocean-reliability"
+_FORMAT_VERSION = 1
+_JSON_EXTENSION = ".json"
+
+# JSON objects with a single tag key hold the values which JSON can not
+# represent directly, as lists of items or (key, value) pairs
+_COUNTER_TAG = "__counter__"
+_TUPLE_TAG = "__tuple__"
+_ITEMS_TAG = "__items__"
+_UNICODE_TAG = "__unicode__"
+_TAGS = (_COUNTER_TAG, _TUPLE_TAG, _ITEMS_TAG, _UNICODE_TAG)
+
+# Literal tokens never span lines, so files are parsed a line at a time.
+# Whitespace and comments are skipped before each token, any character
+# which does not start a token is matched by "other" and trailing whitespace
+# and comments are matched without a token, so every character of a line is
+# matched.
+_TOKEN_PATTERN = re.compile(r"""(?:\s|\#.*)*(?:
+    (?P<string>[uUbB]?(?:'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"))|
+    (?P<comma>,)|
+    (?P<colon>:)|
+    (?P<int>-?\d+)[lL]?(?![.eE\w])|
+    (?P<open>[\[{(]|Counter\s*\()|
+    (?P<close>[\]})])|
+    (?P<float>-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)|
+    (?P<name>[A-Za-z_]\w*)|
+    (?P<other>\S)|
+    $)""", re.VERBOSE)
+
+_NAMES = {"True": True, "False": False, "None": None}
+_CLOSING = {"[": "]", "{": "}", "(": ")", "C": ")"}
+
+# Parser states: expecting a value or a closing bracket, expecting a value
+# only, expecting a separator or a closing bracket and expecting a colon
+_START, _VALUE, _SEPARATOR, _COLON = range(4)
+
+
+def load(path):
+    
+    # Load the data in a file, which is read as JSON if it has the .json
+    # extension, or as a Python literal otherwise
+    
+    if os.path.splitext(path)[1].lower() == _JSON_EXTENSION:
+        return load_json(path)
+    
+    with open(path, "r") as f:
+        data = parse_literal(f, path)
+    
+    return data
+
+
+def load_network(hierarchy_path, bill_of_materials_path):
+    return SubNetwork(load(hierarchy_path), load(bill_of_materials_path))
+
+
+def parse_literal(lines, source="<string>"):
+    
+    # Parse a Python literal, made of dicts, lists, tuples, strings,
+    # numbers, True, False, None and Counter calls, from an iterable of
+    # lines. Nothing is evaluated, so any other name or expression raises a
+    # ValueError.
+    
+    # Items of the open brackets, with the top level as an implicit tuple.
+    # Repeated strings and integers are decoded once and shared, as they
+    # are by eval.
+    stack = []
+    constants = {}
+    items = []
+    bracket = None
+    state = _START
+    
+    for line_number, line in enumerate(lines, 1):
+        
+        for match in _TOKEN_PATTERN.finditer(line):
+            
+            kind = match.lastgroup
+            
+            if kind == "string":
+                
+                if state == _SEPARATOR or state == _COLON:
+                    _raise_syntax_error(source, line_number, match)
+                
+                text = match.group(kind)
+                value = constants.get(text)
+                
+                if value is None:
+                    value = constants[text] = _get_string(text)
+            
+            elif kind == "comma":
+                
+                if state != _SEPARATOR:
+                    _raise_syntax_error(source, line_number, match)
+                
+                state = _START
+                
+                continue
+            
+            elif kind == "colon":
+                
+                if state != _COLON:
+                    _raise_syntax_error(source, line_number, match)
+                
+                state = _VALUE
+                
+                continue
+            
+            elif kind == "open":
+                
+                if state == _SEPARATOR or state == _COLON:
+                    _raise_syntax_error(source, line_number, match)
+                
+                stack.append((bracket, items, state))
+                bracket = match.group(kind)[0]
+                items = []
+                state = _START
+                
+                continue
+            
+            elif kind == "close":
+                
+                if (state == _VALUE or state == _COLON or
+                    _CLOSING.get(bracket) != match.group(kind)):
+                    _raise_syntax_error(source, line_number, match)
+                
+                try:
+                    value = _close(bracket, items, state)
+                except (TypeError, ValueError):
+                    _raise_syntax_error(source, line_number, match)
+                
+                bracket, items, state = stack.pop()
+            
+            else:
+                
+                if kind is None: continue
+                
+                if state == _SEPARATOR or state == _COLON:
+                    _raise_syntax_error(source, line_number, match)
+                
+                text = match.group(kind)
+                
+                if kind == "int":
+                    value = constants.get(text)
+                    if value is None: value = constants[text] = int(text)
+                elif kind == "float":
+                    value = float(text)
+                elif kind == "name" and text in _NAMES:
+                    value = _NAMES[text]
+                else:
+                    _raise_syntax_error(source, line_number, match)
+            
+            items.append(value)
+            
+            # Values in the key position of a dict are followed by a colon
+            if state == _START and bracket == "{":
+                state = _COLON
+            else:
+                state = _SEPARATOR
+    
+    if stack or not items:
+        err_str = "Unexpected end of input in '{}'".format(source)
+        raise ValueError(err_str)
+    
+    return _close(bracket, items, state)
+
+
+def load_json(path):
+    
+    with open(path, "r") as f:
+        content = json.load(f, object_hook=_decode_object)
+    
+    if (not isinstance(content, dict) or
+        content.get("format") != _FORMAT or
+        "data" not in content):
+        err_str = "File '{}' is not a {} JSON file".format(path, _FORMAT)
+        raise ValueError(err_str)
+    
+    if content.get("version") != _FORMAT_VERSION:
+        err_str = "JSON format version {} not supported".format(
+                                                        content.get("version"))
+        raise ValueError(err_str)
+    
+    return content["data"]
+
+
+def dump_json(data, path):
+    
+    # Write data to path as JSON, such that load_json returns an identical
+    # value, including Counters, tuples, unicode strings and non-string
+    # dictionary keys
+    
+    content = {"format": _FORMAT,
+               "version": _FORMAT_VERSION,
+               "data": _encode(data)}
+    
+    # Write to a temporary file first, so that other processes never
+    # read a partial file
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory)
+    
+    try:
+        
+        with os.fdopen(handle, "w") as f:
+            json.dump(content, f, separators=(",", ":"))
+        
+        if os.name == "nt" and os.path.isfile(path): os.remove(path)
+        os.rename(temp_path, path)
+    
+    except Exception:
+        os.remove(temp_path)
+        raise
+    
+    return
+
+
+def convert(path, json_path=None):
+    
+    # Convert a Python literal file to JSON. If json_path is not given, the
+    # extension of path is replaced with .json
+    
+    if json_path is None:
+        json_path = os.path.splitext(path)[0] + _JSON_EXTENSION
+    
+    dump_json(load(path), json_path)
+    
+    return json_path
+
+
+def _close(bracket, items, state):
+    
+    if bracket == "[":
+        return items
+    
+    if bracket == "{":
+        return dict(zip(items[::2], items[1::2]))
+    
+    if bracket == "C":
+        
+        if len(items) > 1:
+            raise ValueError("Counter takes at most one argument")
+        
+        return Counter(*items)
+    
+    # A single item in brackets, or at the top level, is a tuple only if it
+    # is followed by a comma
+    if len(items) == 1 and state == _SEPARATOR:
+        return items[0]
+    
+    return tuple(items)
+
+
+def _get_string(text):
+    
+    prefix = text[0]
+    
+    if prefix in "uU":
+        return text[2:-1].decode("unicode_escape")
+    
+    if prefix in "bB":
+        text = text[1:]
+    
+    value = text[1:-1]
+    if "\\" in value: value = value.decode("string_escape")
+    
+    return value
+
+
+def _raise_syntax_error(source, line_number, match):
+    
+    # The error is reported at the start of the token, after any whitespace
+    column = match.start(match.lastgroup) + 1
+    err_str = "Invalid syntax in '{}' at line {}, column {}".format(
+                                                                source,
+                                                                line_number,
+                                                                column)
+    raise ValueError(err_str)
+
+
+def _encode(obj):
+    
+    if isinstance(obj, Counter):
+        return {_COUNTER_TAG: [[_encode(key), value]
+                                            for key, value in obj.iteritems()]}
+    
+    if isinstance(obj, dict):
+        
+        if all(isinstance(key, str) and key not in _TAGS for key in obj):
+            return {key: _encode(value) for key, value in obj.iteritems()}
+        
+        return {_ITEMS_TAG: [[_encode(key), _encode(value)]
+                                            for key, value in obj.iteritems()]}
+    
+    if isinstance(obj, tuple):
+        return {_TUPLE_TAG: [_encode(x) for x in obj]}
+    
+    if isinstance(obj, list):
+        return [_encode(x) for x in obj]
+    
+    if isinstance(obj, unicode): # pylint: disable=undefined-variable
+        return {_UNICODE_TAG: obj}
+    
+    return obj
+
+
+def _decode_object(obj):
+    
+    # JSON strings are loaded as unicode, so untagged strings are converted
+    # back to byte strings. Objects are decoded from the inside out, so only
+    # lists need to be decoded here.
+    
+    if len(obj) == 1:
+        
+        key, value = obj.items()[0]
+        
+        if key == _UNICODE_TAG: return _Unicode(value)
+        
+        if key in _TAGS:
+            
+            _decode_list(value)
+            
+            if key == _TUPLE_TAG: return tuple(value)
+            if key == _COUNTER_TAG: return Counter(dict(value))
+            
+            return dict(value)
+    
+    result = {}
+    
+    for key, value in obj.iteritems():
+        
+        if isinstance(value, unicode): # pylint: disable=undefined-variable
+            value = _get_str(value)
+        elif isinstance(value, list):
+            _decode_list(value)
+        
+        result[_get_str(key)] = value
+    
+    return result
+
+
+def _decode_list(values):
+    
+    for i, value in enumerate(values):
+        
+        if isinstance(value, unicode): # pylint: disable=undefined-variable
+            values[i] = _get_str(value)
+        elif isinstance(value, list):
+            _decode_list(value)
+    
+    return
+
+
+def _get_str(value):
+    
+    # Byte strings are decoded as UTF-8 when written by json
+    if type(value) is _Unicode: return unicode(value) # pylint: disable=undefined-variable
+    
+    return value.encode("utf-8")
+
+
+class _Unicode(unicode): # pylint: disable=undefined-variable
+    
+    # Tagged unicode strings, which are not converted to byte strings by
+    # the object or list that holds them
+    pass
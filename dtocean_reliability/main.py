@@ -26,17 +26,25 @@ DTOcean Reliability Assessment Module (RAM)
 
 # Built in modules
 import logging
-from copy import copy, deepcopy
+from copy import copy
 from collections import OrderedDict
 
-from .graph import (Component,
+import numpy as np
+
+from .cache import get_networks_key
+from .graph import (LinkMetrics,
+                    RatedPool,
                     ReliabilityWrapper,
+                    LabelIndex,
                     find_all_labels,
                     find_strings)
 from .parse import (check_nodes,
                     complete_networks,
                     combine_networks,
                     build_pool)
+from .plan import compile_pool
+from .numerics import reliability, rpn
+from .rates import SCENARIOS, FailureRateTable
 
 # Start logging
 module_logger = logging.getLogger(__name__)
@@ -47,7 +55,8 @@ class Network(object):
     def __init__(self, database,
                        electrical_network = None,
                        moorings_network = None,
-                       user_network = None):
+                       user_network = None,
+                       cache=None):
         
         if (electrical_network is None and
             moorings_network is None and
@@ -56,44 +65,97 @@ class Network(object):
             err_msg = "At least one network input must be provided"
             raise ValueError (err_msg)
         
-        check_nodes(electrical_network, moorings_network)
+        # If a PoolCache is given, the checking and combination of the
+        # networks is skipped for networks which have been built before
+        entry = None
         
-        (electrical_network,
-         moorings_network,
-         user_network) = complete_networks(electrical_network,
-                                           moorings_network,
-                                           user_network)
+        if cache is not None:
+            cache_key = get_networks_key(electrical_network,
+                                         moorings_network,
+                                         user_network)
+            entry = cache.get(cache_key)
         
-        (array_hierarcy,
-         device_hierachy) = combine_networks(electrical_network,
-                                             moorings_network,
-                                             user_network)
+        if entry is None:
+            
+            pool = _build_network_pool(electrical_network,
+                                       moorings_network,
+                                       user_network)
+            plan = compile_pool(pool)
+            label_index = LabelIndex(pool)
+            subhub_indices = _get_indices(pool, label_index, "subhub")
+            device_indices = _get_indices(pool, label_index, "device")
+            curtailments = _get_curtailments(pool, label_index)
+            
+            if cache is not None:
+                cache.put(cache_key,
+                          pool,
+                          plan,
+                          subhub_indices,
+                          device_indices,
+                          curtailments)
+        
+        else:
+            
+            (pool,
+             plan,
+             subhub_indices,
+             device_indices,
+             curtailments) = entry
+            label_index = LabelIndex(pool)
         
         self._db = database
-        self._pool = build_pool(array_hierarcy, device_hierachy)
-        self._subhub_indices = _get_indices(self._pool, "subhub")
-        self._device_indices = _get_indices(self._pool, "device")
-        self._curtailments = _get_curtailments(self._pool)
+        self._pool = pool
+        self._labels = label_index
+        self._subhub_indices = subhub_indices
+        self._device_indices = device_indices
+        self._curtailments = curtailments
         self._system_root = ["device", "subhub", "array"]
+        self._plan = plan
+        self._evaluation = None
+        
+        # The failure rates of the database are resolved when first needed
+        # and shared by all copies of the network
+        self._rate_table = None
+        self._rate_rows = None
+        
+        # Failure rate state, ordered as the components of the plan
+        self._failure_rates = np.full(self._plan.n_components, np.nan)
+        self._severity_levels = ["critical"] * self._plan.n_components
+        self._severity_level = "critical"
     
     def set_failure_rates(self, severitylevel='critical',
                                 calcscenario='mean',
                                 k_factors=None,
                                 inplace=False):
         
+        # The network topology is shared between all copies, so only the
+        # failure rates and severity levels are replaced
+        
         # pylint: disable=protected-access
         
+        rate_table, rate_rows = self._get_rate_table()
+        
+        if k_factors:
+            markers = [self._pool[x].marker for x in self._plan.component_keys]
+        else:
+            markers = None
+        
+        (failure_rates,
+         severity_levels) = rate_table.get_failure_rates(rate_rows,
+                                                         severitylevel,
+                                                         calcscenario,
+                                                         markers,
+                                                         k_factors)
+        
         if inplace:
             network = self
         else:
             network = copy(self)
-            network._pool = deepcopy(self._pool)
         
-        _set_component_failure_rates(network._pool,
-                                     network._db,
-                                     severitylevel,
-                                     calcscenario,
-                                     k_factors=k_factors)
+        network._failure_rates = failure_rates
+        network._severity_levels = severity_levels
+        network._severity_level = severitylevel
+        network._evaluation = None
         
         if inplace:
             result = None
@@ -102,65 +164,180 @@ class Network(object):
         
         return result
     
-    def get_systems_metrics(self, time_hours=None):
+    def evaluate(self, time_hours=None):
         
-        indices = []
-        systems = []
-        failure_rates = []
-        mttfs = []
-        rpns = []
-        reliabilities = []
-        
-        # Array
-        array = self._pool["array"]
-        indices.append("array")
-        systems.append("array")
-        failure_rates.append(array.get_failure_rate(self._pool))
-        mttfs.append(array.get_mttf(self._pool))
-        rpns.append(array.get_rpn(self._pool))
+        # Only evaluations at a single time, or none, are kept
+        is_scalar = np.ndim(time_hours) == 0
         
-        if time_hours is not None:
-            reliabilities.append(array.get_reliability(self._pool, time_hours))
+        if (is_scalar and
+            self._evaluation is not None and
+            self._evaluation[0] == time_hours):
+            return self._evaluation[1]
         
-        # Subhub
-        if self._subhub_indices is not None:
+        plan = self._plan
+        failure_rates, mttfs = plan.execute(self._failure_rates)
+        
+        link_severity_levels = [self._severity_level] * (len(plan) -
+                                                         plan.n_components)
+        severity_levels = self._severity_levels + link_severity_levels
+        
+        # Nodes of the same class share their metrics, so only the first
+        # node of each class needs to be converted
+        classes = plan.get_uniform_classes(self._failure_rates)
+        
+        if classes is None:
+            nodes = np.arange(len(plan))
+        else:
+            nodes = plan.get_first_nodes()
+            severity_levels = [severity_levels[i] for i in nodes]
+        
+        failure_rates = failure_rates[nodes]
+        mttfs = mttfs[nodes]
+        rpns = rpn(failure_rates, severity_levels)
+        
+        if time_hours is None:
+            reliabilities = [None] * len(nodes)
+        elif is_scalar:
+            reliabilities = reliability(failure_rates, time_hours).tolist()
+        else:
+            # Each link has an array of reliabilities, one for each time
+            shape = (-1,) + (1,) * np.ndim(time_hours)
+            reliabilities = list(reliability(failure_rates.reshape(shape),
+                                             time_hours))
+        
+        metrics = []
+        
+        for failure_rate, mttf, link_rpn, link_reliability in zip(
+                                                    failure_rates.tolist(),
+                                                    mttfs.tolist(),
+                                                    rpns.tolist(),
+                                                    reliabilities):
             
-            subhub_names = sorted(self._subhub_indices.keys())
+            if np.isnan(failure_rate):
+                metrics.append(LinkMetrics(None, None, None, None))
+                continue
             
-            for name in subhub_names:
-                
-                idx = self._subhub_indices[name]
-                subhub = self._pool[idx]
-                
-                indices.append(idx)
-                systems.append(name)
-                failure_rates.append(subhub.get_failure_rate(self._pool))
-                mttfs.append(subhub.get_mttf(self._pool))
-                rpns.append(subhub.get_rpn(self._pool))
-                
-                if time_hours is not None:
-                    reliabilities.append(subhub.get_reliability(self._pool,
-                                                                time_hours))
+            metrics.append(LinkMetrics(failure_rate,
+                                       mttf,
+                                       int(link_rpn),
+                                       link_reliability))
         
-        # Devices
-        if self._device_indices is not None:
+        if classes is None:
+            table = dict(zip(plan.keys, metrics))
+        else:
+            table = dict(zip(plan.keys, [metrics[i] for i in classes]))
+        
+        if is_scalar: self._evaluation = (time_hours, table)
+        
+        return table
+    
+    def evaluate_batch(self, rates_matrix):
+        
+        # Evaluate the systems metrics for many sets of component failure
+        # rates at once. Each row of rates_matrix gives the failure rates
+        # (per 10^6 hours) of the components, in the order returned by
+        # get_components. Each metric is returned as an array with one row
+        # per sample and one column per system, with NaN in place of None.
+        
+        plan = self._plan
+        rates_matrix = np.atleast_2d(rates_matrix)
+        
+        indices, systems = self._get_systems()
+        columns = [plan.index[idx] for idx in indices]
+        severitylevels = [self._severity_level] * len(indices)
+        
+        # Only the system columns are kept for each sample
+        failure_rates, mttfs = plan.execute(rates_matrix, columns)
+        
+        result = OrderedDict()
+        result["Link"] = indices
+        result["System"] = systems
+        result["lambda"] = failure_rates
+        result["MTTF"] = mttfs
+        result["RPN"] = rpn(result["lambda"], severitylevels)
+        
+        return result
+    
+    def evaluate_scenarios(self, time_hours=None, k_factors=None):
+        
+        # Systems metrics for every combination of severity level and
+        # calculation scenario, evaluated in a single vectorised pass over
+        # the network. Returns an OrderedDict keyed by (severitylevel,
+        # calcscenario) tuples, with values in the format of
+        # get_systems_metrics. The failure rates set on the network are not
+        # used or changed.
+        
+        plan = self._plan
+        rate_table, rate_rows = self._get_rate_table()
+        
+        if k_factors:
+            markers = [self._pool[x].marker for x in plan.component_keys]
+        else:
+            markers = None
+        
+        rates_matrix = rate_table.get_scenario_failure_rates(rate_rows,
+                                                             markers,
+                                                             k_factors)
+        
+        indices, systems = self._get_systems()
+        columns = [plan.index[idx] for idx in indices]
+        severitylevels = [[x] for x, _ in SCENARIOS]
+        
+        failure_rates, mttfs = plan.execute(rates_matrix, columns)
+        rpns = rpn(failure_rates, severitylevels)
+        
+        if time_hours is not None:
+            reliabilities = reliability(failure_rates, time_hours)
+        
+        result = OrderedDict()
+        
+        for i, scenario in enumerate(SCENARIOS):
             
-            device_names = sorted(self._device_indices.keys())
+            if np.isnan(failure_rates[i]).all():
+                result[scenario] = None
+                continue
             
-            for name in device_names:
-                
-                idx = self._device_indices[name]
-                device = self._pool[idx]
-                
-                indices.append(idx)
-                systems.append(name)
-                failure_rates.append(device.get_failure_rate(self._pool))
-                mttfs.append(device.get_mttf(self._pool))
-                rpns.append(device.get_rpn(self._pool))
-                
-                if time_hours is not None:
-                    reliabilities.append(device.get_reliability(self._pool,
-                                                                time_hours))
+            valid = ~np.isnan(failure_rates[i])
+            
+            metrics = OrderedDict()
+            metrics["Link"] = indices
+            metrics["System"] = systems
+            metrics["lambda"] = _to_list(failure_rates[i], valid)
+            metrics["MTTF"] = _to_list(mttfs[i], valid)
+            metrics["RPN"] = _to_list(rpns[i].astype(int), valid)
+            
+            if time_hours is not None:
+                key = "R ({} hours)".format(time_hours)
+                metrics[key] = _to_list(reliabilities[i], valid)
+            
+            result[scenario] = metrics
+        
+        return result
+    
+    def get_components(self):
+        
+        # Component links in the order used by evaluate_batch
+        
+        plan = self._plan
+        components = [self._pool[idx] for idx in plan.component_keys]
+        
+        result = OrderedDict()
+        result["Link"] = list(plan.component_keys)
+        result["Component"] = [x.label for x in components]
+        result["Marker"] = [x.marker for x in components]
+        
+        return result
+    
+    def get_systems_metrics(self, time_hours=None):
+        
+        table = self.evaluate(time_hours)
+        indices, systems = self._get_systems()
+        
+        metrics = [table[idx] for idx in indices]
+        failure_rates = [x.failure_rate for x in metrics]
+        mttfs = [x.mttf for x in metrics]
+        rpns = [x.rpn for x in metrics]
+        reliabilities = [x.reliability for x in metrics]
         
         if set(failure_rates) == set([None]): return None
         
@@ -177,6 +354,34 @@ class Network(object):
         
         return result
     
+    def get_reliability_curves(self, times, exact=False):
+        
+        # Reliability of every system, in the order of get_systems_metrics,
+        # at each of the given times (in hours). The failure rates are
+        # evaluated once and broadcast against the times, returning an
+        # array with one row per system and one column per time. Systems
+        # without a failure rate are NaN.
+        
+        # If exact is True, the survival functions of the components are
+        # combined through the network instead, rather than approximating
+        # each parallel link by a constant failure rate of 1 / MTTF.
+        
+        indices, _ = self._get_systems()
+        
+        if exact:
+            reliabilities = self._plan.execute_reliability(
+                                                        self._failure_rates,
+                                                        times)
+            return reliabilities[[self._plan.index[x] for x in indices]]
+        
+        table = self.evaluate()
+        failure_rates = [table[idx].failure_rate for idx in indices]
+        failure_rates = np.array([np.nan if x is None else x
+                                                    for x in failure_rates])
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        
+        return reliability(failure_rates[:, np.newaxis], times)
+    
     def get_subsystem_metrics(self, subsystem_name, time_hours=None):
         
         def get_lowest_system(labels):
@@ -190,28 +395,20 @@ class Network(object):
         
         self._check_not_system(subsystem_name)
     
-        all_labels, indices = find_all_labels(subsystem_name, self._pool)
+        all_labels, indices = find_all_labels(subsystem_name,
+                                              self._pool,
+                                              label_index=self._labels)
         
         if all_labels is None: return None
         
-        systems = []
-        failure_rates = []
-        mttfs = []
-        rpns = []
-        reliabilities = []
+        table = self.evaluate(time_hours)
         
-        for labels, index in zip(all_labels, indices):
-            
-            link = self._pool[index]
-            
-            systems.append(get_lowest_system(labels))
-            failure_rates.append(link.get_failure_rate(self._pool))
-            mttfs.append(link.get_mttf(self._pool))
-            rpns.append(link.get_rpn(self._pool))
-            
-            if time_hours is not None:
-                reliabilities.append(link.get_reliability(self._pool,
-                                                          time_hours))
+        systems = [get_lowest_system(labels) for labels in all_labels]
+        metrics = [table[index] for index in indices]
+        failure_rates = [x.failure_rate for x in metrics]
+        mttfs = [x.mttf for x in metrics]
+        rpns = [x.rpn for x in metrics]
+        reliabilities = [x.reliability for x in metrics]
         
         # Build curtailments
         curtailments = []
@@ -231,7 +428,7 @@ class Network(object):
             curtailments.append([system])
         
         if set(failure_rates) == set([None]): return None
-
+        
         result = OrderedDict()
         result["Link"] = indices
         result["System"] = systems
@@ -247,8 +444,65 @@ class Network(object):
         
         return result
     
+    def start_session(self):
+        
+        # Mutable copy of the evaluation of this network, which can be
+        # updated one component at a time (see EvaluationSession)
+        
+        return EvaluationSession(self)
+    
     def display(self):
-        return self._pool['array'].display(self._pool)
+        pool = self._get_rated_pool()
+        return pool['array'].display(pool)
+    
+    def _get_rate_table(self):
+        
+        if self._rate_table is None:
+            
+            # Only the components of the network are fetched
+            labels = [self._pool[x].label for x in self._plan.component_keys]
+            rate_table = FailureRateTable(self._db, set(labels))
+            
+            self._rate_rows = rate_table.get_rows(labels)
+            self._rate_table = rate_table
+        
+        return self._rate_table, self._rate_rows
+    
+    def _get_rated_pool(self):
+        
+        keys = self._plan.component_keys
+        failure_rates = [None if np.isnan(x) else float(x)
+                                            for x in self._failure_rates]
+        
+        return RatedPool(self._pool,
+                         dict(zip(keys, failure_rates)),
+                         dict(zip(keys, self._severity_levels)),
+                         self._severity_level)
+    
+    def _get_systems(self):
+        
+        indices = ["array"]
+        systems = ["array"]
+        
+        # Subhub
+        if self._subhub_indices is not None:
+            
+            subhub_names = sorted(self._subhub_indices.keys())
+            
+            for name in subhub_names:
+                indices.append(self._subhub_indices[name])
+                systems.append(name)
+        
+        # Devices
+        if self._device_indices is not None:
+            
+            device_names = sorted(self._device_indices.keys())
+            
+            for name in device_names:
+                indices.append(self._device_indices[name])
+                systems.append(name)
+        
+        return indices, systems
     
     def _check_not_system(self, name):
                 
@@ -260,7 +514,9 @@ class Network(object):
             raise ValueError(err_str)
     
     def __getitem__(self, key):
-        return ReliabilityWrapper(self._pool, key)
+        return ReliabilityWrapper(self._get_rated_pool(),
+                                  key,
+                                  self.evaluate())
     
     def __len__(self):
         
@@ -273,9 +529,206 @@ class Network(object):
         return result
 
 
-def _get_indices(pool, label):
+class EvaluationSession(object):
+    
+    # Holds the failure rate and MTTF of every link of a network, so that
+    # the failure rates of single components can be changed without
+    # evaluating the whole network again. Changing a component marks its
+    # ancestors (found through parent pointers) as out of date, and these
+    # are evaluated again, in topological order, only when metrics are next
+    # requested. The cost of each change therefore grows with the depth and
+    # fan-out of the network, rather than its size.
+    
+    def __init__(self, network):
+        
+        # pylint: disable=protected-access
+        
+        plan = network._plan
+        failure_rates, mttfs = plan.execute(network._failure_rates)
+        
+        self._network = network
+        self._plan = plan
+        self._parent_indptr, self._parent_indices = plan.get_parents()
+        self._component_failure_rates = network._failure_rates.copy()
+        self._failure_rates = failure_rates
+        self._mttfs = mttfs
+        self._stale = set()
+        
+        self._marker_slots = {}
+        
+        for i, key in enumerate(plan.component_keys):
+            marker = network._pool[key].marker
+            self._marker_slots.setdefault(marker, []).append(i)
+    
+    def update_component(self, marker, failure_rate):
+        
+        # Set the failure rate (per 10^6 hours) of every component with the
+        # given marker. A failure rate of None removes the failure rate.
+        
+        if marker not in self._marker_slots:
+            err_str = "Component marker '{}' not found".format(marker)
+            raise ValueError(err_str)
+        
+        # A zero failure rate is an ideal component, with infinite MTTF
+        if failure_rate is None: failure_rate = np.nan
+        failure_rate = np.float64(failure_rate)
+        
+        stack = []
+        
+        for i in self._marker_slots[marker]:
+            
+            self._component_failure_rates[i] = failure_rate
+            self._failure_rates[i] = failure_rate / 1e6
+            
+            with np.errstate(divide="ignore"):
+                self._mttfs[i] = 1e6 / failure_rate
+            
+            stack.append(i)
+        
+        # Ancestors of stale links are already stale
+        while stack:
+            
+            i = stack.pop()
+            
+            for parent in self._parent_indices[self._parent_indptr[i]:
+                                               self._parent_indptr[i + 1]]:
+                
+                if parent in self._stale: continue
+                
+                self._stale.add(parent)
+                stack.append(parent)
+        
+        return
+    
+    def get_link_metrics(self, key, time_hours=None):
+        
+        self._refresh()
+        
+        i = self._plan.index[key]
+        
+        return self._get_metrics([i], time_hours)[0]
+    
+    def get_systems_metrics(self, time_hours=None):
+        
+        # As Network.get_systems_metrics
+        
+        self._refresh()
+        
+        indices, systems = self._network._get_systems() # pylint: disable=protected-access
+        metrics = self._get_metrics([self._plan.index[x] for x in indices],
+                                    time_hours)
+        failure_rates = [x.failure_rate for x in metrics]
+        
+        if set(failure_rates) == set([None]): return None
+        
+        result = OrderedDict()
+        result["Link"] = indices
+        result["System"] = systems
+        result["lambda"] = failure_rates
+        result["MTTF"] = [x.mttf for x in metrics]
+        result["RPN"] = [x.rpn for x in metrics]
+        
+        if time_hours is not None:
+            key = "R ({} hours)".format(time_hours)
+            result[key] = [x.reliability for x in metrics]
+        
+        return result
+    
+    def get_network(self):
+        
+        # Copy of the network with the current component failure rates,
+        # for metrics not provided by the session
+        
+        network = copy(self._network)
+        network._failure_rates = self._component_failure_rates.copy() # pylint: disable=protected-access
+        network._evaluation = None # pylint: disable=protected-access
+        
+        return network
+    
+    def _refresh(self):
+        
+        if not self._stale: return
+        
+        for i in sorted(self._stale):
+            (self._failure_rates[i],
+             self._mttfs[i]) = self._plan.execute_node(i, self._failure_rates)
+        
+        self._stale = set()
+        
+        return
+    
+    def _get_metrics(self, nodes, time_hours):
+        
+        # pylint: disable=protected-access
+        
+        severity_levels = []
+        
+        for i in nodes:
+            if i < self._plan.n_components:
+                severity_levels.append(self._network._severity_levels[i])
+            else:
+                severity_levels.append(self._network._severity_level)
+        
+        failure_rates = self._failure_rates[nodes]
+        rpns = rpn(failure_rates, severity_levels)
+        
+        if time_hours is not None:
+            reliabilities = reliability(failure_rates, time_hours)
+        
+        metrics = []
+        
+        for j, i in enumerate(nodes):
+            
+            if np.isnan(failure_rates[j]):
+                metrics.append(LinkMetrics(None, None, None, None))
+                continue
+            
+            if time_hours is None:
+                link_reliability = None
+            else:
+                link_reliability = float(reliabilities[j])
+            
+            metrics.append(LinkMetrics(float(failure_rates[j]),
+                                       float(self._mttfs[i]),
+                                       int(rpns[j]),
+                                       link_reliability))
+        
+        return metrics
+
+
+def _to_list(values, valid):
+    
+    # Converts an array of metrics to a list, with None where not valid
+    
+    return [x if y else None for x, y in zip(values.tolist(), valid)]
+
+
+def _build_network_pool(electrical_network,
+                        moorings_network,
+                        user_network):
+    
+    check_nodes(electrical_network, moorings_network)
+    
+    (electrical_network,
+     moorings_network,
+     user_network) = complete_networks(electrical_network,
+                                       moorings_network,
+                                       user_network)
+    
+    (array_hierarcy,
+     device_hierachy) = combine_networks(electrical_network,
+                                         moorings_network,
+                                         user_network)
+    
+    return build_pool(array_hierarcy, device_hierachy)
+
+
+def _get_indices(pool, label_index, label):
         
-    labels, indices = find_all_labels(label, pool, partial_match=True)
+    labels, indices = find_all_labels(label,
+                                      pool,
+                                      partial_match=True,
+                                      label_index=label_index)
     if labels is None: return None
     
     subhub_indices = {}
@@ -287,11 +740,12 @@ def _get_indices(pool, label):
     return subhub_indices
 
 
-def _get_curtailments(pool):
+def _get_curtailments(pool, label_index):
     
     hublist, _ = find_all_labels('device',
                                  pool,
-                                 partial_match=True)
+                                 partial_match=True,
+                                 label_index=label_index)
     device_strings = find_strings(pool)
     
     curtailments = {}
@@ -318,124 +772,3 @@ def _get_curtailments(pool):
                 curtailments[name] = dev_curtails
     
     return curtailments
-
-
-def _set_component_failure_rates(pool,
-                                 dbdict,
-                                 severitylevel,
-                                 calcscenario,
-                                 k_factors=None):
-    
-    # For components with an id number look up respective failure rates 
-    # otherwise for designed components (i.e. shallow/gravity foundations, 
-    # direct embedment anchors and suction caissons) in addition to 
-    # grouted jointed use generic failure rate of 1.0x10^-4 failures 
-    # per annum (10 / 876 failures per 10^6 hours)
-    
-    # Note:
-    #  * If no data for a particular calculation scenario, failure rate 
-    #    defaults to mean value
-    #  * If no non-critical failure rate data is available use critical values
-    
-    def set_failure_rate(item, failure_rate, severitylevel, k_factors=None):
-        
-        item.set_severity_level(severitylevel)
-        
-        if k_factors is not None and item.marker in k_factors:
-            failure_rate *= k_factors[item.marker]
-        
-        item.set_failure_rate(failure_rate)
-        
-        return
-    
-    designed_comps = ["gravity",
-                      "shallowfoundation",
-                      "suctioncaisson",
-                      "directembedment",
-                      "grout"]
-    
-    critical_key = 'failratecrit'
-    non_critical_key = 'failratenoncrit'
-    
-    if severitylevel == 'critical':
-        severity_key = critical_key
-        other_key = non_critical_key
-        other_severitylevel = 'noncritical'
-    elif severitylevel == 'noncritical':
-        severity_key = non_critical_key
-        other_key = critical_key
-        other_severitylevel = 'critical'
-    else:
-        err_str = ("Argument 'severitylevel' may only take values "
-                   "'critical' or 'noncritical'")
-        raise ValueError(err_str)
-    
-    lower_idx = 0
-    mean_idx = 1
-    upper_idx = 2
-    
-    if calcscenario == 'lower':
-        cs = lower_idx
-    elif calcscenario == 'mean':
-        cs = mean_idx
-    elif calcscenario == 'upper':
-        cs = upper_idx
-    else:
-        err_str = "Argument 'calcscenario' may only take values 0, 1, or 2"
-        raise ValueError(err_str)
-    
-    for item in pool.values():
-        
-        if not isinstance(item, Component):
-            item.set_severity_level(severitylevel)
-            continue
-        
-        if item.label in designed_comps:
-            item.set_severity_level(severitylevel)
-            item.set_failure_rate(10. / 876)
-            continue
-        elif item.label == "ideal":
-            item.set_severity_level(severitylevel)
-            item.set_failure_rate(0.)
-            continue
-        
-        dbitem = deepcopy(dbdict[item.label]['item10'])
-        severity_failure_rates = dbitem[severity_key]
-        
-        if severity_failure_rates[cs] > 0.0:
-            failure_rate = severity_failure_rates[cs]
-            set_failure_rate(item, failure_rate, severitylevel, k_factors)
-            continue
-        
-        if severity_failure_rates[mean_idx] > 0.0:
-            failure_rate = severity_failure_rates[mean_idx]
-            set_failure_rate(item, failure_rate, severitylevel, k_factors)
-            continue
-        
-        other_failure_rates = dbitem[other_key]
-        
-        if other_failure_rates[cs] > 0.0:
-            
-            failure_rate = other_failure_rates[cs]
-            set_failure_rate(item,
-                             failure_rate,
-                             other_severitylevel,
-                             k_factors)
-            
-            continue
-        
-        if other_failure_rates[mean_idx] > 0.0:
-            
-            failure_rate = other_failure_rates[mean_idx]
-            set_failure_rate(item,
-                             failure_rate,
-                             other_severitylevel,
-                             k_factors)
-            
-            continue
-        
-        err_str = ("No failure rate data is set for component "
-                   "'{}'").format(item.label)
-        raise RuntimeError(err_str)
-    
-    return
@@ -25,7 +25,13 @@ DTOcean Reliability Assessment Module (RAM)
 """
 
 import math
+import functools
 import itertools
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
 
 
 def binomial(frpara):
@@ -74,38 +80,556 @@ def binomial(frpara):
     return frparacalc
 
 
-def rpn(failure_rate, severitylevel):
+def _get_tanh_sinh_nodes(step=1. / 16, limit=3.2):
+    
+    # Abscissas and weights for tanh-sinh quadrature over (0, 1], stored
+    # as (log(x), w / x) pairs, ready for the parallel MTTF integral
+    
+    nodes = []
+    n_steps = int(round(limit / step))
+    
+    for i in range(-n_steps, n_steps + 1):
+        
+        t = i * step
+        u = 0.5 * math.pi * math.sinh(t)
+        
+        # Evaluate x = (1 + tanh(u)) / 2 without cancellation near zero
+        if u < 0:
+            eu = math.exp(2 * u)
+            x = eu / (1. + eu)
+        else:
+            x = 1. / (1. + math.exp(-2 * u))
+        
+        if x == 0.: continue
+        
+        w = step * 0.25 * math.pi * math.cosh(t) / math.cosh(u) ** 2
+        nodes.append((math.log(x), w / x))
+    
+    return tuple(nodes)
+
+
+_PARALLEL_NODES = _get_tanh_sinh_nodes()
+_PARALLEL_NODES_ARRAY = tuple(np.array(x) for x in zip(*_PARALLEL_NODES))
+
+
+def lru_memo(maxsize=128):
+    
+    # Bounded memo of the results of a function of hashable arguments,
+    # which discards the least recently used result when full. Hit and miss
+    # statistics are given by the cache_info method of the wrapped
+    # function, as for functools.lru_cache in Python 3.
+    
+    def decorator(func):
+        
+        cache = OrderedDict()
+        stats = [0, 0]
+        
+        def wrapper(*args):
+            
+            if args in cache:
+                result = cache.pop(args)
+                stats[0] += 1
+            else:
+                result = func(*args)
+                stats[1] += 1
+                if len(cache) >= maxsize: cache.popitem(last=False)
+            
+            cache[args] = result
+            
+            return result
+        
+        def cache_info():
+            return CacheInfo(stats[0], stats[1], maxsize, len(cache))
+        
+        def cache_clear():
+            cache.clear()
+            stats[:] = [0, 0]
+        
+        functools.update_wrapper(wrapper, func)
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        
+        return wrapper
+    
+    return decorator
+
+
+def parallel_mttf(frpara):
+    
+    # MTTF of a parallel group is the integral of its survival function,
+    # 1 - prod(1 - exp(-lambda_i * t)), over t. Substituting
+    # x = exp(-lambda_min * t) maps the integral onto (0, 1], which is
+    # evaluated by tanh-sinh quadrature in O(n) operations per node, rather
+    # than summing the 2^n terms of the inclusion-exclusion expansion.
+    
+    # Arrays with more than one dimension hold a group in each row of the
+    # last axis, in which case an array is returned (see
+    # parallel_mttf_reduceat for the treatment of NaN).
+    if np.ndim(frpara) > 1:
+        return _parallel_mttf_array(np.asarray(frpara, dtype=float))
+    
+    # The result does not depend on the order of the items, so groups with
+    # the same failure rates share an entry in the memo
+    return _parallel_mttf_sorted(tuple(sorted(float(x) for x in frpara)))
+
+
+@lru_memo(maxsize=4096)
+def _parallel_mttf_sorted(frpara):
+    
+    # If any components are ideal, then the result is ideal
+    if not all(frpara): return float("inf")
+    
+    # Items with equal failure rates are grouped, so the cost grows with
+    # the number of distinct failure rates, rather than the number of items
+    groups = [(fr, len(list(items)))
+                            for fr, items in itertools.groupby(frpara)]
+    frmin = frpara[0]
+    
+    # Groups of identical items have the closed form H_n / lambda
+    if len(groups) == 1:
+        return _harmonic(len(frpara)) / frmin
+    
+    ratios = [(fr / frmin, count) for fr, count in groups]
+    
+    integral = 0.
+    
+    for logx, weight in _PARALLEL_NODES:
+        
+        logfail = 0.
+        
+        for ratio, count in ratios:
+            
+            p = math.exp(ratio * logx)
+            
+            if p >= 1.:
+                logfail = None
+                break
+            
+            logfail += count * math.log1p(-p)
+        
+        if logfail is None:
+            survival = 1.
+        else:
+            survival = -math.expm1(logfail)
+        
+        integral += weight * survival
+    
+    return integral / frmin
+
+
+# Statistics of the memo of scalar parallel group results
+parallel_mttf.cache_info = _parallel_mttf_sorted.cache_info
+parallel_mttf.cache_clear = _parallel_mttf_sorted.cache_clear
+
+
+_MAX_SUBSETS_SIZE = 6
+_RPN_BANDS = np.array([0.01, 0.1, 1.0, 10.0, 50.0])
+_SEVERITY_MULTIPLIERS = {'critical': 2.0,
+                         'noncritical': 1.0}
+
+
+def parallel_mttf_workspace(sizes):
+    
+    # Largest number of temporary array elements, per row of failure rates,
+    # used by parallel_mttf_reduceat for groups of the given sizes
+    
+    workspace = 0
+    
+    for size in np.unique(sizes):
+        
+        n_groups = np.sum(sizes == size)
+        
+        if size <= _MAX_SUBSETS_SIZE:
+            group_workspace = 2 ** size
+        else:
+            group_workspace = size * len(_PARALLEL_NODES)
+        
+        workspace = max(workspace, n_groups * group_workspace)
+    
+    return workspace
+
+
+def parallel_mttf_reduceat(failure_rates, offsets):
+    
+    # Vectorised form of parallel_mttf for many parallel groups at once.
+    # The columns of failure_rates hold the items of consecutive groups,
+    # with each group starting at the column given in offsets. Missing
+    # items are marked with NaN. Returns an array with one column per group,
+    # which is NaN for groups with no valid items.
+    
+    failure_rates = np.atleast_2d(failure_rates)
+    offsets = np.asarray(offsets, dtype=int)
+    sizes = np.diff(np.append(offsets, failure_rates.shape[1]))
+    
+    result = np.empty((failure_rates.shape[0], len(offsets)))
+    
+    # Groups of equal size are stacked into regular arrays
+    for size in np.unique(sizes):
+        
+        groups = np.flatnonzero(sizes == size)
+        columns = offsets[groups][:, np.newaxis] + np.arange(size)
+        result[:, groups] = _parallel_mttf_array(failure_rates[:, columns])
+    
+    return result
+
+
+def _parallel_mttf_array(failure_rates):
+    
+    # Groups are stored along the last axis. Groups where every valid item
+    # has the same failure rate use the closed form H_n / lambda.
+    
+    valid = ~np.isnan(failure_rates)
+    frmin = np.fmin.reduce(failure_rates, axis=-1)
+    frmax = np.fmax.reduce(failure_rates, axis=-1)
+    identical = frmin == frmax
+    
+    mttf = np.empty(failure_rates.shape[:-1])
+    
+    # Avoid copying the groups when none are identical
+    if identical.any():
+        with np.errstate(divide="ignore"):
+            mttf[identical] = (_harmonic(valid[identical].sum(axis=-1)) /
+                                                            frmin[identical])
+        mixed = ~identical
+    else:
+        mixed = Ellipsis
+    
+    if not identical.all():
+        
+        if failure_rates.shape[-1] <= _MAX_SUBSETS_SIZE:
+            mttf[mixed] = _parallel_mttf_subsets(failure_rates[mixed],
+                                                 valid[mixed])
+        else:
+            mttf[mixed] = _parallel_mttf_quadrature(
+                                *_group_failure_rates(failure_rates[mixed]))
+    
+    mttf[~valid.any(axis=-1)] = np.nan
+    mttf[(failure_rates == 0).any(axis=-1)] = np.inf
+    
+    return mttf
+
+
+def _harmonic(n):
+    
+    # Harmonic numbers H_n = 1 + 1/2 + ... + 1/n, for scalar or array n,
+    # with H_0 = 0
+    
+    n = np.asarray(n, dtype=int)
+    if not n.size: return np.zeros(n.shape)
+    
+    harmonic = np.append(0., np.cumsum(1. / np.arange(1, n.max() + 1)))
+    result = harmonic[n]
+    
+    if not result.ndim: return float(result)
+    
+    return result
+
+
+def _group_failure_rates(failure_rates):
+    
+    # Replace the items of each group (along the last axis) by their
+    # distinct failure rates and the number of items with each rate.
+    # Missing items are given a count of zero. The size of the last axis
+    # becomes the largest number of distinct rates in any group (counting
+    # missing items separately).
+    
+    shape = failure_rates.shape[:-1]
+    rates = np.sort(failure_rates.reshape(-1, failure_rates.shape[-1]),
+                    axis=-1)
+    n_groups = rates.shape[0]
+    
+    starts = np.ones(rates.shape, dtype=bool)
+    starts[:, 1:] = rates[:, 1:] != rates[:, :-1]
+    runs = np.cumsum(starts, axis=-1) - 1
+    
+    n_runs = runs[:, -1].max() + 1
+    rows = np.repeat(np.arange(n_groups), rates.shape[1])
+    
+    distinct = np.full((n_groups, n_runs), np.nan)
+    distinct[rows, runs.ravel()] = rates.ravel()
+    
+    counts = np.zeros((n_groups, n_runs))
+    np.add.at(counts, (rows, runs.ravel()), ~np.isnan(rates.ravel()))
+    
+    return (distinct.reshape(shape + (n_runs,)),
+            counts.reshape(shape + (n_runs,)))
+
+
+def _parallel_mttf_subsets(failure_rates, valid):
     
-    if severitylevel == 'critical':
-        multiplier = 2.0
-    elif severitylevel == 'noncritical':
-        multiplier = 1.0
+    # Inclusion-exclusion expansion (as per binomial) for small groups,
+    # where the 2^n terms are cheaper than the quadrature. Subsets
+    # containing missing items are excluded.
+    
+    size = failure_rates.shape[-1]
+    subsets = np.array(list(itertools.product((0., 1.), repeat=size))[1:])
+    signs = np.where(subsets.sum(axis=1) % 2, 1., -1.)
+    
+    if valid.all():
+        rate_sums = np.dot(failure_rates, subsets.T)
+        has_missing = False
     else:
-        err_str = ("Value to argument 'severitylevel' not recognised. "
-                   "Must be one of 'critical or 'noncritical'")
-        raise ValueError(err_str)
+        rate_sums = np.dot(np.where(valid, failure_rates, 0.), subsets.T)
+        has_missing = np.dot(~valid, subsets.T) > 0
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(has_missing, 0., signs / rate_sums)
+    
+    return terms.sum(axis=-1)
+
+
+def _parallel_mttf_quadrature(failure_rates, counts):
+    
+    # As parallel_mttf, but for arrays of groups of distinct failure rates
+    # stored in the last axis, with the number of items having each rate
+    # given in counts
+    
+    valid = counts > 0
+    frmin = np.fmin.reduce(np.where(valid, failure_rates, np.nan), axis=-1)
+    
+    # Set unused groups to unity to avoid division warnings
+    with np.errstate(invalid="ignore"):
+        safe_frmin = np.where(frmin > 0, frmin, 1.)
+    
+    ratios = np.where(valid, failure_rates, 0.) / safe_frmin[..., np.newaxis]
+    
+    logx, weights = _PARALLEL_NODES_ARRAY
+    p = np.exp(ratios[..., np.newaxis] * logx)
+    p[~valid] = 0.
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        logfail = (counts[..., np.newaxis] * np.log1p(-p)).sum(axis=-2)
+    
+    survival = -np.expm1(logfail)
+    
+    return np.dot(survival, weights) / safe_frmin
+
+
+def kofn_survival(survival, k):
+    
+    # Probability that at least k of a group of items survive, given the
+    # survival probability of each item along the last axis. k must
+    # broadcast against the other axes. Missing items (NaN) are ignored and
+    # k is limited to the number of remaining items.
+    
+    # The probabilities that exactly j < k of the items survive are built
+    # up one item at a time, so the cost is O(n * k), rather than O(2^n)
+    # for enumerating the combinations of surviving items.
+    
+    survival = np.asarray(survival, dtype=float)
+    valid = ~np.isnan(survival)
+    k = np.minimum(k, valid.sum(axis=-1))
+    survival = np.where(valid, survival, 0.)
+    
+    k_max = int(np.max(k)) if np.size(k) else 0
+    exactly = np.zeros((k_max,) + survival.shape[:-1])
+    if k_max: exactly[0] = 1.
+    
+    for i in xrange(survival.shape[-1]): # pylint: disable=undefined-variable
+        
+        p = survival[..., i]
+        exactly[1:] = exactly[1:] * (1. - p) + exactly[:-1] * p
+        exactly[0] *= 1. - p
+    
+    j = np.arange(k_max).reshape((-1,) + (1,) * (survival.ndim - 1))
+    
+    return 1. - np.where(j < k, exactly, 0.).sum(axis=0)
+
+
+def kofn_mttf(frpara, k):
+    
+    # MTTF of a group of items which survives while at least k of the items
+    # survive, found by integrating kofn_survival with the same quadrature
+    # as parallel_mttf. Ideal items always survive, so they reduce k. If
+    # all the items have the same failure rate, the closed form
+    # (H_n - H_{k - 1}) / lambda is used.
+    
+    # Arrays with more than one dimension hold a group in each row of the
+    # last axis, in which case k must broadcast against the other axes and
+    # an array is returned. Missing items (NaN) are ignored and k is
+    # limited to the number of remaining items.
+    
+    if np.ndim(frpara) > 1:
+        return _kofn_mttf_array(np.asarray(frpara, dtype=float), k)
+    
+    return _kofn_mttf_sorted(tuple(sorted(float(x) for x in frpara)), int(k))
+
+
+@lru_memo(maxsize=4096)
+def _kofn_mttf_sorted(frpara, k):
+    
+    k = min(k, len(frpara))
+    n_ideal = len([x for x in frpara if x == 0])
+    
+    if n_ideal >= k: return float("inf")
+    
+    frpara = frpara[n_ideal:]
+    k -= n_ideal
+    frmin = frpara[0]
+    
+    if frmin == frpara[-1]:
+        return (_harmonic(len(frpara)) - _harmonic(k - 1)) / frmin
+    
+    ratios = np.array(frpara) / frmin
+    logx, weights = _PARALLEL_NODES_ARRAY
+    survival = np.exp(np.outer(logx, ratios))
+    
+    return float(np.dot(kofn_survival(survival, k), weights) / frmin)
+
+
+def kofn_mttf_workspace(sizes):
+    
+    # Largest number of temporary array elements, per row of failure rates,
+    # used by kofn_mttf_reduceat for groups of the given sizes
+    
+    workspace = 0
+    
+    for size in np.unique(sizes):
+        n_groups = np.sum(sizes == size)
+        workspace = max(workspace, n_groups * size * len(_PARALLEL_NODES))
+    
+    return workspace
+
+
+def kofn_mttf_reduceat(failure_rates, offsets, ks):
+    
+    # Vectorised form of kofn_mttf for many groups at once, laid out as for
+    # parallel_mttf_reduceat. The number of items required by each group is
+    # given in ks.
+    
+    failure_rates = np.atleast_2d(failure_rates)
+    offsets = np.asarray(offsets, dtype=int)
+    ks = np.asarray(ks, dtype=int)
+    sizes = np.diff(np.append(offsets, failure_rates.shape[1]))
+    
+    result = np.empty((failure_rates.shape[0], len(offsets)))
+    
+    for size in np.unique(sizes):
+        
+        groups = np.flatnonzero(sizes == size)
+        columns = offsets[groups][:, np.newaxis] + np.arange(size)
+        result[:, groups] = _kofn_mttf_array(failure_rates[:, columns],
+                                             ks[groups])
+    
+    return result
+
+
+def kofn_survival_reduceat(survival, offsets, ks):
+    
+    # Vectorised form of kofn_survival for many groups at once, laid out as
+    # for parallel_mttf_reduceat, with the survival probabilities of the
+    # items in the columns
+    
+    survival = np.atleast_2d(survival)
+    offsets = np.asarray(offsets, dtype=int)
+    ks = np.asarray(ks, dtype=int)
+    sizes = np.diff(np.append(offsets, survival.shape[1]))
+    
+    result = np.empty((survival.shape[0], len(offsets)))
+    
+    for size in np.unique(sizes):
+        
+        groups = np.flatnonzero(sizes == size)
+        columns = offsets[groups][:, np.newaxis] + np.arange(size)
+        result[:, groups] = kofn_survival(survival[:, columns], ks[groups])
+    
+    return result
+
+
+def _kofn_mttf_array(failure_rates, k):
+    
+    # Groups are stored along the last axis
+    
+    valid = ~np.isnan(failure_rates)
+    ideal = failure_rates == 0
+    n_valid = valid.sum(axis=-1)
+    
+    # Ideal items always survive
+    n_ideal = ideal.sum(axis=-1)
+    k = np.minimum(k, n_valid) - n_ideal
+    n_items = n_valid - n_ideal
+    
+    rates = np.where(ideal, np.nan, failure_rates)
+    frmin = np.fmin.reduce(rates, axis=-1)
+    frmax = np.fmax.reduce(rates, axis=-1)
+    
+    # Set unused groups to unity to avoid division warnings
+    with np.errstate(invalid="ignore"):
+        safe_frmin = np.where(frmin > 0, frmin, 1.)
+    
+    logx, weights = _PARALLEL_NODES_ARRAY
+    ratios = rates / safe_frmin[..., np.newaxis]
+    survival = np.exp(ratios[..., np.newaxis, :] *
+                      logx[:, np.newaxis])
+    
+    mttf = np.dot(kofn_survival(survival, k[..., np.newaxis]),
+                  weights) / safe_frmin
+    
+    identical = (frmin == frmax) & (k > 0)
+    mttf[identical] = ((_harmonic(n_items[identical]) -
+                        _harmonic(k[identical] - 1)) / frmin[identical])
+    
+    mttf[k <= 0] = np.inf
+    mttf[n_valid == 0] = np.nan
+    
+    return mttf
+
+
+def rpn(failure_rate, severitylevel):
+    
+    # Arrays of failure rates (and severity levels) are broadcast together,
+    # in which case a float array is returned, with NaN wherever the failure
+    # rate is NaN.
+    
+    multiplier = _get_severity_multiplier(severitylevel)
     
     # Convert failures/hour to % failures/year
     year_hours = 365.25 * 24.0
-    failure_rate_year = failure_rate * year_hours
-    probability_failure = 100.0 * (1.0 - math.exp(-failure_rate_year))
-        
-    if probability_failure < 0.01:
-        frequency_failure  = 0.0
-    elif probability_failure >= 0.01 and probability_failure < 0.1:
-        frequency_failure = 1.0
-    elif probability_failure >= 0.1 and probability_failure < 1.0:
-        frequency_failure = 2.0
-    elif probability_failure >= 1.0 and probability_failure < 10.0:
-        frequency_failure = 3.0
-    elif probability_failure >= 10.0 and probability_failure < 50.0:
-        frequency_failure = 4.0
-    elif probability_failure >= 50.0:
-        frequency_failure = 5.0
+    failure_rate_year = np.multiply(failure_rate, year_hours)
+    probability_failure = 100.0 * (1.0 - np.exp(-failure_rate_year))
+    
+    # Bands are closed on the left, i.e. 0.01 <= P < 0.1 has frequency 1
+    frequency_failure = np.digitize(probability_failure, _RPN_BANDS)
+    result = frequency_failure * multiplier
+    
+    if np.ndim(result) == 0:
+        return int(result)
     
-    return int(frequency_failure * multiplier)
+    result = result.astype(float)
+    result[np.isnan(probability_failure * multiplier)] = np.nan
+    
+    return result
 
 
 def reliability(failure_rate, time_hours):
-    return math.exp(-failure_rate * time_hours)
-    
\ No newline at end of file
+    
+    # Arrays of failure rates and times are broadcast together, in which
+    # case an array is returned
+    
+    result = np.exp(-np.multiply(failure_rate, time_hours))
+    
+    if np.ndim(result) == 0:
+        return float(result)
+    
+    return result
+
+
+def _get_severity_multiplier(severitylevel):
+    
+    def get_multiplier(level):
+        
+        if level not in _SEVERITY_MULTIPLIERS:
+            err_str = ("Value to argument 'severitylevel' not recognised. "
+                       "Must be one of 'critical or 'noncritical'")
+            raise ValueError(err_str)
+        
+        return _SEVERITY_MULTIPLIERS[level]
+    
+    if isinstance(severitylevel, basestring): # pylint: disable=undefined-variable
+        return get_multiplier(severitylevel)
+    
+    levels = np.asarray(severitylevel)
+    multipliers = [get_multiplier(x) for x in levels.ravel()]
+    
+    return np.reshape(multipliers, levels.shape)
+
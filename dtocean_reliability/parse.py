@@ -26,10 +26,9 @@ DTOcean Reliability Assessment Module (RAM)
 
 # Built in modules
 import logging
-from copy import deepcopy
 from collections import Counter, OrderedDict
 
-from .graph import Component, Parallel, Serial
+from .graph import Component, KofN, Parallel, Serial
 
 # Start logging
 module_logger = logging.getLogger(__name__)
@@ -47,9 +46,13 @@ class SubNetwork(object):
 
 class MarkedSystem(object):
     
-    def __init__(self, ids, markers):
+    # If k is given, at least k of the parallel items of the system must
+    # survive for the system to survive
+    
+    def __init__(self, ids, markers, k=None):
         self.ids = ids
         self.markers = markers
+        self.k = k
     
     def __nonzero__(self):
         if self.ids: return True
@@ -62,6 +65,15 @@ class MarkedSystem(object):
         return self.__str__()
 
 
+class RedundantSystems(list):
+    
+    # List of parallel systems, of which at least k must survive
+    
+    def __init__(self, systems=(), k=None):
+        super(RedundantSystems, self).__init__(systems)
+        self.k = k
+
+
 def check_nodes(*networks):
     
     isNone = [True for x in networks if x is None]
@@ -82,6 +94,10 @@ def check_nodes(*networks):
 
 def mark_networks(*networks):
     
+    # Returns a marked copy of the hierarchy of each network. Only the
+    # dictionaries are new; the component lists are shared with the
+    # networks, which are not modified.
+    
     def get_dummy_markers(comps):
         
         if not comps: return comps
@@ -91,31 +107,44 @@ def mark_networks(*networks):
         
         return [-1] * len(comps)
     
-    for network in networks:
+    marked_hierarchies = []
     
-        marked_hierarchy = deepcopy(network.hierarchy)
+    for network in networks:
+        
+        marked_hierarchy = {}
         
         for node, systems in network.hierarchy.iteritems():
             
-            for system in systems:
+            marked_systems = {}
+            
+            for system, comps in systems.iteritems():
                 
-                if system == 'layout': continue
+                if system == 'layout':
+                    marked_systems[system] = comps
+                    continue
                 
                 if system == 'Elec sub-system' and 'device' in node:
                     data = network.bill_of_materials[node]
                 else:
                     data = network.bill_of_materials[node][system]
                 
-                comps = network.hierarchy[node][system]
-                
                 if 'marker' not in data:
                     markers = get_dummy_markers(comps)
                 else:
                     markers = data['marker']
-                    
-                marked_hierarchy[node][system] = MarkedSystem(comps, markers)
+                
+                if 'redundancy' not in data:
+                    k = None
+                else:
+                    k = data['redundancy']
+                
+                marked_systems[system] = MarkedSystem(comps, markers, k)
+            
+            marked_hierarchy[node] = marked_systems
         
-        network.hierarchy = marked_hierarchy
+        marked_hierarchies.append(marked_hierarchy)
+    
+    return marked_hierarchies
 
 
 def complete_networks(electrical_network,
@@ -143,11 +172,12 @@ def complete_networks(electrical_network,
         # Fix empty array key
         if "array" not in nodes:
             
-            moorings_network.hierarchy["array"] = {
-                                        'Substation foundation': ['dummy']}
-            moorings_network.bill_of_materials["array"] = \
-                        {'Substation foundation': \
-                                 {'substation foundation type': 'dummy'}}
+            moorings_network = _extend_network(
+                    moorings_network,
+                    ["array"],
+                    {'Substation foundation': ['dummy']},
+                    {'Substation foundation':
+                                 {'substation foundation type': 'dummy'}})
             
             nodes.append("array")
     
@@ -241,6 +271,7 @@ def complete_networks(electrical_network,
         
         moorings_network = SubNetwork(hierarchy, bill_of_materials)
     
+    # The dummy systems are never modified, so they are shared between nodes
     dummy_hier = {'Dummy sub-system': ['dummy']}
     dummy_bom =  {'Dummy sub-system':
                             {'quantity': Counter({'dummy': 1})}}
@@ -248,24 +279,20 @@ def complete_networks(electrical_network,
     # Fill any missing nodes in the user network
     if user_network is None:
         
-        hierarchy = {}
-        bill_of_materials = {}
-        
-        for node in nodes:
-            
-            hierarchy[node] = deepcopy(dummy_hier)
-            bill_of_materials[node] = deepcopy(dummy_bom)
-        
-        user_network = SubNetwork(hierarchy, bill_of_materials)
+        user_network = _extend_network(SubNetwork({}, {}),
+                                       nodes,
+                                       dummy_hier,
+                                       dummy_bom)
     
     else:
         
-        for node in nodes:
-            
-            if node in user_network.hierarchy: continue
-            
-            user_network.hierarchy[node] = deepcopy(dummy_hier)
-            user_network.bill_of_materials[node] = deepcopy(dummy_bom)
+        missing = [x for x in nodes if x not in user_network.hierarchy]
+        
+        if missing:
+            user_network = _extend_network(user_network,
+                                           missing,
+                                           dummy_hier,
+                                           dummy_bom)
     
     return electrical_network, moorings_network, user_network
 
@@ -280,14 +307,13 @@ def combine_networks(electrical_network,
                 moorings_network,
                 user_network)
     
-    # Store markers alongside component ids
-    mark_networks(electrical_network,
-                  moorings_network,
-                  user_network)
-    
-    dev_electrical_hierarchy = deepcopy(electrical_network.hierarchy)
-    dev_moorings_hierarchy = deepcopy(moorings_network.hierarchy)
-    dev_user_hierarchy = deepcopy(user_network.hierarchy)
+    # Store markers alongside component ids. The marked hierarchies do not
+    # share any dictionaries with the networks, so they can be modified.
+    (dev_electrical_hierarchy,
+     dev_moorings_hierarchy,
+     dev_user_hierarchy) = mark_networks(electrical_network,
+                                         moorings_network,
+                                         user_network)
     
     device_hierachy = {}
     array_hierarcy = {}
@@ -304,8 +330,11 @@ def combine_networks(electrical_network,
                 
             else:
                 
-                systems['Station keeping'] = []
-            
+                # Redundancy of the mooring system applies to the lines and
+                # their foundations together
+                k = systems['Mooring system'].k
+                systems['Station keeping'] = RedundantSystems(k=k)
+                
                 lids = systems['Mooring system'].ids
                 lmarkers = systems['Mooring system'].markers
                 
@@ -343,10 +372,13 @@ def combine_networks(electrical_network,
             node_moorings = dev_moorings_hierarchy[node]
             substation_foundations = node_moorings['Substation foundation']
             
-            sids = substation_foundations.ids
-            smarkers = substation_foundations.markers
-            array_hierarcy[node]['Substation'].ids += sids
-            array_hierarcy[node]['Substation'].markers += smarkers
+            # The component lists belong to the networks, so new lists are
+            # created rather than extending them
+            substation = systems['Substation']
+            systems['Substation'] = MarkedSystem(
+                        substation.ids + substation_foundations.ids,
+                        substation.markers + substation_foundations.markers,
+                        substation.k)
         
         elif node[0:6] == 'device':
             
@@ -358,6 +390,21 @@ def combine_networks(electrical_network,
     return array_hierarcy, device_hierachy
 
 
+def _extend_network(network, nodes, hierarchy, bill_of_materials):
+    
+    # Returns a new network with the given systems added for each node,
+    # leaving the original network unchanged
+    
+    new_hierarchy = dict(network.hierarchy)
+    new_bill_of_materials = dict(network.bill_of_materials)
+    
+    for node in nodes:
+        new_hierarchy[node] = hierarchy
+        new_bill_of_materials[node] = bill_of_materials
+    
+    return SubNetwork(new_hierarchy, new_bill_of_materials)
+
+
 def build_pool(array_hierarcy, device_hierachy):
     
     pool = {}
@@ -490,43 +537,57 @@ def _build_pool_subhub(subhub_dict,
 
 def _build_pool_device(device_dict, parent_link, pool):
     
+    # Links are added to the pool directly, and systems that produce no
+    # links are removed again by rolling the pool back to its size before
+    # the system was built
+    
     for label, system in device_dict.iteritems():
         
         system_link = Serial(label)
-        temp_pool = deepcopy(pool)
+        watermark = len(pool)
         
         if isinstance(system, dict):
             
-            _build_pool_device(system, system_link, temp_pool)
+            _build_pool_device(system, system_link, pool)
             
         elif (not isinstance(system, MarkedSystem) and
               isinstance(system[0], dict)):
             
-            new_parallel = Parallel()
+            item_keys = []
             
             for item in system:
                 
                 item_link = Serial()
-                _build_pool_device(item, item_link, temp_pool)
+                _build_pool_device(item, item_link, pool)
                 
-                next_pool_key = len(temp_pool)
-                temp_pool[next_pool_key] = item_link
-                new_parallel.add_item(next_pool_key)
+                next_pool_key = len(pool)
+                pool[next_pool_key] = item_link
+                item_keys.append(next_pool_key)
             
-            next_pool_key = len(temp_pool)
-            temp_pool[next_pool_key] = new_parallel
+            # Items with no links, such as dummy mooring lines, do not count
+            # towards the redundancy
+            n_items = len([True for x in item_keys if pool[x].items])
+            new_parallel = _get_parallel_link(getattr(system, "k", None),
+                                              n_items,
+                                              label)
+            
+            for item_key in item_keys:
+                new_parallel.add_item(item_key)
+            
+            next_pool_key = len(pool)
+            pool[next_pool_key] = new_parallel
             system_link.add_item(next_pool_key)
             
         else:
             
             comps = _strip_invalid(system)
             if comps is None: continue
-            _build_pool_comps(comps, system_link, temp_pool)
+            _build_pool_comps(comps, system_link, pool)
         
-        if len(temp_pool) - len(pool) == 0:
+        if not system_link.items:
+            _rollback_pool(pool, watermark)
             continue
         
-        pool.update(temp_pool)
         next_pool_key = len(pool)
         pool[next_pool_key] = system_link
         parent_link.add_item(next_pool_key)
@@ -534,6 +595,14 @@ def _build_pool_device(device_dict, parent_link, pool):
     return
 
 
+def _rollback_pool(pool, watermark):
+    
+    for key in xrange(watermark, len(pool)): # pylint: disable=undefined-variable
+        del pool[key]
+    
+    return
+
+
 def _build_pool_comps(marked_system, parent_link, pool):
     
     comps = marked_system.ids
@@ -541,10 +610,19 @@ def _build_pool_comps(marked_system, parent_link, pool):
     
     n_list = len([True for x in comps if isinstance(x, list)])
     
+    # Redundancy applies to the parallel strings of a system, so components
+    # which are only in series can not be redundant
+    if marked_system.k is not None and not n_list:
+        err_str = ("Redundancy of system '{}' requires parallel strings of "
+                   "components").format(parent_link.label)
+        raise ValueError(err_str)
+    
     if n_list > 1:
         
         next_pool_key = len(pool)
-        new_parallel = Parallel()
+        new_parallel = _get_parallel_link(marked_system.k,
+                                          len(comps),
+                                          parent_link.label)
         pool[next_pool_key] = new_parallel
         parent_link.add_item(next_pool_key)
         
@@ -563,6 +641,11 @@ def _build_pool_comps(marked_system, parent_link, pool):
         return
     
     elif n_list == 1:
+        
+        # A single string is in series with the rest of the system
+        if marked_system.k is not None:
+            _check_redundancy(marked_system.k, 1, parent_link.label)
+        
         comps = comps[0]
         markers = markers[0]
     
@@ -577,6 +660,25 @@ def _build_pool_comps(marked_system, parent_link, pool):
     return
 
 
+def _get_parallel_link(k, n_items, label=None):
+    
+    if k is None: return Parallel()
+    
+    _check_redundancy(k, n_items, label)
+    
+    return KofN(k)
+
+
+def _check_redundancy(k, n_items, label=None):
+    
+    if k > n_items:
+        err_str = ("Redundancy of system '{}' requires {} items but only {} "
+                   "are available").format(label, k, n_items)
+        raise ValueError(err_str)
+    
+    return
+
+
 def _strip_invalid(marked_system):
     
     invalid = ["dummy", "n/a"]
@@ -610,5 +712,5 @@ def _strip_invalid(marked_system):
     
     if not idlist: return None
     
-    return MarkedSystem(idlist, markerlist)
+    return MarkedSystem(idlist, markerlist, marked_system.k)
 
@@ -0,0 +1,542 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+DTOcean Reliability Assessment Module (RAM)
+
+Flat, array based evaluation of a pool of reliability links.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+import numpy as np
+
+from .graph import Component, KofN, Parallel, Serial
+from .numerics import (kofn_mttf,
+                       kofn_mttf_reduceat,
+                       kofn_mttf_workspace,
+                       kofn_survival_reduceat,
+                       parallel_mttf,
+                       parallel_mttf_reduceat,
+                       parallel_mttf_workspace)
+
+COMPONENT = 0
+SERIAL = 1
+PARALLEL = 2
+KOFN = 3
+
+_MAX_CHUNK_ELEMENTS = 2 ** 22
+_TYPE_CODES = {Component: COMPONENT,
+               Serial: SERIAL,
+               Parallel: PARALLEL,
+               KofN: KOFN}
+
+
+class EvaluationPlan(object):
+    
+    # Topologically ordered, flattened copy of a pool of links. The
+    # components come first (these are the rate slots), in ascending order
+    # of their pool key, followed by the links in order of their height
+    # above the components. The children of node i are stored in compressed
+    # sparse row form as indices[indptr[i]:indptr[i + 1]].
+    
+    # Nodes with the same structure are given the same class (see
+    # compile_pool). Classes are numbered in order of their first node, so
+    # when the components of each class share a failure rate, only the
+    # first node of each class is evaluated and the results are copied to
+    # the rest.
+    
+    # The number of items required by each KofN link is given in ks, which
+    # is zero for all other nodes.
+    
+    def __init__(self, keys,
+                       node_types,
+                       indptr,
+                       indices,
+                       heights,
+                       classes=None,
+                       ks=None):
+        
+        if ks is None: ks = np.zeros(len(keys), dtype=int)
+        
+        self.keys = keys
+        self.node_types = node_types
+        self.indptr = indptr
+        self.indices = indices
+        self.heights = heights
+        self.classes = classes
+        self.ks = ks
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.n_components = int((node_types == COMPONENT).sum())
+        self._passes = _get_passes(node_types, indptr, indices, heights)
+        self._workspace_size = _get_workspace_size(self._passes)
+        self._reduced = None
+        self._first_nodes = None
+        
+        if classes is None: return
+        
+        self._reduced, self._first_nodes = _get_reduced_plan(self)
+    
+    @property
+    def component_keys(self):
+        return self.keys[:self.n_components]
+    
+    def __len__(self):
+        return len(self.keys)
+    
+    def get_parents(self):
+        
+        # Inverse of the children, in the same compressed sparse row form.
+        # The parents of node i are parent_indices[
+        # parent_indptr[i]:parent_indptr[i + 1]].
+        
+        n_children = np.diff(self.indptr)
+        parents = np.repeat(np.arange(len(self)), n_children)
+        order = np.argsort(self.indices, kind="mergesort")
+        
+        parent_indptr = np.zeros(len(self) + 1, dtype=int)
+        parent_indptr[1:] = np.cumsum(np.bincount(self.indices,
+                                                  minlength=len(self)))
+        
+        return parent_indptr, parents[order]
+    
+    def execute_node(self, i, failure_rates):
+        
+        # Failure rate (per hour) and MTTF of link i alone, given the
+        # failure rates (per hour) of every node, as would be found by
+        # execute. Links without children return NaN.
+        
+        children = self.indices[self.indptr[i]:self.indptr[i + 1]]
+        child_rates = failure_rates[children]
+        valid = ~np.isnan(child_rates)
+        
+        if not valid.any(): return np.nan, np.nan
+        
+        if self.node_types[i] == SERIAL:
+            failure_rate = float(child_rates[valid].sum())
+            mttf = 1. / failure_rate if failure_rate else np.inf
+            return failure_rate, mttf
+        
+        # Single groups use the memoised forms of the MTTF functions
+        if self.node_types[i] == KOFN:
+            mttf = kofn_mttf(child_rates[valid], self.ks[i])
+        else:
+            mttf = parallel_mttf(child_rates[valid])
+        
+        return 1. / mttf, mttf
+    
+    def get_uniform_classes(self, component_failure_rates):
+        
+        # Returns the classes of the nodes if every component (and every
+        # sample, for two dimensional inputs) shares its failure rate with
+        # the other components of its class, otherwise None. This is not
+        # the case if, for instance, k-factors were applied to some
+        # components.
+        
+        if self._reduced is None: return None
+        
+        rates = np.atleast_2d(np.asarray(component_failure_rates,
+                                         dtype=float))
+        class_components = self._get_class_components()
+        component_classes = self.classes[:self.n_components]
+        
+        # Samples are checked in chunks, to limit the size of the temporary
+        # arrays and stop at the first chunk which differs
+        chunk_size = max(1, _MAX_CHUNK_ELEMENTS // max(1, self.n_components))
+        
+        for start in xrange(0, rates.shape[0], chunk_size): # pylint: disable=undefined-variable
+            
+            chunk_rates = rates[start:start + chunk_size]
+            expected = chunk_rates[:, class_components][:, component_classes]
+            
+            same = ((chunk_rates == expected) |
+                    (np.isnan(chunk_rates) & np.isnan(expected)))
+            if not same.all(): return None
+        
+        return self.classes
+    
+    def get_component_failure_rates(self, pool):
+        
+        # Components without a failure rate are set to NaN
+        
+        rates = [pool[key]._failure_rate # pylint: disable=protected-access
+                                            for key in self.component_keys]
+        
+        return np.array([np.nan if x is None else x for x in rates],
+                        dtype=float)
+    
+    def execute(self, component_failure_rates, columns=None):
+        
+        # Component failure rates are given per 10^6 hours in rate slot
+        # order, with NaN for components without a failure rate. Two
+        # dimensional inputs are evaluated row by row. Returns the failure
+        # rate (per hour) and MTTF of every node, with NaN for None. If
+        # columns is given, only the results of those node indices are
+        # returned, in the given order, and only they are stored for every
+        # sample.
+        
+        rates = np.asarray(component_failure_rates, dtype=float)
+        single = rates.ndim == 1
+        rates = np.atleast_2d(rates)
+        
+        if rates.shape[1] != self.n_components:
+            err_str = ("Expected {} component failure rates, but {} were "
+                       "given").format(self.n_components, rates.shape[1])
+            raise ValueError(err_str)
+        
+        classes = self.get_uniform_classes(rates)
+        
+        if classes is not None:
+            
+            if columns is not None: classes = classes[columns]
+            
+            failure_rates, mttfs = self._reduced.execute(
+                                    rates[:, self._get_class_components()],
+                                    classes)
+            
+            if single:
+                return failure_rates[0], mttfs[0]
+            
+            return failure_rates, mttfs
+        
+        if columns is None:
+            columns = slice(None)
+            n_columns = len(self)
+        else:
+            columns = np.asarray(columns, dtype=int)
+            n_columns = len(columns)
+        
+        n_samples = rates.shape[0]
+        failure_rates = np.empty((n_samples, n_columns))
+        mttfs = np.empty((n_samples, n_columns))
+        
+        # Limit the size of the node arrays and of the temporary arrays used
+        # by the parallel passes
+        chunk_size = max(1, _MAX_CHUNK_ELEMENTS // max(len(self),
+                                                       self._workspace_size))
+        
+        for start in xrange(0, n_samples, chunk_size): # pylint: disable=undefined-variable
+            
+            chunk = slice(start, start + chunk_size)
+            chunk_rates, chunk_mttfs = self._execute_chunk(rates[chunk])
+            
+            failure_rates[chunk] = chunk_rates[columns].T
+            mttfs[chunk] = chunk_mttfs[columns].T
+        
+        if single:
+            return failure_rates[0], mttfs[0]
+        
+        return failure_rates, mttfs
+    
+    def get_first_nodes(self):
+        # First node of each class, or None if every node has its own class
+        return self._first_nodes
+    
+    def _get_class_components(self):
+        # First component of each component class
+        return self._first_nodes[:self._reduced.n_components]
+    
+    def execute_reliability(self, component_failure_rates, times):
+        
+        # Exact reliability of every node at the given times (in hours),
+        # built from the survival functions of the components rather than
+        # the equivalent failure rate of each link. Serial links multiply
+        # the reliabilities of their items, parallel links take the
+        # complement of the product of their item unreliabilities and KofN
+        # links take the probability that at least k of their items
+        # survive. Returns an array with one row per node and one column
+        # per time, with NaN for nodes without a failure rate.
+        
+        rates = np.asarray(component_failure_rates, dtype=float)
+        
+        if rates.ndim != 1 or len(rates) != self.n_components:
+            err_str = ("Expected {} component failure rates, but {} were "
+                       "given").format(self.n_components, rates.shape[-1])
+            raise ValueError(err_str)
+        
+        classes = self.get_uniform_classes(rates)
+        
+        if classes is not None:
+            reliabilities = self._reduced.execute_reliability(
+                                        rates[self._get_class_components()],
+                                        times)
+            return reliabilities[classes]
+        
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        reliabilities = np.empty((len(self), len(times)))
+        
+        chunk_size = max(1, _MAX_CHUNK_ELEMENTS // len(self))
+        
+        for start in xrange(0, len(times), chunk_size): # pylint: disable=undefined-variable
+            chunk = slice(start, start + chunk_size)
+            reliabilities[:, chunk] = self._execute_reliability_chunk(
+                                                                rates,
+                                                                times[chunk])
+        
+        return reliabilities
+    
+    def _execute_reliability_chunk(self, rates, times):
+        
+        shape = (len(self), len(times))
+        reliabilities = np.full(shape, np.nan)
+        
+        reliabilities[:self.n_components] = np.exp(-np.outer(rates / 1e6,
+                                                             times))
+        
+        for node_type, nodes, children, offsets in self._passes:
+            
+            child_reliabilities = reliabilities[children]
+            valid = ~np.isnan(child_reliabilities)
+            any_valid = np.logical_or.reduceat(valid, offsets)
+            
+            if node_type == SERIAL:
+                node_reliabilities = np.multiply.reduceat(
+                                np.where(valid, child_reliabilities, 1.),
+                                offsets)
+            elif node_type == KOFN:
+                node_reliabilities = kofn_survival_reduceat(
+                                                    child_reliabilities.T,
+                                                    offsets,
+                                                    self.ks[nodes]).T
+            else:
+                node_reliabilities = 1. - np.multiply.reduceat(
+                                np.where(valid, 1. - child_reliabilities, 1.),
+                                offsets)
+            
+            node_reliabilities[~any_valid] = np.nan
+            reliabilities[nodes] = node_reliabilities
+        
+        return reliabilities
+    
+    def _execute_chunk(self, rates):
+        
+        # Nodes are stored along the first axis, so that gathering the
+        # children of each pass copies contiguous rows
+        
+        shape = (len(self), rates.shape[0])
+        failure_rates = np.full(shape, np.nan)
+        mttfs = np.full(shape, np.nan)
+        
+        failure_rates[:self.n_components] = rates.T / 1e6
+        
+        for node_type, nodes, children, offsets in self._passes:
+            
+            child_rates = failure_rates[children]
+            
+            if node_type == SERIAL:
+                
+                valid = ~np.isnan(child_rates)
+                any_valid = np.logical_or.reduceat(valid, offsets)
+                rate_sum = np.add.reduceat(np.where(valid, child_rates, 0.),
+                                           offsets)
+                rate_sum[~any_valid] = np.nan
+                failure_rates[nodes] = rate_sum
+            
+            else:
+                
+                if node_type == KOFN:
+                    mttf = kofn_mttf_reduceat(child_rates.T,
+                                              offsets,
+                                              self.ks[nodes]).T
+                else:
+                    mttf = parallel_mttf_reduceat(child_rates.T, offsets).T
+                
+                mttfs[nodes] = mttf
+                
+                with np.errstate(divide="ignore"):
+                    failure_rates[nodes] = 1. / mttf
+        
+        by_rate = ((self.node_types != PARALLEL) &
+                   (self.node_types != KOFN))
+        
+        with np.errstate(divide="ignore"):
+            mttfs[by_rate] = 1. / failure_rates[by_rate]
+        
+        return failure_rates, mttfs
+
+
+def compile_pool(pool, root="array"):
+    
+    type_codes = {}
+    heights = {}
+    stack = [(root, False)]
+    
+    while stack:
+        
+        key, expanded = stack.pop()
+        if key in heights: continue
+        
+        link = pool[key]
+        
+        if key not in type_codes:
+            type_codes[key] = _type_code(link)
+        
+        if type_codes[key] == COMPONENT:
+            heights[key] = 0
+            continue
+        
+        if not expanded:
+            stack.append((key, True))
+            stack.extend((x, False) for x in link.items)
+            continue
+        
+        heights[key] = 1 + max([heights[x] for x in link.items] or [0])
+    
+    keys = sorted(heights, key=lambda x: (heights[x], type_codes[x], x))
+    index = {key: i for i, key in enumerate(keys)}
+    
+    node_types = np.array([type_codes[key] for key in keys], dtype=np.int8)
+    indptr = [0]
+    indices = []
+    
+    for key in keys:
+        
+        if type_codes[key] != COMPONENT:
+            indices.extend(index[x] for x in pool[key].items)
+        
+        indptr.append(len(indices))
+    
+    heights = np.array([heights[key] for key in keys], dtype=int)
+    ks = np.array([pool[key].k if type_codes[key] == KOFN else 0
+                                                    for key in keys],
+                  dtype=int)
+    classes = _get_classes(pool, keys, type_codes, indptr, indices, ks)
+    
+    return EvaluationPlan(keys,
+                          node_types,
+                          np.array(indptr, dtype=int),
+                          np.array(indices, dtype=int),
+                          heights,
+                          np.array(classes, dtype=int),
+                          ks)
+
+
+def _get_classes(pool, keys, type_codes, indptr, indices, ks):
+    
+    # Canonical structural class of each node, in topological order.
+    # Components are classed by their label (i.e. their database id) and
+    # links by their type, k and the sorted classes of their items, as the
+    # metrics of the links do not depend on the order of their items.
+    # Classes are numbered in order of their first node.
+    
+    class_ids = {}
+    classes = []
+    
+    for i, key in enumerate(keys):
+        
+        if type_codes[key] == COMPONENT:
+            class_key = (COMPONENT, pool[key].label)
+        else:
+            class_key = (type_codes[key],
+                         ks[i],
+                         tuple(sorted(classes[j]
+                                    for j in indices[indptr[i]:indptr[i + 1]])))
+        
+        classes.append(class_ids.setdefault(class_key, len(class_ids)))
+    
+    return classes
+
+
+def _type_code(link):
+    
+    # Checking the exact type first avoids the cost of isinstance for the
+    # abstract base classes
+    link_type = type(link)
+    
+    if link_type in _TYPE_CODES:
+        return _TYPE_CODES[link_type]
+    
+    if isinstance(link, Component):
+        return COMPONENT
+    elif isinstance(link, Serial):
+        return SERIAL
+    elif isinstance(link, KofN):
+        return KOFN
+    elif isinstance(link, Parallel):
+        return PARALLEL
+    
+    err_str = "Link type '{}' not recognised".format(type(link).__name__)
+    raise TypeError(err_str)
+
+
+def _get_reduced_plan(plan):
+    
+    # Plan holding only the first node of each class, with the children of
+    # each node replaced by their classes. Returns None if every node has
+    # its own class.
+    
+    classes = plan.classes
+    _, first_nodes = np.unique(classes, return_index=True)
+    
+    if len(first_nodes) == len(plan): return None, None
+    
+    n_children = np.diff(plan.indptr)
+    owners = np.repeat(np.arange(len(plan)), n_children)
+    is_first = np.zeros(len(plan), dtype=bool)
+    is_first[first_nodes] = True
+    
+    reduced = EvaluationPlan([plan.keys[i] for i in first_nodes],
+                             plan.node_types[first_nodes],
+                             np.append(0, np.cumsum(n_children[first_nodes])),
+                             classes[plan.indices[is_first[owners]]],
+                             plan.heights[first_nodes],
+                             ks=plan.ks[first_nodes])
+    
+    return reduced, first_nodes
+
+
+def _get_passes(node_types, indptr, indices, heights):
+    
+    # Group the links by height and type, so each group can be evaluated in
+    # a single vectorised step. Links without children are never evaluated.
+    
+    passes = []
+    n_children = np.diff(indptr)
+    
+    for height in np.unique(heights[heights > 0]):
+        for node_type in (SERIAL, PARALLEL, KOFN):
+            
+            nodes = np.flatnonzero((heights == height) &
+                                   (node_types == node_type) &
+                                   (n_children > 0))
+            if not nodes.size: continue
+            
+            children = np.concatenate([indices[indptr[i]:indptr[i + 1]]
+                                                            for i in nodes])
+            offsets = np.append(0, np.cumsum(n_children[nodes])[:-1])
+            passes.append((node_type, nodes, children, offsets))
+    
+    return passes
+
+
+def _get_workspace_size(passes):
+    
+    # Number of elements per sample in the largest temporary array created
+    # when evaluating a pass
+    
+    sizes = [len(children) for _, _, children, _ in passes]
+    
+    for node_type, _, children, offsets in passes:
+        
+        group_sizes = np.diff(np.append(offsets, len(children)))
+        
+        if node_type == PARALLEL:
+            sizes.append(parallel_mttf_workspace(group_sizes))
+        elif node_type == KOFN:
+            sizes.append(kofn_mttf_workspace(group_sizes))
+    
+    return max(sizes or [1])
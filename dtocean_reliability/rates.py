@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+DTOcean Reliability Assessment Module (RAM)
+
+Failure rates of the components of a database, resolved for every severity
+level and calculation scenario.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+# Built in modules
+import logging
+
+import numpy as np
+
+from .store import ComponentStore, DictComponentStore
+
+# Start logging
+module_logger = logging.getLogger(__name__)
+
+SEVERITY_LEVELS = ("critical", "noncritical")
+CALC_SCENARIOS = ("lower", "mean", "upper")
+SCENARIOS = tuple((x, y) for x in SEVERITY_LEVELS for y in CALC_SCENARIOS)
+
+# Designed components (i.e. shallow/gravity foundations, direct embedment
+# anchors and suction caissons) in addition to grouted joints use a generic
+# failure rate of 1.0x10^-4 failures per annum (10 / 876 failures per 10^6
+# hours)
+DESIGNED_COMPONENTS = ("gravity",
+                       "shallowfoundation",
+                       "suctioncaisson",
+                       "directembedment",
+                       "grout")
+DESIGNED_FAILURE_RATE = 10. / 876
+
+_MEAN_IDX = 1
+
+
+class FailureRateTable(object):
+    
+    # Failure rates (per 10^6 hours) of the components of a database,
+    # resolved once for each severity level and calculation scenario. The
+    # database may be a dictionary or a ComponentStore. If ids are given,
+    # only those components are fetched from the database. Rates
+    # are stored in an array of shape (n_ids, 2, 3), indexed by the row of
+    # the component id, the severity level and the calculation scenario,
+    # with NaN where no failure rate data is set.
+    
+    # Note:
+    #  * If no data for a particular calculation scenario, failure rate
+    #    defaults to mean value
+    #  * If no data for the severity level is available, the values of the
+    #    other severity level are used, which is recorded in the fallback
+    #    array.
+    
+    def __init__(self, database, ids=None):
+        
+        if not isinstance(database, ComponentStore):
+            database = DictComponentStore(database)
+        
+        if ids is None: ids = database.get_ids()
+        
+        ids = [x for x in ids if x not in DESIGNED_COMPONENTS and
+                                                            x != "ideal"]
+        ids, raw_rates = database.get_raw_rates(ids)
+        
+        # Rates which are not positive are not set
+        with np.errstate(invalid="ignore"):
+            raw_rates = np.where(raw_rates > 0., raw_rates, np.nan)
+        
+        rates, fallback = _resolve_rates(raw_rates)
+        
+        # Designed and ideal components take precedence over the database
+        # and are not affected by k-factors
+        special_ids = list(DESIGNED_COMPONENTS) + ["ideal"]
+        special_rates = [DESIGNED_FAILURE_RATE] * len(DESIGNED_COMPONENTS)
+        special_rates.append(0.)
+        
+        n_special = len(special_ids)
+        special_rates = np.broadcast_to(
+                        np.array(special_rates)[:, np.newaxis, np.newaxis],
+                        (n_special, 2, 3))
+        
+        self.ids = ids + special_ids
+        self.index = {x: i for i, x in enumerate(self.ids)}
+        self.rates = np.concatenate((rates, special_rates))
+        self.fallback = np.concatenate((fallback,
+                                        np.zeros((n_special, 2, 3),
+                                                 dtype=bool)))
+        self.scalable = np.arange(len(self.ids)) < len(ids)
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def get_rows(self, labels):
+        
+        # Rows of the table for the given component labels. Unknown labels
+        # raise a KeyError.
+        
+        return np.array([self.index[x] for x in labels], dtype=int)
+    
+    def get_failure_rates(self, rows,
+                                severitylevel='critical',
+                                calcscenario='mean',
+                                markers=None,
+                                k_factors=None):
+        
+        # Returns the failure rates of the components in the given rows,
+        # multiplied by the k-factors of their markers, and the severity
+        # level of each rate
+        
+        severity_idx, scenario_idx = get_scenario_indices(severitylevel,
+                                                          calcscenario)
+        
+        failure_rates = self.rates[rows, severity_idx, scenario_idx]
+        self._check_missing(rows, failure_rates)
+        failure_rates = self._apply_k_factors(rows,
+                                              failure_rates,
+                                              markers,
+                                              k_factors)
+        
+        fallback = self.fallback[rows, severity_idx, scenario_idx]
+        other_severitylevel = SEVERITY_LEVELS[1 - severity_idx]
+        severity_levels = np.where(fallback,
+                                   other_severitylevel,
+                                   severitylevel).tolist()
+        
+        return failure_rates, severity_levels
+    
+    def get_scenario_failure_rates(self, rows, markers=None, k_factors=None):
+        
+        # Returns the failure rates of the components in the given rows for
+        # every scenario, as an array with one row per scenario, in the
+        # order of SCENARIOS, and one column per component
+        
+        failure_rates = self.rates[rows].reshape(len(rows), -1).T
+        self._check_missing(rows, failure_rates)
+        
+        return self._apply_k_factors(rows, failure_rates, markers, k_factors)
+    
+    def _check_missing(self, rows, failure_rates):
+        
+        # Rates for several scenarios are missing if they are missing in
+        # any scenario
+        
+        missing = np.isnan(failure_rates)
+        if missing.ndim > 1: missing = missing.any(axis=0)
+        if not missing.any(): return
+        
+        label = self.ids[rows[np.argmax(missing)]]
+        err_str = ("No failure rate data is set for component "
+                   "'{}'").format(label)
+        raise RuntimeError(err_str)
+    
+    def _apply_k_factors(self, rows, failure_rates, markers, k_factors):
+        
+        if not k_factors: return failure_rates
+        
+        factors = np.array([k_factors.get(x, 1.) for x in markers],
+                           dtype=float)
+        
+        return np.where(self.scalable[rows],
+                        failure_rates * factors,
+                        failure_rates)
+
+
+def get_scenario_indices(severitylevel, calcscenario):
+    
+    if severitylevel not in SEVERITY_LEVELS:
+        err_str = ("Argument 'severitylevel' may only take values "
+                   "'critical' or 'noncritical'")
+        raise ValueError(err_str)
+    
+    if calcscenario not in CALC_SCENARIOS:
+        err_str = "Argument 'calcscenario' may only take values 0, 1, or 2"
+        raise ValueError(err_str)
+    
+    return (SEVERITY_LEVELS.index(severitylevel),
+            CALC_SCENARIOS.index(calcscenario))
+
+
+def _resolve_rates(raw_rates):
+    
+    # Follow the fallback chain for every severity level and scenario at
+    # once: the scenario of the severity level, its mean, the scenario of
+    # the other severity level and then its mean
+    
+    rates = raw_rates.copy()
+    fallback = np.zeros(raw_rates.shape, dtype=bool)
+    
+    own_mean = raw_rates[:, :, _MEAN_IDX:_MEAN_IDX + 1]
+    other = raw_rates[:, ::-1, :]
+    other_mean = other[:, :, _MEAN_IDX:_MEAN_IDX + 1]
+    
+    for candidate, is_fallback in ((own_mean, False),
+                                   (other, True),
+                                   (other_mean, True)):
+        
+        missing = np.isnan(rates)
+        candidate = np.broadcast_to(candidate, rates.shape)
+        
+        rates[missing] = candidate[missing]
+        fallback[missing & ~np.isnan(candidate)] = is_fallback
+    
+    return rates, fallback
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+DTOcean Reliability Assessment Module (RAM)
+
+Stores of component failure rate data, which can be given to a Network in
+place of the database dictionary.
+
+.. moduleauthor:: Mathew Topper <mathew.topper@dataonlygreater.com>
+"""
+
+# Built in modules
+import os
+import abc
+import json
+import struct
+import logging
+import sqlite3
+import tempfile
+
+import numpy as np
+
+# Start logging
+module_logger = logging.getLogger(__name__)
+
+# SQLite limits the number of parameters of a single statement to 999
+_MAX_VARIABLES = 999
+_SEVERITY_KEYS = ("failratecrit", "failratenoncrit")
+_COLUMNS = ("crit_lower",
+            "crit_mean",
+            "crit_upper",
+            "noncrit_lower",
+            "noncrit_mean",
+            "noncrit_upper")
+
+# Layout of catalogue files: magic string, format version and header length,
+# then the JSON header of ids, then the failure rates as little-endian
+# doubles, aligned to _ALIGNMENT bytes
+_MAGIC = "DTOCATLG"
+_CATALOGUE_VERSION = 1
+_PREFIX = struct.Struct("<8sII")
+_ALIGNMENT = 64
+
+
+class ComponentStore(object):
+    
+    # Source of the failure rates of the components of a network. Failure
+    # rates are given in the format of the "item10" entry of the database
+    # dictionary, i.e. a dictionary with 'failratecrit' and
+    # 'failratenoncrit' keys, each holding the lower, mean and upper
+    # failure rates.
+    
+    __metaclass__ = abc.ABCMeta
+    
+    @abc.abstractmethod
+    def get_ids(self):
+        return
+    
+    @abc.abstractmethod
+    def get_failure_rates(self, ids):
+        
+        # Returns a dictionary of the failure rates of the given ids. Ids
+        # which are not in the store are left out.
+        
+        return
+    
+    def get_raw_rates(self, ids):
+        
+        # Returns the ids found in the store, in the given order, and an
+        # array of shape (n_found, 2, 3) holding their failure rates by
+        # severity level and calculation scenario, with NaN for unset
+        # values
+        
+        failure_rates = self.get_failure_rates(ids)
+        found = [x for x in ids if x in failure_rates]
+        raw_rates = np.array([_get_values(failure_rates[x]) for x in found],
+                             dtype=float).reshape(-1, 2, 3)
+        
+        return found, raw_rates
+
+
+class DictComponentStore(ComponentStore):
+    
+    # Store backed by a database dictionary, keyed by component id
+    
+    def __init__(self, database):
+        self._database = database
+    
+    def get_ids(self):
+        return list(self._database)
+    
+    def get_failure_rates(self, ids):
+        
+        result = {}
+        
+        for dbid in ids:
+            
+            if dbid not in self._database: continue
+            result[dbid] = _get_item(self._database[dbid])
+        
+        return result
+
+
+class SQLiteComponentStore(ComponentStore):
+    
+    # Store backed by a local SQLite file, with a table of the failure
+    # rates of each component indexed by id. Ids may be strings or
+    # integers. Unset failure rates are stored as NULL.
+    
+    def __init__(self, path):
+        
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.text_factory = str
+        
+        # The id column has no type, so that string and integer ids are
+        # stored as given
+        query = ("CREATE TABLE IF NOT EXISTS failure_rates "
+                 "(id PRIMARY KEY, {})").format(
+                                    ", ".join(x + " REAL" for x in _COLUMNS))
+        
+        with self._connection:
+            self._connection.execute(query)
+    
+    def get_ids(self):
+        
+        cursor = self._connection.execute("SELECT id FROM failure_rates")
+        
+        return [x[0] for x in cursor]
+    
+    def get_failure_rates(self, ids):
+        
+        ids = list(set(ids))
+        result = {}
+        
+        for start in xrange(0, len(ids), _MAX_VARIABLES): # pylint: disable=undefined-variable
+            
+            chunk = ids[start:start + _MAX_VARIABLES]
+            query = ("SELECT id, {} FROM failure_rates "
+                     "WHERE id IN ({})").format(", ".join(_COLUMNS),
+                                                ", ".join("?" * len(chunk)))
+            
+            for row in self._connection.execute(query, chunk):
+                result[row[0]] = {_SEVERITY_KEYS[0]: list(row[1:4]),
+                                  _SEVERITY_KEYS[1]: list(row[4:7])}
+        
+        return result
+    
+    def add_database(self, database):
+        
+        # Import the failure rates of a database dictionary, replacing
+        # existing entries with the same id
+        
+        rows = []
+        
+        for dbid, dbitem in database.iteritems():
+            rows.append([dbid] + _get_values(_get_item(dbitem)))
+        
+        query = "INSERT OR REPLACE INTO failure_rates VALUES ({})".format(
+                                        ", ".join("?" * (len(_COLUMNS) + 1)))
+        
+        with self._connection:
+            self._connection.executemany(query, rows)
+        
+        return
+    
+    def close(self):
+        self._connection.close()
+    
+    def __len__(self):
+        query = "SELECT COUNT(*) FROM failure_rates"
+        return self._connection.execute(query).fetchone()[0]
+
+
+def import_database(database, path):
+    
+    # Create (or update) an SQLite store at path from a database dictionary
+    
+    store = SQLiteComponentStore(path)
+    store.add_database(database)
+    
+    return store
+
+
+class MemmapComponentStore(ComponentStore):
+    
+    # Read-only store backed by a catalogue file written by
+    # export_catalogue. The failure rates are memory mapped, so processes
+    # which open the same file share a single copy in the page cache, and
+    # only the rows of the requested ids are read. Pickled stores only hold
+    # the path of the file, which is mapped again when unpickled.
+    
+    def __init__(self, path):
+        
+        self.path = path
+        
+        with open(path, "rb") as f:
+            
+            prefix = f.read(_PREFIX.size)
+            
+            try:
+                magic, version, header_length = _PREFIX.unpack(prefix)
+            except struct.error:
+                magic = None
+            
+            if magic != _MAGIC:
+                err_str = "File '{}' is not a component catalogue".format(path)
+                raise ValueError(err_str)
+            
+            if version != _CATALOGUE_VERSION:
+                err_str = ("Catalogue format version {} not "
+                           "supported").format(version)
+                raise ValueError(err_str)
+            
+            ids = [_from_json(x) for x in json.loads(f.read(header_length))]
+        
+        self._ids = ids
+        self._index = {x: i for i, x in enumerate(ids)}
+        
+        if ids:
+            self._rates = np.memmap(path,
+                                    dtype="<f8",
+                                    mode="r",
+                                    offset=_get_data_offset(header_length),
+                                    shape=(len(ids), 2, 3))
+        else:
+            self._rates = np.empty((0, 2, 3))
+    
+    def get_ids(self):
+        return list(self._ids)
+    
+    def get_failure_rates(self, ids):
+        
+        found, raw_rates = self.get_raw_rates(ids)
+        result = {}
+        
+        for dbid, values in zip(found, raw_rates.tolist()):
+            result[dbid] = {_SEVERITY_KEYS[0]: values[0],
+                            _SEVERITY_KEYS[1]: values[1]}
+        
+        return result
+    
+    def get_raw_rates(self, ids):
+        
+        found = [x for x in ids if x in self._index]
+        rows = np.array([self._index[x] for x in found], dtype=int)
+        
+        return found, np.asarray(self._rates[rows])
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def __getstate__(self):
+        return {"path": self.path}
+    
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+
+def export_catalogue(database, path):
+    
+    # Write the failure rates of a database dictionary or ComponentStore to
+    # a catalogue file at path, for use with MemmapComponentStore. Unset
+    # failure rates are stored as NaN.
+    
+    if not isinstance(database, ComponentStore):
+        database = DictComponentStore(database)
+    
+    ids, raw_rates = database.get_raw_rates(database.get_ids())
+    
+    # Other ids, such as tuples, are not loaded from the header unchanged
+    for dbid in ids:
+        if not isinstance(dbid, (basestring, int, long)): # pylint: disable=undefined-variable
+            err_str = ("Component id {!r} can not be stored in a catalogue. "
+                       "Ids must be strings or integers").format(dbid)
+            raise ValueError(err_str)
+    
+    header = json.dumps(ids)
+    data_offset = _get_data_offset(len(header))
+    
+    # Write to a temporary file first, so that processes which map the
+    # existing catalogue are not affected
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory)
+    
+    try:
+        
+        with os.fdopen(handle, "wb") as f:
+            f.write(_PREFIX.pack(_MAGIC, _CATALOGUE_VERSION, len(header)))
+            f.write(header)
+            f.write("\0" * (data_offset - _PREFIX.size - len(header)))
+            f.write(raw_rates.astype("<f8").tobytes())
+        
+        if os.name == "nt" and os.path.isfile(path): os.remove(path)
+        os.rename(temp_path, path)
+    
+    except Exception:
+        os.remove(temp_path)
+        raise
+    
+    return MemmapComponentStore(path)
+
+
+def _get_data_offset(header_length):
+    
+    offset = _PREFIX.size + header_length
+    
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _from_json(dbid):
+    
+    # JSON strings are loaded as unicode, so ASCII ids are converted back to
+    # byte strings
+    
+    if isinstance(dbid, unicode): # pylint: disable=undefined-variable
+        try:
+            dbid = str(dbid)
+        except UnicodeEncodeError:
+            pass
+    
+    return dbid
+
+
+def _get_item(dbitem):
+    
+    try:
+        failure_rates = dbitem['item10']
+    except (KeyError, TypeError):
+        failure_rates = None
+    
+    return failure_rates
+
+
+def _get_values(failure_rates):
+    
+    # Failure rates of an "item10" entry as a list of floats, ordered by
+    # severity level and then calculation scenario, with None for missing
+    # or invalid values
+    
+    if failure_rates is None: failure_rates = {}
+    
+    values = []
+    
+    for key in _SEVERITY_KEYS:
+        
+        severity_rates = failure_rates.get(key)
+        if severity_rates is None: severity_rates = [None] * 3
+        
+        for value in severity_rates:
+            
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                value = None
+            
+            values.append(value)
+    
+    return values
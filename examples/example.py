@@ -16,12 +16,12 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-# pylint: disable=eval-used
-
 import os
-from collections import Counter # pylint: disable=unused-import
 
-from dtocean_reliability import start_logging, Network, SubNetwork
+import numpy as np
+
+from dtocean_reliability import start_logging, Network
+from dtocean_reliability.load import load, load_network
 
 try:
     import pandas as pd
@@ -35,25 +35,21 @@ THIS_DIR = os.path.dirname(os.path.realpath(__file__))
 DATA_DIR = os.path.join(THIS_DIR, "..", "example_data")
 
 
+def _load_network(hierarchy_file, bom_file):
+    return load_network(os.path.join(DATA_DIR, hierarchy_file),
+                        os.path.join(DATA_DIR, bom_file))
+
+
 def main():
     
-    dummydb = eval(open(os.path.join(DATA_DIR, 'dummydb.txt')).read())
-    dummyelechier = eval(open(os.path.join(DATA_DIR,
-                                           'dummyelechier.txt')).read())
-    dummyelecbom = eval(open(os.path.join(DATA_DIR,
-                                          'dummyelecbom.txt')).read())
-    dummymoorhier = eval(open(os.path.join(DATA_DIR,
-                                           'dummymoorhier.txt')).read())
-    dummymoorbom = eval(open(os.path.join(DATA_DIR,
-                                          'dummymoorbom.txt')).read())
-    dummyuserhier = eval(open(os.path.join(DATA_DIR,
-                                           'dummyuserhier.txt')).read())
-    dummyuserbom = eval(open(os.path.join(DATA_DIR,
-                                          'dummyuserbom.txt')).read())
-    
-    electrical_network = SubNetwork(dummyelechier, dummyelecbom)
-    moorings_network = SubNetwork(dummymoorhier, dummymoorbom)
-    user_network = SubNetwork(dummyuserhier, dummyuserbom)
+    dummydb = load(os.path.join(DATA_DIR, 'dummydb.txt'))
+    
+    electrical_network = _load_network('dummyelechier.txt',
+                                       'dummyelecbom.txt')
+    moorings_network = _load_network('dummymoorhier.txt',
+                                     'dummymoorbom.txt')
+    user_network = _load_network('dummyuserhier.txt',
+                                 'dummyuserbom.txt')
     
     network = Network(dummydb,
                       electrical_network,
@@ -94,9 +90,8 @@ def main():
     
     print ""
     
-    weeks = range(1, 13)
-    hours = [x * 24 * 7 for x in weeks]
-    R = [system.get_reliability(x) for x in hours]
+    weeks = np.arange(1, 13)
+    R = system.get_reliability(weeks * 24 * 7)
     
     print "{:>8}{:>8}".format("Week", "R")
     
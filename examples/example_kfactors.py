@@ -15,36 +15,30 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-# pylint: disable=eval-used
-
 import os
-from collections import Counter # pylint: disable=unused-import
 
-from dtocean_reliability import start_logging, Network, SubNetwork
+from dtocean_reliability import start_logging, Network
+from dtocean_reliability.load import load, load_network
 
 THIS_DIR = os.path.dirname(os.path.realpath(__file__))
 DATA_DIR = os.path.join(THIS_DIR, "..", "example_data")
 
 
+def _load_network(hierarchy_file, bom_file):
+    return load_network(os.path.join(DATA_DIR, hierarchy_file),
+                        os.path.join(DATA_DIR, bom_file))
+
+
 def main():
     
-    dummydb = eval(open(os.path.join(DATA_DIR, 'dummydb.txt')).read())
-    dummyelechier = eval(open(os.path.join(DATA_DIR,
-                                           'dummyelechier.txt')).read())
-    dummyelecbom = eval(open(os.path.join(DATA_DIR,
-                                          'dummyelecbom.txt')).read())
-    dummymoorhier = eval(open(os.path.join(DATA_DIR,
-                                           'dummymoorhier.txt')).read())
-    dummymoorbom = eval(open(os.path.join(DATA_DIR,
-                                          'dummymoorbom.txt')).read())
-    dummyuserhier = eval(open(os.path.join(DATA_DIR,
-                                           'dummyuserhier.txt')).read())
-    dummyuserbom = eval(open(os.path.join(DATA_DIR,
-                                          'dummyuserbom.txt')).read())
+    dummydb = load(os.path.join(DATA_DIR, 'dummydb.txt'))
     
-    electrical_network = SubNetwork(dummyelechier, dummyelecbom)
-    moorings_network = SubNetwork(dummymoorhier, dummymoorbom)
-    user_network = SubNetwork(dummyuserhier, dummyuserbom)
+    electrical_network = _load_network('dummyelechier.txt',
+                                       'dummyelecbom.txt')
+    moorings_network = _load_network('dummymoorhier.txt',
+                                     'dummymoorbom.txt')
+    user_network = _load_network('dummyuserhier.txt',
+                                 'dummyuserbom.txt')
     
     k_factors = {12: 2,
                  13: 2,
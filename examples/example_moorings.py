@@ -16,12 +16,10 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-# pylint: disable=eval-used
-
 import os
-from collections import Counter # pylint: disable=unused-import
 
-from dtocean_reliability import start_logging, Network, SubNetwork
+from dtocean_reliability import start_logging, Network
+from dtocean_reliability.load import load, load_network
 
 try:
     import pandas as pd
@@ -35,16 +33,18 @@ THIS_DIR = os.path.dirname(os.path.realpath(__file__))
 DATA_DIR = os.path.join(THIS_DIR, "..", "example_data")
 
 
+def _load_network(hierarchy_file, bom_file):
+    return load_network(os.path.join(DATA_DIR, hierarchy_file),
+                        os.path.join(DATA_DIR, bom_file))
+
+
 def main():
     
-    dummydb = eval(open(os.path.join(DATA_DIR, 'dummydb.txt')).read())
-    dummymoorhier = eval(open(os.path.join(DATA_DIR,
-                                           'dummymoorhier_noelec.txt')).read())
-    dummymoorbom = eval(open(os.path.join(DATA_DIR,
-                                          'dummymoorbom_noelec.txt')).read())
+    dummydb = load(os.path.join(DATA_DIR, 'dummydb.txt'))
     
     electrical_network = None
-    moorings_network = SubNetwork(dummymoorhier, dummymoorbom)
+    moorings_network = _load_network('dummymoorhier_noelec.txt',
+                                     'dummymoorbom_noelec.txt')
     user_network = None
     
     network = Network(dummydb,
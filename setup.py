@@ -95,14 +95,14 @@ setup(name='dtocean-reliability',
       license="GPLv3",
       packages=find_packages(),
       setup_requires=['pyyaml'],
-      install_requires=['polite>=0.9',
+      install_requires=['numpy',
+                        'polite>=0.9',
                         'setuptools'
                         ],
       package_data={'dtocean_reliability': ['config/*.yaml']
                     },
       zip_safe=False, # Important for reading config files
-      tests_require=['numpy',
-                     'pytest',
+      tests_require=['pytest',
                      'python-graphviz'],
       cmdclass = {'test': PyTest,
                   'cleanpyc': CleanPyc,
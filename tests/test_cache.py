@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# pylint: disable=redefined-outer-name,protected-access,eval-used
+
+import os
+import zlib
+from collections import Counter, OrderedDict
+
+import pytest
+
+import dtocean_reliability.cache
+import dtocean_reliability.main
+from dtocean_reliability import Network, PoolCache, SubNetwork
+from dtocean_reliability.cache import get_networks_key
+
+THIS_DIR = os.path.dirname(os.path.realpath(__file__))
+DATA_DIR = os.path.join(THIS_DIR, "..", "example_data")
+
+
+def _read_data(file_name):
+    return eval(open(os.path.join(DATA_DIR, file_name)).read())
+
+
+@pytest.fixture(scope="module")
+def database():
+    return _read_data('dummydb.txt')
+
+
+@pytest.fixture
+def networks():
+    
+    electrical_network = SubNetwork(_read_data('dummyelechier.txt'),
+                                    _read_data('dummyelecbom.txt'))
+    moorings_network = SubNetwork(_read_data('dummymoorhier.txt'),
+                                  _read_data('dummymoorbom.txt'))
+    user_network = SubNetwork(_read_data('dummyuserhier.txt'),
+                              _read_data('dummyuserbom.txt'))
+    
+    return electrical_network, moorings_network, user_network
+
+
+def test_get_networks_key_order():
+    
+    hierarchy = OrderedDict([("a", ["id1"]), ("b", ["id2"])])
+    reversed_hierarchy = OrderedDict([("b", ["id2"]), ("a", ["id1"])])
+    bom = {"a": {"quantity": Counter({"id1": 1})}}
+    
+    key = get_networks_key(SubNetwork(hierarchy, bom), None, None)
+    test = get_networks_key(SubNetwork(reversed_hierarchy, bom), None, None)
+    
+    assert key == test
+
+
+def test_get_networks_key_interned():
+    
+    system = "".join(["Moorings", " lines"])
+    bom = {"a": {"quantity": Counter({"id1": 1})}}
+    network = SubNetwork({"a": {system: ["id1"]}}, bom)
+    
+    key = get_networks_key(network, None, None)
+    intern(system)
+    
+    assert get_networks_key(network, None, None) == key
+
+
+def test_get_networks_key_changed(networks):
+    
+    key = get_networks_key(*networks)
+    networks[0].hierarchy["device001"]['Elec sub-system'].append("id1")
+    
+    assert get_networks_key(*networks) != key
+    assert get_networks_key(networks[0], networks[1], None) != key
+
+
+def test_PoolCache_network(tmpdir, monkeypatch, database, networks):
+    
+    cache = PoolCache(str(tmpdir))
+    expected = Network(database, *networks, cache=cache)
+    
+    assert len(tmpdir.listdir()) == 1
+    
+    # A cache hit must not combine the networks again
+    def fail(*args):
+        raise AssertionError("Networks combined")
+    
+    monkeypatch.setattr(dtocean_reliability.main, "combine_networks", fail)
+    test = Network(database, *networks, cache=cache)
+    
+    assert test.display() == expected.display()
+    assert test._subhub_indices == expected._subhub_indices
+    assert test._device_indices == expected._device_indices
+    assert test._curtailments == expected._curtailments
+    assert (test.set_failure_rates().get_systems_metrics() ==
+                        expected.set_failure_rates().get_systems_metrics())
+
+
+def test_PoolCache_evict(tmpdir, database, networks):
+    
+    cache = PoolCache(str(tmpdir))
+    Network(database, *networks, cache=cache)
+    
+    first_path = tmpdir.listdir()[0]
+    cache.max_bytes = first_path.size() + 1
+    os.utime(str(first_path), (0, 0))
+    
+    Network(database, networks[0], cache=cache)
+    
+    paths = tmpdir.listdir()
+    
+    assert len(paths) == 1
+    assert paths[0] != first_path
+
+
+def test_PoolCache_get_corrupt(tmpdir):
+    
+    tmpdir.join("key.pool").write("not a pool")
+    cache = PoolCache(str(tmpdir))
+    
+    assert cache.get("key") is None
+    assert not tmpdir.listdir()
+
+
+def test_PoolCache_get_pickle(tmpdir):
+    
+    # Entries must never be unpickled, as anyone who can write to the cache
+    # directory could run code in the reading process
+    created = tmpdir.join("created")
+    payload = "cos\nmkdir\n(S'{}'\ntR.".format(created)
+    tmpdir.join("key.pool").write(zlib.compress(payload), mode="wb")
+    cache = PoolCache(str(tmpdir))
+    
+    assert cache.get("key") is None
+    assert not created.check()
+
+
+def test_PoolCache_put_error(tmpdir, monkeypatch, database, networks):
+    
+    def fail(*args):
+        raise IOError("Disk full")
+    
+    cache = PoolCache(str(tmpdir))
+    monkeypatch.setattr(dtocean_reliability.cache, "_write_entry", fail)
+    
+    with pytest.raises(IOError):
+        Network(database, *networks, cache=cache)
+    
+    assert not tmpdir.listdir()
+
+
+def test_PoolCache_clear(tmpdir, database, networks):
+    
+    cache = PoolCache(str(tmpdir))
+    Network(database, *networks, cache=cache)
+    cache.clear()
+    
+    assert not tmpdir.listdir()
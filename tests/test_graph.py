@@ -18,6 +18,8 @@
 # pylint: disable=redefined-outer-name
 
 import math
+import cPickle as pickle
+from copy import copy
 
 import pytest
 import numpy as np
@@ -27,7 +29,12 @@ from dtocean_reliability.graph import (Link,
                                        Component,
                                        Serial,
                                        Parallel,
+                                       KofN,
+                                       RatedPool,
                                        ReliabilityWrapper,
+                                       evaluate_pool,
+                                       LabelIndex,
+                                       NodeHandles,
                                        find_all_labels)
 
 
@@ -227,6 +234,23 @@ def test_Component_graph_failure_rate(pool_dummy):
     assert str(failure_rate) in dot.source
 
 
+def test_Component_graph_same_dot(pool_dummy):
+    
+    dot = gv.Digraph()
+    handle_one = Component("one").graph(pool_dummy, dot)
+    handle_two = Component("two").graph(pool_dummy, dot)
+    
+    assert handle_one != handle_two
+    assert Component("three").graph(pool_dummy, gv.Digraph()) == handle_one
+
+
+def test_NodeHandles():
+    
+    handles = NodeHandles("x")
+    
+    assert [next(handles) for _ in range(3)] == ["x0", "x1", "x2"]
+
+
 def test_Component_str():
     label = "test"
     test = Component(label)
@@ -618,6 +642,25 @@ def test_Parallel_graph_complex(pool):
     assert handle in dot.source
 
 
+def test_Parallel_graph_handles():
+    
+    pool = {0: Component("zero"),
+            1: Component("one"),
+            2: Serial("name")}
+    pool[2].add_item(0)
+    pool[2].add_item(1)
+    
+    test = Parallel("top")
+    test.add_item(2)
+    
+    dot = gv.Digraph()
+    handles = NodeHandles()
+    handle = test.graph(pool, dot, levels=2, handles=handles)
+    
+    assert handle == "n0"
+    assert next(handles) == "n6"
+
+
 def test_Parallel_graph_no_failure_rate(pool_dummy):
     
     label = "test"
@@ -635,6 +678,73 @@ def test_Parallel_str():
     assert label in str(test)
 
 
+def test_KofN_init_bad_k():
+    with pytest.raises(ValueError):
+        KofN(0, "test")
+
+
+def test_KofN_get_mttf_none(pool):
+    test = KofN(1, "test")
+    assert test.get_mttf(pool) is None
+
+
+@pytest.mark.parametrize("k, expected", [
+    (1, 3e6 / 4.),
+    (2, 1e6 / 4.),
+])
+def test_KofN_get_mttf(pool, k, expected):
+    test = KofN(k, "test")
+    test.add_item(0)
+    test.add_item(1)
+    assert np.isclose(test.get_mttf(pool), expected)
+
+
+def test_KofN_get_mttf_ideal(pool_zero):
+    test = KofN(2, "test")
+    test.add_item(0)
+    test.add_item(1)
+    assert test.get_mttf(pool_zero) == float("inf")
+
+
+def test_KofN_get_reliability(pool):
+    test = KofN(2, "test")
+    test.add_item(0)
+    test.add_item(1)
+    assert np.isclose(test.get_reliability(pool, 1), math.exp(-4e-6))
+
+
+def test_KofN_get_probability_proportion(pool):
+    test = KofN(2, "test")
+    test.add_item(0)
+    test.add_item(1)
+    assert test.get_probability_proportion(pool, "zero") == 0.5
+
+
+def test_KofN_display_failure_rate(pool):
+    test = KofN(1, "test")
+    test.add_item(0)
+    assert test.display(pool) == \
+                        "<1 of 1: test: 2.000000e-06: 'zero: 2.000000e-06'>"
+
+
+def test_KofN_graph(pool):
+    
+    test = KofN(2, "test")
+    test.add_item(0)
+    test.add_item(1)
+    dot = gv.Digraph()
+    handle = test.graph(pool, dot, levels=2)
+    
+    assert handle in dot.source
+    assert "2/2" in dot.source
+
+
+def test_KofN_str():
+    test = KofN(1, "test")
+    test.add_item(0)
+    assert "1 of 1" in str(test)
+
+
 def test_ReliabilityWrapper_get_failure_rate(wrapper):
     assert wrapper.get_failure_rate() == 4e-06
 
@@ -672,6 +782,129 @@ def test_ReliabilityWrapper_len(wrapper):
     assert len(wrapper) == 2
 
 
+@pytest.fixture
+def pool_mixed():
+    
+    comp_zero = Component("zero")
+    comp_zero.set_failure_rate(1)
+    
+    comp_one = Component("one")
+    comp_one.set_failure_rate(2)
+    
+    comp_two = Component("two")
+    comp_two.set_failure_rate(3)
+    
+    comp_three = Component("three")
+    
+    parallel = Parallel("parallel")
+    parallel.add_item(1)
+    parallel.add_item(2)
+    parallel.add_item(3)
+    
+    serial = Serial("array")
+    serial.add_item(0)
+    serial.add_item(4)
+    
+    pool = {0: comp_zero,
+            1: comp_one,
+            2: comp_two,
+            3: comp_three,
+            4: parallel,
+            "array": serial}
+    
+    return pool
+
+
+def test_evaluate_pool(pool_mixed):
+    
+    table = evaluate_pool(pool_mixed, time_hours=1000)
+    
+    assert set(table.keys()) == set(pool_mixed.keys())
+    
+    for key, link in pool_mixed.items():
+        
+        metrics = table[key]
+        
+        assert metrics.failure_rate == link.get_failure_rate(pool_mixed)
+        assert metrics.mttf == link.get_mttf(pool_mixed)
+        assert metrics.rpn == link.get_rpn(pool_mixed)
+        assert metrics.reliability == link.get_reliability(pool_mixed, 1000)
+
+
+def test_evaluate_pool_root(pool_mixed):
+    
+    table = evaluate_pool(pool_mixed, root=4)
+    
+    assert set(table.keys()) == set([1, 2, 3, 4])
+    assert table[3].failure_rate is None
+    assert table[4].reliability is None
+
+
+def test_RatedPool(pool_mixed):
+    
+    rated_pool = RatedPool(pool_mixed,
+                           {0: 4, 1: 4, 2: 4, 3: 4},
+                           {0: "noncritical"},
+                           "critical")
+    
+    assert len(rated_pool) == len(pool_mixed)
+    assert set(rated_pool) == set(pool_mixed)
+    assert 4 in rated_pool
+    assert rated_pool[3].get_failure_rate() == 4e-6
+    assert rated_pool[0].severity_level == "noncritical"
+    assert rated_pool[1].severity_level == "critical"
+    assert rated_pool["array"].severity_level == "critical"
+    assert pool_mixed[3].get_failure_rate() is None
+    
+    table = evaluate_pool(rated_pool)
+    
+    assert np.isclose(table[4].mttf, 1e6 * (1 + 1 / 2. + 1 / 3.) / 4)
+
+
+@pytest.mark.parametrize("link", [Component("comp", 3),
+                                  Serial("serial"),
+                                  KofN(2, "kofn")])
+def test_links_slots(link):
+    assert not hasattr(link, "__dict__")
+    with pytest.raises(AttributeError):
+        link.other = None
+
+
+def test_links_copy():
+    
+    test = KofN(2, "kofn")
+    test.add_item(0)
+    test.set_severity_level("noncritical")
+    result = copy(test)
+    
+    assert type(result) is KofN
+    assert result.k == 2
+    assert result.label == "kofn"
+    assert result.items is test.items
+    assert result.severity_level == "noncritical"
+
+
+@pytest.mark.parametrize("protocol", [0, pickle.HIGHEST_PROTOCOL])
+def test_links_pickle(protocol):
+    
+    component = Component("comp", 3)
+    component.set_failure_rate(2.)
+    test = KofN(2, "kofn")
+    test.add_item(0)
+    test.set_severity_level("noncritical")
+    
+    result_component, result = pickle.loads(pickle.dumps((component, test),
+                                                         protocol))
+    
+    assert type(result) is KofN
+    assert result.k == 2
+    assert result.label == "kofn"
+    assert result.items == [0]
+    assert result.severity_level == "noncritical"
+    assert result_component.marker == 3
+    assert result_component.get_failure_rate() == 2e-6
+
+
 def test_find_all_label_return_one_but_none(pool_array):
     
     with pytest.raises(RuntimeError) as excinfo:
@@ -687,3 +920,69 @@ def test_find_all_label_return_one_but_two(pool_array):
     
     assert "but 2 found" in str(excinfo.value)
 
+
+
+@pytest.fixture
+def pool_labels():
+    
+    # array -> [device001 -> [Pto -> [id1], Pto -> [id2]],
+    #           device002 -> [device -> [id1]]]
+    
+    pool = {0: Component("id1"),
+            1: Component("id2"),
+            2: Serial("Pto"),
+            3: Serial("Pto"),
+            4: Serial("device001"),
+            5: Component("id1"),
+            6: Serial("device"),
+            7: Serial("device002"),
+            "array": Serial("array")}
+    
+    pool[2].add_item(0)
+    pool[3].add_item(1)
+    pool[4].add_item(2)
+    pool[4].add_item(3)
+    pool[6].add_item(5)
+    pool[7].add_item(6)
+    pool["array"].add_item(4)
+    pool["array"].add_item(7)
+    
+    return pool
+
+
+def test_LabelIndex_find(pool_labels):
+    
+    label_index = LabelIndex(pool_labels)
+    
+    assert label_index.find("Pto") == [(["array", "device001", "Pto"], 2)]
+    assert label_index.find("id1") == [
+                                (["array", "device001", "Pto", "id1"], 0),
+                                (["array", "device002", "device", "id1"], 5)]
+    assert label_index.find("device") == [
+                                    (["array", "device002", "device"], 6)]
+    assert label_index.find("missing") == []
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("device", [4, 7]),
+    ("ce00", [4, 7]),
+    ("id", [0, 1, 5]),
+    ("P", [2]),
+    ("1", [4, 5]),
+    ("missing", [])])
+def test_LabelIndex_find_partial(pool_labels, label, expected):
+    
+    label_index = LabelIndex(pool_labels)
+    matches = label_index.find(label, partial_match=True)
+    
+    assert [x[1] for x in matches] == expected
+
+
+def test_find_all_labels_filter_label(pool_labels):
+    
+    labels, indexes = find_all_labels("id1",
+                                      pool_labels,
+                                      filter_label="device002")
+    
+    assert labels == [["array", "device002", "device", "id1"]]
+    assert indexes == [5]
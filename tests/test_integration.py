@@ -348,3 +348,110 @@ def test_no_subhubs():
     assert elec_metrics is not None
     assert mooring_metrics is None
     assert pto_metrics is None
+
+
+def test_full_network_session():
+    
+    dummydb = eval(open(os.path.join(DATA_DIR, 'dummydb.txt')).read())
+    dummyelechier = eval(open(os.path.join(DATA_DIR,
+                                           'dummyelechier.txt')).read())
+    dummyelecbom = eval(open(os.path.join(DATA_DIR,
+                                          'dummyelecbom.txt')).read())
+    dummymoorhier = eval(open(os.path.join(DATA_DIR,
+                                           'dummymoorhier.txt')).read())
+    dummymoorbom = eval(open(os.path.join(DATA_DIR,
+                                          'dummymoorbom.txt')).read())
+    
+    electrical_network = SubNetwork(dummyelechier, dummyelecbom)
+    moorings_network = SubNetwork(dummymoorhier, dummymoorbom)
+    
+    network = Network(dummydb,
+                      electrical_network,
+                      moorings_network)
+    
+    critical_network = network.set_failure_rates()
+    session = critical_network.start_session()
+    
+    # Every marker is updated in turn and the session is compared to a
+    # complete evaluation of the same failure rates
+    markers = sorted(set(critical_network.get_components()["Marker"]))
+    
+    for i, marker in enumerate(markers):
+        
+        session.update_component(marker, 1. + i % 7)
+        
+        if i % 5: continue
+        
+        test = session.get_systems_metrics(720)
+        expected = session.get_network().get_systems_metrics(720)
+        
+        assert test["RPN"] == expected["RPN"]
+        assert test["lambda"] == pytest.approx(expected["lambda"], rel=1e-12)
+        assert test["MTTF"] == pytest.approx(expected["MTTF"], rel=1e-12)
+
+
+def test_full_network_redundancy():
+    
+    dummydb = eval(open(os.path.join(DATA_DIR, 'dummydb.txt')).read())
+    dummymoorhier = eval(open(os.path.join(DATA_DIR,
+                                           'dummymoorhier.txt')).read())
+    
+    def get_mttfs(k):
+        
+        dummymoorbom = eval(open(os.path.join(DATA_DIR,
+                                              'dummymoorbom.txt')).read())
+        
+        if k is not None:
+            for node, systems in dummymoorbom.items():
+                if 'Mooring system' not in systems: continue
+                systems['Mooring system']['redundancy'] = k
+        
+        network = Network(dummydb,
+                          moorings_network=SubNetwork(dummymoorhier,
+                                                      dummymoorbom))
+        critical_network = network.set_failure_rates()
+        metrics = critical_network.get_subsystem_metrics('Station keeping',
+                                                         8760)
+        
+        if k is not None:
+            assert "<{} of 4:".format(k) in critical_network.display()
+        
+        return metrics["MTTF"]
+    
+    expected = get_mttfs(None)
+    
+    assert get_mttfs(1) == pytest.approx(expected, rel=1e-12)
+    
+    for lower, higher in zip(get_mttfs(3), get_mttfs(2)):
+        assert lower < higher
+
+
+def test_full_network_scenarios():
+    
+    dummydb = eval(open(os.path.join(DATA_DIR, 'dummydb.txt')).read())
+    dummyelechier = eval(open(os.path.join(DATA_DIR,
+                                           'dummyelechier.txt')).read())
+    dummyelecbom = eval(open(os.path.join(DATA_DIR,
+                                          'dummyelecbom.txt')).read())
+    dummymoorhier = eval(open(os.path.join(DATA_DIR,
+                                           'dummymoorhier.txt')).read())
+    dummymoorbom = eval(open(os.path.join(DATA_DIR,
+                                          'dummymoorbom.txt')).read())
+    
+    electrical_network = SubNetwork(dummyelechier, dummyelecbom)
+    moorings_network = SubNetwork(dummymoorhier, dummymoorbom)
+    
+    network = Network(dummydb,
+                      electrical_network,
+                      moorings_network)
+    
+    scenarios = network.evaluate_scenarios(720)
+    
+    for (severitylevel, calcscenario), test in scenarios.items():
+        
+        rated = network.set_failure_rates(severitylevel, calcscenario)
+        expected = rated.get_systems_metrics(720)
+        
+        assert test["RPN"] == expected["RPN"]
+        assert test["lambda"] == pytest.approx(expected["lambda"], rel=1e-12)
+        assert test["MTTF"] == pytest.approx(expected["MTTF"], rel=1e-12)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# pylint: disable=redefined-outer-name,protected-access,eval-used
+
+import os
+from collections import Counter
+
+import pytest
+
+from dtocean_reliability import SubNetwork
+from dtocean_reliability.load import (convert,
+                                      dump_json,
+                                      load,
+                                      load_json,
+                                      load_network,
+                                      parse_literal)
+
+THIS_DIR = os.path.dirname(os.path.realpath(__file__))
+DATA_DIR = os.path.join(THIS_DIR, "..", "example_data")
+DATA_FILES = sorted(x for x in os.listdir(DATA_DIR) if x.endswith(".txt"))
+
+
+def _get_types(obj):
+    
+    # The values of obj, replaced by their types, for checking that loaded
+    # data is identical and not just equal
+    
+    if isinstance(obj, dict):
+        return (type(obj), sorted((_get_types(key), _get_types(value))
+                                            for key, value in obj.iteritems()))
+    
+    if isinstance(obj, (list, tuple)):
+        return (type(obj), [_get_types(x) for x in obj])
+    
+    return (type(obj), obj)
+
+
+@pytest.mark.parametrize("file_name", DATA_FILES)
+def test_load(file_name):
+    
+    path = os.path.join(DATA_DIR, file_name)
+    expected = eval(open(path).read())
+    test = load(path)
+    
+    assert test == expected
+    assert _get_types(test) == _get_types(expected)
+
+
+@pytest.mark.parametrize("file_name", DATA_FILES)
+def test_convert(tmpdir, file_name):
+    
+    path = os.path.join(DATA_DIR, file_name)
+    json_path = convert(path, str(tmpdir.join("data.json")))
+    
+    expected = load(path)
+    test = load(json_path)
+    
+    assert test == expected
+    assert _get_types(test) == _get_types(expected)
+
+
+def test_convert_default_path(tmpdir):
+    
+    path = tmpdir.join("data.txt")
+    path.write("[1, 2]")
+    
+    json_path = convert(str(path))
+    
+    assert json_path == str(tmpdir.join("data.json"))
+    assert load(json_path) == [1, 2]
+
+
+def test_load_network():
+    
+    test = load_network(os.path.join(DATA_DIR, 'dummyelechier.txt'),
+                        os.path.join(DATA_DIR, 'dummyelecbom.txt'))
+    
+    assert isinstance(test, SubNetwork)
+    assert test.hierarchy == load(os.path.join(DATA_DIR, 'dummyelechier.txt'))
+    assert isinstance(
+            test.bill_of_materials['array']['Export cable']['quantity'],
+            Counter)
+
+
+@pytest.mark.parametrize("text", [
+    "(1)",
+    "(1,)",
+    "()",
+    "1, 2",
+    "[1, 2,]",
+    "{}",
+    "{(1, 'a'): [2.5e3, -3, None], 'b': True}",
+    "'a\\nb' # comment",
+    "u'\\xe9'",
+    "Counter()",
+    "Counter(['a', 'a', 'b'])",
+    "Counter({'id1': 2,\n         'id2': 1})",
+])
+def test_parse_literal(text):
+    
+    test = parse_literal(text.splitlines(True))
+    expected = eval(text)
+    
+    assert test == expected
+    assert _get_types(test) == _get_types(expected)
+
+
+@pytest.mark.parametrize("text", [
+    "__import__('os').system('ls')",
+    "Counter.__init__",
+    "[1 2]",
+    "{1}",
+    "{1: }",
+    "[1, 2)",
+    "1 + 2",
+    "{[1]: 2}",
+    "Counter(1, 2)",
+    "x",
+    "[1,",
+    "",
+])
+def test_parse_literal_invalid(text):
+    
+    with pytest.raises(ValueError):
+        parse_literal(text.splitlines(True))
+
+
+def test_parse_literal_error_position():
+    
+    with pytest.raises(ValueError) as excinfo:
+        parse_literal(["{'a': [1,\n", "        2 3]}"], "test.txt")
+    
+    assert "'test.txt' at line 2, column 11" in str(excinfo)
+
+
+def test_dump_json(tmpdir):
+    
+    data = {'__counter__': (1, 'a'),
+            u'\xe9': Counter({1: 2, 'b': 1}),
+            'c': {2: [u'\xe9', 'd']}}
+    path = str(tmpdir.join("data.json"))
+    
+    dump_json(data, path)
+    test = load_json(path)
+    
+    assert test == data
+    assert _get_types(test) == _get_types(data)
+
+
+@pytest.mark.parametrize("data", [
+    {u'a': u'abc'},
+    {'a': [u'abc', 'abc', (u'b',)], u'__unicode__': '\xc3\xa9'},
+    [u'\xe9', '\xc3\xa9', u'']])
+def test_dump_json_unicode(tmpdir, data):
+    
+    path = str(tmpdir.join("data.json"))
+    
+    dump_json(data, path)
+    test = load_json(path)
+    
+    assert test == data
+    assert _get_types(test) == _get_types(data)
+
+
+def test_dump_json_error(tmpdir):
+    
+    path = str(tmpdir.join("data.json"))
+    
+    with pytest.raises(TypeError):
+        dump_json({'a': object()}, path)
+    
+    assert not tmpdir.listdir()
+
+
+def test_load_json_not_data(tmpdir):
+    
+    path = tmpdir.join("data.json")
+    path.write('{"data": [1, 2]}')
+    
+    with pytest.raises(ValueError) as excinfo:
+        load_json(str(path))
+    
+    assert "is not a dtocean-reliability JSON file" in str(excinfo)
@@ -17,11 +17,13 @@
 
 # pylint: disable=redefined-outer-name
 
+import cPickle as pickle
 from collections import Counter # Required for eval of text files
 
 import numpy as np
 import pytest
 
+import dtocean_reliability.plan
 from dtocean_reliability.main import Network
 from dtocean_reliability.parse import SubNetwork
 
@@ -54,6 +56,20 @@ def database_partial():
                     }}
 
 
+@pytest.fixture(scope="module")
+def database_gaps():
+    
+    return {'id1': {'item10': {'failratecrit': [4, 5, 6],
+                               'failratenoncrit': [1, 2, 3]},
+                    },
+            'id2': {'item10': {'failratecrit': [1, 0, 0],
+                               'failratenoncrit': [0, 0, 0]},
+                    },
+            'id3': {'item10': {'failratecrit': [4, 5, 6],
+                               'failratenoncrit': [1, 2, 3]},
+                    }}
+
+
 @pytest.fixture(scope="module")
 def database_empty():
     
@@ -252,6 +268,341 @@ def test_network_display(database, electrical_network):
     assert test
 
 
+@pytest.mark.parametrize("protocol", [0, pickle.HIGHEST_PROTOCOL])
+def test_network_pickle(database, electrical_network, protocol):
+    
+    network = Network(database, electrical_network).set_failure_rates()
+    test = pickle.loads(pickle.dumps(network, protocol))
+    
+    assert test.display() == network.display()
+    assert test.get_systems_metrics(720) == network.get_systems_metrics(720)
+
+
 def test_network_len(database, electrical_network):
     network = Network(database, electrical_network)
     assert network
+
+
+def test_network_evaluate(database, electrical_network):
+    
+    network = Network(database, electrical_network)
+    network.set_failure_rates(inplace=True)
+    
+    table = network.evaluate(8760)
+    systems_metrics = network.get_systems_metrics(8760)
+    
+    assert network.evaluate(8760) is table
+    assert set(table.keys()) == set(network._pool.keys())
+    
+    for idx, failure_rate in zip(systems_metrics["Link"],
+                                 systems_metrics["lambda"]):
+        assert table[idx].failure_rate == failure_rate
+
+
+def test_network_evaluate_time_array(database, electrical_network):
+    
+    network = Network(database, electrical_network)
+    network.set_failure_rates(inplace=True)
+    
+    time_hours = np.array([720., 8760.])
+    network.evaluate(8760)
+    table = network.evaluate(time_hours)
+    expected = [network.evaluate(x) for x in time_hours]
+    
+    assert network.evaluate(time_hours) is not table
+    
+    for key, metrics in table.items():
+        assert metrics.reliability.tolist() == [x[key].reliability
+                                                            for x in expected]
+
+
+def test_network_evaluate_reset(database, electrical_network):
+    
+    network = Network(database, electrical_network)
+    network.set_failure_rates(calcscenario="lower", inplace=True)
+    table = network.evaluate()
+    
+    network.set_failure_rates(calcscenario="upper", inplace=True)
+    
+    assert network.evaluate() is not table
+    assert np.isclose(network.evaluate()["array"].failure_rate, 3 * 6 / 1e6)
+
+
+def test_network_get_components(database, electrical_network):
+    
+    network = Network(database, electrical_network)
+    test = network.get_components()
+    
+    assert sorted(test["Component"]) == ["id1", "id2", "id3"]
+    assert sorted(test["Marker"]) == [0, 1, 2]
+    assert len(test["Link"]) == 3
+
+
+@pytest.mark.parametrize("severitylevel", ['critical', 'noncritical'])
+def test_network_evaluate_batch(database, electrical_network, severitylevel):
+    
+    network = Network(database, electrical_network)
+    components = network.get_components()
+    
+    rates_matrix = []
+    expected = []
+    
+    for calcscenario, idx in (('lower', 0), ('mean', 1), ('upper', 2)):
+        
+        if severitylevel == 'critical':
+            key = 'failratecrit'
+        else:
+            key = 'failratenoncrit'
+        
+        rates = [database[x]['item10'][key][idx]
+                                        for x in components["Component"]]
+        rates_matrix.append(rates)
+        
+        network.set_failure_rates(severitylevel=severitylevel,
+                                  calcscenario=calcscenario,
+                                  inplace=True)
+        expected.append(network.get_systems_metrics())
+    
+    test = network.evaluate_batch(np.array(rates_matrix))
+    
+    assert test["Link"] == expected[0]["Link"]
+    assert test["System"] == expected[0]["System"]
+    assert test["lambda"].shape == (3, len(test["System"]))
+    
+    for i, metrics in enumerate(expected):
+        assert np.allclose(test["lambda"][i], metrics["lambda"], rtol=1e-12)
+        assert np.allclose(test["MTTF"][i], metrics["MTTF"], rtol=1e-12)
+        assert (test["RPN"][i] == metrics["RPN"]).all()
+
+
+@pytest.mark.parametrize("k_factors", [None, {0: 2, 2: 3}])
+def test_network_evaluate_scenarios(database_partial,
+                                    electrical_network,
+                                    k_factors):
+    
+    network = Network(database_partial, electrical_network)
+    test = network.evaluate_scenarios(720, k_factors=k_factors)
+    
+    assert len(test) == 6
+    
+    for (severitylevel, calcscenario), metrics in test.items():
+        
+        rated = network.set_failure_rates(severitylevel,
+                                          calcscenario,
+                                          k_factors)
+        expected = rated.get_systems_metrics(720)
+        
+        assert metrics.keys() == expected.keys()
+        assert metrics["System"] == expected["System"]
+        assert metrics["lambda"] == pytest.approx(expected["lambda"],
+                                                  rel=1e-12)
+        assert metrics["MTTF"] == pytest.approx(expected["MTTF"], rel=1e-12)
+        assert metrics["RPN"] == expected["RPN"]
+        assert metrics["R (720 hours)"] == pytest.approx(
+                                                expected["R (720 hours)"],
+                                                rel=1e-12)
+
+
+def test_network_evaluate_scenarios_empty(database_empty,
+                                          electrical_network):
+    
+    network = Network(database_empty, electrical_network)
+    
+    with pytest.raises(RuntimeError):
+        network.evaluate_scenarios()
+
+
+def test_network_evaluate_scenarios_gaps(database_gaps,
+                                         electrical_network):
+    
+    network = Network(database_gaps, electrical_network)
+    
+    with pytest.raises(RuntimeError):
+        network.set_failure_rates('critical', 'upper')
+    
+    with pytest.raises(RuntimeError) as excinfo:
+        network.evaluate_scenarios()
+    
+    assert "'id2'" in str(excinfo.value)
+
+
+def test_network_evaluate_batch_chunks(database, electrical_network):
+    
+    network = Network(database, electrical_network)
+    rates_matrix = np.random.uniform(1, 10, (1000, 3))
+    
+    test = network.evaluate_batch(rates_matrix)
+    
+    assert test["lambda"].shape == (1000, 2)
+    assert np.allclose(test["lambda"][:, 0], rates_matrix.sum(axis=1) / 1e6)
+
+
+def test_network_evaluate_batch_chunk_size(monkeypatch,
+                                           database,
+                                           electrical_network):
+    
+    network = Network(database, electrical_network)
+    rates_matrix = np.random.uniform(1, 10, (50, 3))
+    expected = network.evaluate_batch(rates_matrix)
+    
+    monkeypatch.setattr(dtocean_reliability.plan, "_MAX_CHUNK_ELEMENTS", 1)
+    test = network.evaluate_batch(rates_matrix)
+    
+    assert test["lambda"].shape == (50, 2)
+    assert test["MTTF"].shape == (50, 2)
+    np.testing.assert_allclose(test["lambda"], expected["lambda"], rtol=1e-12)
+    np.testing.assert_allclose(test["MTTF"], expected["MTTF"], rtol=1e-12)
+
+
+def test_network_set_failure_rates_shared_pool(database, electrical_network):
+    
+    network = Network(database, electrical_network)
+    lower = network.set_failure_rates(calcscenario="lower")
+    upper = network.set_failure_rates(calcscenario="upper")
+    
+    assert lower._pool is network._pool
+    assert upper._pool is network._pool
+    assert network.get_systems_metrics() is None
+    assert np.isclose(lower.get_systems_metrics()['lambda'][0], 3 * 4 / 1e6)
+    assert np.isclose(upper.get_systems_metrics()['lambda'][0], 3 * 6 / 1e6)
+
+
+def test_network_getitem(database, electrical_network):
+    
+    network = Network(database, electrical_network)
+    critical = network.set_failure_rates()
+    
+    test = critical["array"]
+    
+    assert np.isclose(test.get_failure_rate(), 3 * 5 / 1e6)
+    assert "e-06" in test.display()
+    assert "e-06" not in network["array"].display()
+
+
+def test_network_getitem_reliability_array(database, electrical_network):
+    
+    network = Network(database, electrical_network)
+    test = network.set_failure_rates()["array"]
+    hours = np.array([168, 336, 504])
+    
+    expected = [test.get_reliability(x) for x in hours]
+    
+    assert np.allclose(test.get_reliability(hours), expected)
+
+
+def test_network_get_reliability_curves(database, electrical_network):
+    
+    network = Network(database, electrical_network)
+    critical = network.set_failure_rates()
+    times = [0, 720, 8760]
+    
+    test = critical.get_reliability_curves(times)
+    
+    assert test.shape == (2, 3)
+    
+    for i, time_hours in enumerate(times):
+        metrics = critical.get_systems_metrics(time_hours)
+        key = "R ({} hours)".format(time_hours)
+        assert np.allclose(test[:, i], metrics[key])
+
+
+def test_network_get_reliability_curves_unset(database, electrical_network):
+    
+    network = Network(database, electrical_network)
+    test = network.get_reliability_curves([0, 720])
+    
+    assert test.shape == (2, 2)
+    assert np.isnan(test).all()
+
+
+def test_network_get_reliability_curves_exact(database, electrical_network):
+    
+    # The electrical network contains only serial links, so the exact
+    # reliability matches the constant failure rate form
+    
+    network = Network(database, electrical_network)
+    critical = network.set_failure_rates()
+    times = np.linspace(0, 8760, 5)
+    
+    test = critical.get_reliability_curves(times, exact=True)
+    expected = critical.get_reliability_curves(times)
+    
+    assert test.shape == (2, 5)
+    assert np.allclose(test, expected)
+
+
+def test_network_start_session(database, electrical_network):
+    
+    network = Network(database, electrical_network).set_failure_rates()
+    session = network.start_session()
+    
+    assert session.get_systems_metrics(720) == \
+                                            network.get_systems_metrics(720)
+
+
+def test_EvaluationSession_update_component(database, electrical_network):
+    
+    network = Network(database, electrical_network).set_failure_rates()
+    session = network.start_session()
+    session.update_component(2, 10)
+    
+    test = session.get_systems_metrics()
+    
+    assert np.isclose(test["lambda"][0], (5 + 5 + 10) / 1e6)
+    assert np.isclose(test["lambda"][1], 10 / 1e6)
+    assert np.isclose(session.get_link_metrics("array").failure_rate,
+                      (5 + 5 + 10) / 1e6)
+    assert np.isclose(network.get_systems_metrics()["lambda"][0],
+                      3 * 5 / 1e6)
+
+
+def test_EvaluationSession_update_component_zero(database,
+                                                 electrical_network):
+    
+    network = Network(database, electrical_network).set_failure_rates()
+    session = network.start_session()
+    session.update_component(2, 0.)
+    
+    expected = Network(database, electrical_network).set_failure_rates(
+                                                            k_factors={2: 0.})
+    
+    test = session.get_systems_metrics()
+    
+    assert test == expected.get_systems_metrics()
+    assert np.isinf(test["MTTF"][1])
+
+
+def test_EvaluationSession_update_component_none(database,
+                                                 electrical_network):
+    
+    network = Network(database, electrical_network).set_failure_rates()
+    session = network.start_session()
+    
+    for marker in (0, 1, 2):
+        session.update_component(marker, None)
+    
+    assert session.get_systems_metrics() is None
+
+
+def test_EvaluationSession_update_component_missing(database,
+                                                    electrical_network):
+    
+    network = Network(database, electrical_network)
+    session = network.start_session()
+    
+    with pytest.raises(ValueError) as excinfo:
+        session.update_component(99, 1)
+    
+    assert "marker '99' not found" in str(excinfo.value)
+
+
+def test_EvaluationSession_get_network(database, electrical_network):
+    
+    network = Network(database, electrical_network).set_failure_rates()
+    session = network.start_session()
+    session.update_component(2, 10)
+    
+    test = session.get_network()
+    
+    assert test.get_systems_metrics() == session.get_systems_metrics()
+    assert test._pool is network._pool
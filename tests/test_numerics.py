@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from dtocean_reliability.numerics import (binomial,
+                                          kofn_mttf,
+                                          kofn_mttf_reduceat,
+                                          kofn_survival,
+                                          lru_memo,
+                                          parallel_mttf,
+                                          parallel_mttf_reduceat,
+                                          reliability,
+                                          rpn,
+                                          _group_failure_rates)
+
+
+@pytest.mark.parametrize("n", range(1, 13))
+def test_parallel_mttf_binomial(n):
+    
+    # binomial carries an additional term of order lambda (in hours), so
+    # the results only match to the relative precision of lambda ** 2
+    
+    rng = random.Random(n)
+    
+    for _ in range(5):
+        frpara = [rng.uniform(1e-3, 1e2) / 1e6 for _ in range(n)]
+        assert np.isclose(parallel_mttf(frpara), binomial(frpara), rtol=1e-7)
+
+
+@pytest.mark.parametrize("n", range(1, 13))
+def test_parallel_mttf_identical(n):
+    
+    failure_rate = 2e-6
+    expected = sum(1. / i for i in range(1, n + 1)) / failure_rate
+    
+    assert np.isclose(parallel_mttf([failure_rate] * n),
+                      expected,
+                      rtol=1e-12)
+
+
+@pytest.mark.parametrize("counts", [(5, 4), (1, 2, 3), (8, 1, 1, 1)])
+def test_parallel_mttf_grouped(counts):
+    
+    frpara = []
+    
+    for i, count in enumerate(counts):
+        frpara.extend([(i + 1) * 1e-6] * count)
+    
+    random.Random(len(frpara)).shuffle(frpara)
+    
+    assert np.isclose(parallel_mttf(frpara), binomial(frpara), rtol=1e-7)
+    assert np.isclose(parallel_mttf(np.array([frpara]))[0],
+                      parallel_mttf(frpara),
+                      rtol=1e-12)
+
+
+@pytest.mark.parametrize("size", [4, 12])
+def test_parallel_mttf_array_identical(size):
+    
+    failure_rates = np.full((3, size), 2e-6)
+    failure_rates[1, :2] = np.nan
+    failure_rates[2, :] = np.nan
+    
+    test = parallel_mttf(failure_rates)
+    
+    assert np.isclose(test[0],
+                      sum(1. / i for i in range(1, size + 1)) / 2e-6,
+                      rtol=1e-12)
+    assert np.isclose(test[1],
+                      sum(1. / i for i in range(1, size - 1)) / 2e-6,
+                      rtol=1e-12)
+    assert np.isnan(test[2])
+
+
+def test_group_failure_rates():
+    
+    failure_rates = np.array([[2., 1., 2., np.nan, 1.],
+                              [3., 3., 3., 3., 3.]])
+    distinct, counts = _group_failure_rates(failure_rates)
+    
+    assert distinct.shape == (2, 3)
+    assert list(distinct[0, :2]) == [1., 2.]
+    assert list(counts[0]) == [2., 2., 0.]
+    assert distinct[1, 0] == 3.
+    assert list(counts[1]) == [5., 0., 0.]
+
+
+def test_parallel_mttf_ideal():
+    assert parallel_mttf([1e-6, 0.]) == float("inf")
+
+
+def test_parallel_mttf_large():
+    
+    frpara = [1e-6 * (i + 1) for i in range(100)]
+    result = parallel_mttf(frpara)
+    
+    assert np.isfinite(result)
+    assert result > 1e6
+
+
+def test_parallel_mttf_memo():
+    
+    parallel_mttf.cache_clear()
+    
+    expected = parallel_mttf([1e-6, 2e-6, 3e-6])
+    test = parallel_mttf(np.array([3e-6, 1e-6, 2e-6]))
+    info = parallel_mttf.cache_info()
+    
+    assert test == expected
+    assert info.hits == 1
+    assert info.misses == 1
+    assert info.currsize == 1
+
+
+def test_lru_memo():
+    
+    calls = []
+    
+    @lru_memo(maxsize=2)
+    def double(x):
+        calls.append(x)
+        return 2 * x
+    
+    assert [double(x) for x in (1, 2, 1, 3, 2, 1)] == [2, 4, 2, 6, 4, 2]
+    assert calls == [1, 2, 3, 2, 1]
+    assert double.cache_info() == (1, 5, 2, 2)
+    
+    double.cache_clear()
+    
+    assert double.cache_info() == (0, 0, 2, 0)
+
+
+@pytest.mark.parametrize("n", [1, 2, 4, 6, 7, 10])
+def test_parallel_mttf_reduceat(n):
+    
+    rng = np.random.RandomState(n)
+    failure_rates = rng.uniform(1e-3, 1e2, (20, n)) / 1e6
+    failure_rates[rng.rand(20, n) < 0.2] = np.nan
+    failure_rates[0, :] = np.nan
+    failure_rates[1, 0] = 0.
+    
+    offsets = np.arange(0, 20 * n, n)
+    test = parallel_mttf_reduceat(failure_rates.reshape(1, -1), offsets)[0]
+    
+    assert np.isnan(test[0])
+    assert test[1] == float("inf")
+    
+    for frpara, result in zip(failure_rates[2:], test[2:]):
+        
+        frpara = frpara[~np.isnan(frpara)]
+        
+        if not frpara.size:
+            assert np.isnan(result)
+            continue
+        
+        assert np.isclose(result, parallel_mttf(frpara), rtol=1e-12, atol=0)
+
+
+def test_parallel_mttf_reduceat_mixed_sizes():
+    
+    failure_rates = [[1e-6, 2e-6, 3e-6, 5e-6, 1e-6, 1e-6, 1e-6, 1e-6, 1e-6,
+                      1e-6, 1e-6, 1e-6]]
+    test = parallel_mttf_reduceat(failure_rates, [0, 3, 4])
+    
+    assert np.isclose(test[0, 0], parallel_mttf([1e-6, 2e-6, 3e-6]))
+    assert np.isclose(test[0, 1], 2e5)
+    assert np.isclose(test[0, 2], parallel_mttf([1e-6] * 8))
+
+
+@pytest.mark.parametrize("size", [3, 9])
+def test_parallel_mttf_array(size):
+    
+    random.seed(size)
+    failure_rates = np.array([[random.uniform(1e-6, 1e-4)
+                                    for _ in range(size)] for _ in range(3)])
+    failure_rates[1, 0] = np.nan
+    failure_rates[2, 1] = 0.
+    
+    test = parallel_mttf(failure_rates)
+    
+    assert test.shape == (3,)
+    assert np.isclose(test[0], parallel_mttf(list(failure_rates[0])))
+    assert np.isclose(test[1], parallel_mttf(list(failure_rates[1, 1:])))
+    assert test[2] == np.inf
+
+
+def _kofn_mttf_exact(frpara, k):
+    
+    # Integrate the probability that a set of at least k items survive
+    # while the rest fail, expanding each failure probability into
+    # exponentials
+    
+    n = len(frpara)
+    result = 0.
+    
+    for survivors in range(1 << n):
+        
+        if bin(survivors).count("1") < k: continue
+        
+        others = [i for i in range(n) if not survivors >> i & 1]
+        survivor_rate = sum(frpara[i] for i in range(n) if survivors >> i & 1)
+        
+        for failed in range(1 << len(others)):
+            
+            sign = (-1) ** bin(failed).count("1")
+            rate = survivor_rate + sum(frpara[others[i]]
+                                       for i in range(len(others))
+                                                       if failed >> i & 1)
+            result += sign / rate
+    
+    return result
+
+
+@pytest.mark.parametrize("n", range(1, 7))
+def test_kofn_mttf_exact(n):
+    
+    rng = random.Random(n)
+    frpara = [rng.uniform(1e-1, 1e1) / 1e6 for _ in range(n)]
+    
+    for k in range(1, n + 1):
+        assert np.isclose(kofn_mttf(frpara, k),
+                          _kofn_mttf_exact(frpara, k),
+                          rtol=1e-10)
+
+
+def test_kofn_mttf_limits():
+    
+    frpara = [1e-6, 2e-6, 3e-6, 5e-6]
+    
+    assert np.isclose(kofn_mttf(frpara, 1), parallel_mttf(frpara),
+                      rtol=1e-12)
+    assert np.isclose(kofn_mttf(frpara, 4), 1. / sum(frpara), rtol=1e-12)
+
+
+@pytest.mark.parametrize("n, k", [(4, 3), (10, 1), (10, 7)])
+def test_kofn_mttf_identical(n, k):
+    
+    failure_rate = 2e-6
+    expected = sum(1. / i for i in range(k, n + 1)) / failure_rate
+    
+    assert np.isclose(kofn_mttf([failure_rate] * n, k), expected, rtol=1e-12)
+
+
+def test_kofn_mttf_ideal():
+    
+    assert kofn_mttf([1e-6, 0., 0.], 2) == float("inf")
+    assert np.isclose(kofn_mttf([1e-6, 2e-6, 0.], 2),
+                      parallel_mttf([1e-6, 2e-6]),
+                      rtol=1e-12)
+
+
+def test_kofn_mttf_array():
+    
+    failure_rates = np.array([[1e-6, 2e-6, 3e-6, 5e-6],
+                              [1e-6, 2e-6, np.nan, 5e-6],
+                              [2e-6, 2e-6, 2e-6, 2e-6],
+                              [1e-6, 0., 0., 5e-6],
+                              [np.nan] * 4])
+    test = kofn_mttf(failure_rates, 3)
+    
+    assert np.isclose(test[0], kofn_mttf(failure_rates[0], 3), rtol=1e-12)
+    assert np.isclose(test[1], 1. / 8e-6, rtol=1e-12)
+    assert np.isclose(test[2], (1. / 3 + 1. / 4) / 2e-6, rtol=1e-12)
+    assert np.isclose(test[3], parallel_mttf([1e-6, 5e-6]), rtol=1e-12)
+    assert np.isnan(test[4])
+
+
+def test_kofn_mttf_reduceat():
+    
+    failure_rates = [[1e-6, 2e-6, 3e-6, 5e-6, 1e-6, 3e-6, 4e-6]]
+    test = kofn_mttf_reduceat(failure_rates, [0, 4], [2, 3])
+    
+    assert np.isclose(test[0, 0], kofn_mttf(failure_rates[0][:4], 2),
+                      rtol=1e-12)
+    assert np.isclose(test[0, 1], 1. / 8e-6, rtol=1e-12)
+
+
+def test_kofn_survival():
+    
+    survival = np.array([[0.9, 0.8, 0.7],
+                         [0.9, np.nan, 0.7]])
+    test = kofn_survival(survival, [2, 3])
+    
+    expected = (0.9 * 0.8 * 0.7 + 0.1 * 0.8 * 0.7 + 0.9 * 0.2 * 0.7 +
+                                                        0.9 * 0.8 * 0.3)
+    
+    assert np.isclose(test[0], expected)
+    assert np.isclose(test[1], 0.9 * 0.7)
+
+
+def test_reliability():
+    
+    test = reliability(1e-4, 1000)
+    
+    assert isinstance(test, float)
+    assert test == math.exp(-0.1)
+
+
+def test_reliability_broadcast():
+    
+    failure_rates = np.array([[1e-4], [2e-4]])
+    times = np.array([0, 1000, 2000])
+    test = reliability(failure_rates, times)
+    
+    assert test.shape == (2, 3)
+    assert np.allclose(test, np.exp(-failure_rates * times))
+
+
+@pytest.mark.parametrize("failure_rate, severitylevel, expected", [
+    (1e-9, 'critical', 0),
+    (1e-6, 'critical', 4),
+    (1e-6, 'noncritical', 2),
+    (1e-3, 'critical', 10),
+])
+def test_rpn(failure_rate, severitylevel, expected):
+    
+    test = rpn(failure_rate, severitylevel)
+    
+    assert isinstance(test, int)
+    assert test == expected
+
+
+def test_rpn_array():
+    
+    failure_rates = np.array([[1e-9, 1e-6, np.nan],
+                              [1e-9, 1e-6, 1e-3]])
+    severitylevels = [['critical'] * 3,
+                      ['noncritical'] * 3]
+    test = rpn(failure_rates, severitylevels)
+    
+    np.testing.assert_array_equal(test, [[0, 4, np.nan], [0, 2, 5]])
+
+
+def test_rpn_unknown_severity():
+    
+    with pytest.raises(ValueError) as excinfo:
+        rpn(1e-6, 'unknown')
+    
+    assert "not recognised" in str(excinfo.value)
@@ -15,10 +15,18 @@
 #    You should have received a copy of the GNU General Public License
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from collections import Counter
+from copy import deepcopy
 
 import pytest
 
-from dtocean_reliability.parse import SubNetwork, check_nodes
+from dtocean_reliability.graph import KofN, Serial
+from dtocean_reliability.parse import (SubNetwork,
+                                       build_pool,
+                                       check_nodes,
+                                       combine_networks,
+                                       complete_networks,
+                                       mark_networks)
 
 
 def test_check_nodes_unique():
@@ -34,3 +42,196 @@ def test_check_nodes_unique():
     
     assert "Unique nodes detected" in str(excinfo.value)
     assert "device002" in str(excinfo.value)
+
+
+@pytest.fixture
+def networks():
+    
+    elec_hierarchy = {'array': {'Export cable': [['id1']],
+                                'Substation': ['id2'],
+                                'layout': [['device001']]},
+                      'device001': {'Elec sub-system': ['id3']}}
+    elec_bom = {'array': {'Export cable': {'marker': [[0]],
+                                           'quantity': Counter({'id1': 1})},
+                          'Substation': {'marker': [1],
+                                         'quantity': Counter({'id2': 1})}},
+                'device001': {'marker': [2],
+                              'quantity': Counter({'id3': 1})}}
+    moor_hierarchy = {'array': {'Substation foundation': ['id4']},
+                      'device001': {'Foundation': [['id4']],
+                                    'Umbilical': ['id5'],
+                                    'Mooring system': [['id6']]}}
+    moor_bom = {'array': {'Substation foundation':
+                                          {'marker': [3],
+                                           'quantity': Counter({'id4': 1})}},
+                'device001': {'Foundation': {'marker': [[4]],
+                                             'quantity': Counter({'id4': 1})},
+                              'Umbilical': {'marker': [5],
+                                            'quantity': Counter({'id5': 1})},
+                              'Mooring system':
+                                          {'marker': [[6]],
+                                           'quantity': Counter({'id6': 1})}}}
+    user_hierarchy = {'device001': {'Pto': ['id7']}}
+    user_bom = {'device001': {'Pto': {'quantity': Counter({'id7': 1})}}}
+    
+    return (SubNetwork(elec_hierarchy, elec_bom),
+            SubNetwork(moor_hierarchy, moor_bom),
+            SubNetwork(user_hierarchy, user_bom))
+
+
+def test_mark_networks(networks):
+    
+    electrical_network = networks[0]
+    hierarchy = deepcopy(electrical_network.hierarchy)
+    
+    marked_hierarchy, = mark_networks(electrical_network)
+    export_cable = marked_hierarchy['array']['Export cable']
+    
+    assert electrical_network.hierarchy == hierarchy
+    assert export_cable.ids is electrical_network.hierarchy['array'][
+                                                            'Export cable']
+    assert export_cable.markers == [[0]]
+    assert marked_hierarchy['array']['layout'] == [['device001']]
+    assert marked_hierarchy['device001']['Elec sub-system'].markers == [2]
+
+
+def test_combine_networks_inputs_unchanged(networks):
+    
+    expected = deepcopy([(x.hierarchy, x.bill_of_materials)
+                                                        for x in networks])
+    
+    completed = complete_networks(*networks)
+    array_hierarchy, device_hierarchy = combine_networks(*completed)
+    build_pool(array_hierarchy, device_hierarchy)
+    
+    result = [(x.hierarchy, x.bill_of_materials) for x in networks]
+    substation = array_hierarchy['array']['Substation']
+    
+    assert result == expected
+    assert substation.ids == ['id2', 'id4']
+    assert substation.markers == [1, 3]
+    assert 'array' in completed[2].hierarchy
+    assert 'array' not in networks[2].hierarchy
+
+
+def test_build_pool_empty_system():
+    
+    elec_hierarchy = {'array': {'Export cable': [['id1']],
+                                'Substation': ['id2'],
+                                'layout': [['device001']]},
+                      'device001': {'Elec sub-system': ['id3']}}
+    elec_bom = {'array': {'Export cable': {'marker': [[0]],
+                                           'quantity': Counter({'id1': 1})},
+                          'Substation': {'marker': [1],
+                                         'quantity': Counter({'id2': 1})}},
+                'device001': {'marker': [2],
+                              'quantity': Counter({'id3': 1})}}
+    user_hierarchy = {'array': {},
+                      'device001': {'Pto': ['n/a']}}
+    user_bom = {'array': {},
+                'device001': {'Pto': {'quantity': Counter({'n/a': 1})}}}
+    
+    networks = complete_networks(SubNetwork(elec_hierarchy, elec_bom),
+                                 None,
+                                 SubNetwork(user_hierarchy, user_bom))
+    array_hierarchy, device_hierarchy = combine_networks(*networks)
+    pool = build_pool(array_hierarchy, device_hierarchy)
+    
+    int_keys = [x for x in pool if x != "array"]
+    labels = [pool[x].label for x in int_keys]
+    
+    assert sorted(int_keys) == range(len(pool) - 1)
+    assert "Array elec sub-system" in labels
+    assert "User sub-systems" not in labels
+    assert "Pto" not in labels
+    
+    # Every link must be reachable from the array
+    found = set()
+    stack = ["array"]
+    
+    while stack:
+        key = stack.pop()
+        found.add(key)
+        stack.extend(getattr(pool[key], "items", []))
+    
+    assert found == set(pool)
+
+
+def test_build_pool_redundancy(networks):
+    
+    networks[1].bill_of_materials['device001']['Mooring system'][
+                                                        'redundancy'] = 1
+    networks[2].hierarchy['device001']['Pto'] = [['id7'], ['id8']]
+    networks[2].bill_of_materials['device001']['Pto']['redundancy'] = 1
+    
+    completed = complete_networks(*networks)
+    array_hierarchy, device_hierarchy = combine_networks(*completed)
+    pool = build_pool(array_hierarchy, device_hierarchy)
+    
+    kofns = [x for x in pool.values() if isinstance(x, KofN)]
+    items = [[pool[x] for x in link.items] for link in kofns]
+    labels = [[pool[y].label for x in link for y in x.items] for link in items]
+    
+    assert len(kofns) == 2
+    assert [x.k for x in kofns] == [1, 1]
+    assert all(isinstance(x, Serial) for link in items for x in link)
+    assert ['id7', 'id8'] in labels
+
+
+def test_build_pool_redundancy_too_large(networks):
+    
+    networks[2].hierarchy['device001']['Pto'] = [['id7']]
+    networks[2].bill_of_materials['device001']['Pto']['redundancy'] = 2
+    
+    completed = complete_networks(*networks)
+    array_hierarchy, device_hierarchy = combine_networks(*completed)
+    
+    with pytest.raises(ValueError) as excinfo:
+        build_pool(array_hierarchy, device_hierarchy)
+    
+    assert "Redundancy of system 'Pto'" in str(excinfo.value)
+
+
+def test_build_pool_redundancy_single_string(networks):
+    
+    networks[2].hierarchy['device001']['Pto'] = [['id7', 'id8']]
+    networks[2].bill_of_materials['device001']['Pto']['redundancy'] = 1
+    
+    completed = complete_networks(*networks)
+    array_hierarchy, device_hierarchy = combine_networks(*completed)
+    pool = build_pool(array_hierarchy, device_hierarchy)
+    
+    assert not any(isinstance(x, KofN) for x in pool.values())
+
+
+def test_build_pool_redundancy_serial(networks):
+    
+    networks[2].bill_of_materials['device001']['Pto']['redundancy'] = 1
+    
+    completed = complete_networks(*networks)
+    array_hierarchy, device_hierarchy = combine_networks(*completed)
+    
+    with pytest.raises(ValueError) as excinfo:
+        build_pool(array_hierarchy, device_hierarchy)
+    
+    assert "requires parallel strings" in str(excinfo.value)
+
+
+def test_build_pool_redundancy_dummy_line(networks):
+    
+    moor_hierarchy = networks[1].hierarchy['device001']
+    moor_hierarchy['Mooring system'] = [['id6'], ['dummy']]
+    moor_hierarchy['Foundation'] = [['id4'], ['dummy']]
+    
+    moor_bom = networks[1].bill_of_materials['device001']
+    moor_bom['Mooring system']['marker'] = [[6], [-1]]
+    moor_bom['Mooring system']['redundancy'] = 2
+    moor_bom['Foundation']['marker'] = [[4], [-1]]
+    
+    completed = complete_networks(*networks)
+    array_hierarchy, device_hierarchy = combine_networks(*completed)
+    
+    with pytest.raises(ValueError) as excinfo:
+        build_pool(array_hierarchy, device_hierarchy)
+    
+    assert "requires 2 items but only 1" in str(excinfo.value)
@@ -0,0 +1,487 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# pylint: disable=redefined-outer-name,protected-access,eval-used
+
+import os
+from collections import Counter # pylint: disable=unused-import
+
+import numpy as np
+import pytest
+
+from dtocean_reliability import Network, SubNetwork
+from dtocean_reliability.graph import (Component,
+                                       KofN,
+                                       Parallel,
+                                       Serial,
+                                       evaluate_pool)
+import dtocean_reliability.plan
+from dtocean_reliability.plan import (COMPONENT,
+                                      KOFN,
+                                      PARALLEL,
+                                      SERIAL,
+                                      EvaluationPlan,
+                                      compile_pool)
+
+THIS_DIR = os.path.dirname(os.path.realpath(__file__))
+DATA_DIR = os.path.join(THIS_DIR, "..", "example_data")
+
+
+def _read_data(file_name):
+    return eval(open(os.path.join(DATA_DIR, file_name)).read())
+
+
+@pytest.fixture
+def pool():
+    
+    comp_zero = Component("zero")
+    comp_zero.set_failure_rate(1)
+    
+    comp_one = Component("one")
+    comp_one.set_failure_rate(2)
+    
+    comp_two = Component("two")
+    comp_two.set_failure_rate(3)
+    
+    comp_three = Component("three")
+    
+    parallel = Parallel("parallel")
+    parallel.add_item(1)
+    parallel.add_item(2)
+    parallel.add_item(3)
+    
+    serial = Serial("array")
+    serial.add_item(0)
+    serial.add_item(4)
+    
+    pool = {0: comp_zero,
+            1: comp_one,
+            2: comp_two,
+            3: comp_three,
+            4: parallel,
+            "array": serial}
+    
+    return pool
+
+
+@pytest.fixture(scope="module")
+def network():
+    
+    electrical_network = SubNetwork(_read_data('dummyelechier.txt'),
+                                    _read_data('dummyelecbom.txt'))
+    moorings_network = SubNetwork(_read_data('dummymoorhier.txt'),
+                                  _read_data('dummymoorbom.txt'))
+    user_network = SubNetwork(_read_data('dummyuserhier.txt'),
+                              _read_data('dummyuserbom.txt'))
+    
+    network = Network(_read_data('dummydb.txt'),
+                      electrical_network,
+                      moorings_network,
+                      user_network)
+    
+    return network.set_failure_rates()
+
+
+def _assert_plan_matches_pool(plan, pool, failure_rates, mttfs):
+    
+    table = evaluate_pool(pool)
+    
+    for key, metrics in table.items():
+        
+        i = plan.index[key]
+        
+        if metrics.failure_rate is None:
+            assert np.isnan(failure_rates[i])
+            assert np.isnan(mttfs[i])
+            continue
+        
+        assert np.isclose(failure_rates[i],
+                          metrics.failure_rate,
+                          rtol=1e-12,
+                          atol=0)
+        assert np.isclose(mttfs[i], metrics.mttf, rtol=1e-12, atol=0)
+
+
+def test_compile_pool(pool):
+    
+    plan = compile_pool(pool)
+    
+    assert len(plan) == len(pool)
+    assert plan.n_components == 4
+    assert plan.component_keys == [0, 1, 2, 3]
+    assert plan.keys[-1] == "array"
+    assert list(plan.node_types) == [COMPONENT] * 4 + [PARALLEL, SERIAL]
+    assert list(plan.indptr) == [0, 0, 0, 0, 0, 3, 5]
+    assert list(plan.indices) == [1, 2, 3, 0, 4]
+
+
+def test_compile_pool_root(pool):
+    plan = compile_pool(pool, root=4)
+    assert plan.keys == [1, 2, 3, 4]
+
+
+def test_compile_pool_classes():
+    
+    pool = {}
+    
+    for i, label in enumerate(["a", "b", "a", "b", "c"]):
+        pool[i] = Component(label)
+    
+    first = Parallel("first")
+    first.add_item(0)
+    first.add_item(1)
+    
+    second = Parallel("second")
+    second.add_item(3)
+    second.add_item(2)
+    
+    array = Serial("array")
+    array.add_item(5)
+    array.add_item(6)
+    array.add_item(4)
+    
+    pool.update({5: first, 6: second, "array": array})
+    
+    plan = compile_pool(pool)
+    
+    assert list(plan.classes) == [0, 1, 0, 1, 2, 3, 3, 4]
+    assert list(plan.get_first_nodes()) == [0, 1, 4, 5, 7]
+
+
+def test_compile_pool_classes_kofn():
+    
+    pool = {0: Component("a"), 1: Component("a")}
+    
+    for key, k in ((2, 1), (3, 2), (4, 2)):
+        pool[key] = KofN(k)
+        pool[key].add_item(0)
+        pool[key].add_item(1)
+    
+    array = Serial("array")
+    array.add_item(2)
+    array.add_item(3)
+    array.add_item(4)
+    pool["array"] = array
+    
+    plan = compile_pool(pool)
+    
+    assert list(plan.node_types[2:5]) == [KOFN] * 3
+    assert list(plan.ks) == [0, 0, 1, 2, 2, 0]
+    assert list(plan.classes) == [0, 0, 1, 2, 2, 3]
+
+
+def test_compile_pool_classes_unique(pool):
+    plan = compile_pool(pool)
+    assert plan.get_first_nodes() is None
+
+
+def test_EvaluationPlan_get_uniform_classes(network):
+    
+    plan = network._plan
+    rates = network._failure_rates.copy()
+    
+    assert plan.get_uniform_classes(rates) is plan.classes
+    assert plan.get_uniform_classes(np.vstack([rates, 2 * rates])) is \
+                                                                plan.classes
+    
+    rates[0] *= 2
+    
+    assert plan.get_uniform_classes(rates) is None
+
+
+@pytest.mark.parametrize("k_factor", [1, 2])
+def test_EvaluationPlan_execute_classes(network, k_factor):
+    
+    plan = network._plan
+    unclassed = EvaluationPlan(plan.keys,
+                               plan.node_types,
+                               plan.indptr,
+                               plan.indices,
+                               plan.heights)
+    
+    rates = network._failure_rates.copy()
+    rates[0] *= k_factor
+    times = [0, 720, 8760]
+    
+    assert plan.get_first_nodes() is not None
+    assert len(plan._reduced) < len(plan)
+    
+    for test, expected in zip(plan.execute(rates), unclassed.execute(rates)):
+        np.testing.assert_allclose(test, expected, rtol=1e-12)
+    
+    np.testing.assert_allclose(plan.execute_reliability(rates, times),
+                               unclassed.execute_reliability(rates, times),
+                               rtol=1e-12)
+
+
+def test_EvaluationPlan_execute(pool):
+    
+    plan = compile_pool(pool)
+    rates = plan.get_component_failure_rates(pool)
+    failure_rates, mttfs = plan.execute(rates)
+    
+    assert np.isnan(rates[3])
+    _assert_plan_matches_pool(plan, pool, failure_rates, mttfs)
+
+
+@pytest.mark.parametrize("k", [1, 2, 3])
+def test_EvaluationPlan_execute_kofn(pool, k):
+    
+    kofn = KofN(k, "kofn")
+    
+    for item in (0, 1, 2, 3):
+        kofn.add_item(item)
+    
+    pool[5] = kofn
+    pool["array"].add_item(5)
+    
+    plan = compile_pool(pool)
+    rates = plan.get_component_failure_rates(pool)
+    failure_rates, mttfs = plan.execute(rates)
+    
+    _assert_plan_matches_pool(plan, pool, failure_rates, mttfs)
+    
+    i = plan.index[5]
+    test_rate, test_mttf = plan.execute_node(i, failure_rates)
+    
+    assert np.isclose(test_rate, failure_rates[i], rtol=1e-12)
+    assert np.isclose(test_mttf, mttfs[i], rtol=1e-12)
+
+
+def test_EvaluationPlan_execute_ideal(pool):
+    
+    pool[1].set_failure_rate(0)
+    
+    plan = compile_pool(pool)
+    rates = plan.get_component_failure_rates(pool)
+    failure_rates, mttfs = plan.execute(rates)
+    
+    assert failure_rates[plan.index[4]] == 0
+    assert mttfs[plan.index[4]] == float("inf")
+    _assert_plan_matches_pool(plan, pool, failure_rates, mttfs)
+
+
+def test_EvaluationPlan_execute_2d(pool):
+    
+    plan = compile_pool(pool)
+    rates = plan.get_component_failure_rates(pool)
+    failure_rates, mttfs = plan.execute(np.vstack([rates, 2 * rates]))
+    
+    assert failure_rates.shape == (2, len(plan))
+    assert np.allclose(failure_rates[1], 2 * failure_rates[0], equal_nan=True)
+    assert np.allclose(mttfs[1], mttfs[0] / 2, equal_nan=True)
+
+
+def test_EvaluationPlan_execute_chunks(monkeypatch, pool):
+    
+    plan = compile_pool(pool)
+    rates = np.random.uniform(1, 10, (7, plan.n_components))
+    expected = plan.execute(rates)
+    
+    monkeypatch.setattr(dtocean_reliability.plan, "_MAX_CHUNK_ELEMENTS", 1)
+    test = plan.execute(rates)
+    
+    np.testing.assert_allclose(test[0], expected[0], rtol=1e-12)
+    np.testing.assert_allclose(test[1], expected[1], rtol=1e-12)
+
+
+@pytest.mark.parametrize("max_elements", [1, 10, 2 ** 22])
+def test_EvaluationPlan_execute_columns(monkeypatch, pool, max_elements):
+    
+    plan = compile_pool(pool)
+    rates = np.random.uniform(1, 10, (7, plan.n_components))
+    columns = [5, 0, 4]
+    expected = plan.execute(rates)
+    
+    monkeypatch.setattr(dtocean_reliability.plan,
+                        "_MAX_CHUNK_ELEMENTS",
+                        max_elements)
+    test = plan.execute(rates, columns)
+    
+    assert test[0].shape == (7, 3)
+    np.testing.assert_allclose(test[0], expected[0][:, columns], rtol=1e-12)
+    np.testing.assert_allclose(test[1], expected[1][:, columns], rtol=1e-12)
+
+
+def test_EvaluationPlan_execute_columns_classes(network):
+    
+    plan = network._plan
+    rates = np.vstack([network._failure_rates, 2 * network._failure_rates])
+    columns = [len(plan) - 1, 0]
+    
+    assert plan.get_uniform_classes(rates) is not None
+    
+    expected = plan.execute(rates)
+    test = plan.execute(rates, columns)
+    
+    assert test[0].shape == (2, 2)
+    np.testing.assert_allclose(test[0], expected[0][:, columns], rtol=1e-12)
+    np.testing.assert_allclose(test[1], expected[1][:, columns], rtol=1e-12)
+
+
+def test_EvaluationPlan_execute_bad_shape(pool):
+    
+    plan = compile_pool(pool)
+    
+    with pytest.raises(ValueError) as excinfo:
+        plan.execute([1, 2])
+    
+    assert "Expected 4 component failure rates" in str(excinfo.value)
+
+
+def test_EvaluationPlan_execute_network(network):
+    
+    pool = network._get_rated_pool()
+    plan = compile_pool(pool)
+    rates = plan.get_component_failure_rates(pool)
+    failure_rates, mttfs = plan.execute(rates)
+    
+    assert len(plan) == len(pool)
+    _assert_plan_matches_pool(plan, pool, failure_rates, mttfs)
+
+
+def test_EvaluationPlan_get_parents(pool):
+    
+    plan = compile_pool(pool)
+    parent_indptr, parent_indices = plan.get_parents()
+    
+    parents = [list(parent_indices[parent_indptr[i]:parent_indptr[i + 1]])
+                                                for i in xrange(len(plan))] # pylint: disable=undefined-variable
+    
+    assert parents == [[5], [4], [4], [4], [5], []]
+
+
+def test_EvaluationPlan_execute_node(network):
+    
+    plan = network._plan
+    failure_rates, mttfs = plan.execute(network._failure_rates)
+    
+    for i in xrange(plan.n_components, len(plan)): # pylint: disable=undefined-variable
+        
+        test_rate, test_mttf = plan.execute_node(i, failure_rates)
+        
+        np.testing.assert_allclose(test_rate, failure_rates[i], rtol=1e-12)
+        np.testing.assert_allclose(test_mttf, mttfs[i], rtol=1e-12)
+
+
+def test_EvaluationPlan_execute_reliability(pool):
+    
+    plan = compile_pool(pool)
+    rates = plan.get_component_failure_rates(pool)
+    times = np.array([0., 1e5, 1e6])
+    
+    test = plan.execute_reliability(rates, times)
+    
+    r_zero = np.exp(-1e-6 * times)
+    r_parallel = 1 - (1 - np.exp(-2e-6 * times)) * (1 - np.exp(-3e-6 * times))
+    
+    assert test.shape == (len(plan), 3)
+    assert np.isnan(test[plan.index[3]]).all()
+    assert np.allclose(test[plan.index[4]], r_parallel)
+    assert np.allclose(test[plan.index["array"]], r_zero * r_parallel)
+
+
+def test_EvaluationPlan_execute_reliability_kofn(pool):
+    
+    kofn = KofN(2, "kofn")
+    
+    for item in (0, 1, 2, 3):
+        kofn.add_item(item)
+    
+    pool[5] = kofn
+    pool["array"].add_item(5)
+    
+    plan = compile_pool(pool)
+    rates = plan.get_component_failure_rates(pool)
+    times = np.linspace(0, 2e7, 200001)
+    
+    reliabilities = plan.execute_reliability(rates, times)
+    _, mttfs = plan.execute(rates)
+    
+    idx = plan.index[5]
+    r = [np.exp(-x * 1e-6 * times) for x in (1, 2, 3)]
+    expected = (r[0] * r[1] * r[2] + (1 - r[0]) * r[1] * r[2] +
+                r[0] * (1 - r[1]) * r[2] + r[0] * r[1] * (1 - r[2]))
+    
+    assert np.allclose(reliabilities[idx], expected)
+    assert np.isclose(np.trapz(reliabilities[idx], times), mttfs[idx],
+                      rtol=1e-6)
+
+
+def test_EvaluationPlan_execute_reliability_mttf(pool):
+    
+    # The integral of the exact reliability of a parallel link is its MTTF
+    
+    plan = compile_pool(pool)
+    rates = plan.get_component_failure_rates(pool)
+    times = np.linspace(0, 2e7, 200001)
+    
+    reliabilities = plan.execute_reliability(rates, times)
+    _, mttfs = plan.execute(rates)
+    
+    idx = plan.index[4]
+    
+    assert np.isclose(np.trapz(reliabilities[idx], times), mttfs[idx],
+                      rtol=1e-6)
+
+
+def test_EvaluationPlan_execute_reliability_chunks(monkeypatch, pool):
+    
+    plan = compile_pool(pool)
+    rates = plan.get_component_failure_rates(pool)
+    times = np.linspace(0, 1e6, 11)
+    expected = plan.execute_reliability(rates, times)
+    
+    monkeypatch.setattr(dtocean_reliability.plan, "_MAX_CHUNK_ELEMENTS", 1)
+    test = plan.execute_reliability(rates, times)
+    
+    np.testing.assert_array_equal(test, expected)
+
+
+def test_EvaluationPlan_execute_reliability_bad_shape(pool):
+    
+    plan = compile_pool(pool)
+    
+    with pytest.raises(ValueError) as excinfo:
+        plan.execute_reliability([[1, 2, 3, 4]], [0])
+    
+    assert "Expected 4 component failure rates" in str(excinfo.value)
+
+
+@pytest.mark.parametrize("k_factor", [1, 2])
+def test_network_evaluate_classes(network, k_factor):
+    
+    marker = network.get_components()["Marker"][-1]
+    rated = network.set_failure_rates(k_factors={marker: k_factor})
+    
+    test = rated.evaluate(720)
+    expected = evaluate_pool(rated._get_rated_pool(), 720)
+    
+    assert set(test) == set(expected)
+    
+    for key, metrics in expected.items():
+        
+        if metrics.failure_rate is None:
+            assert test[key] == metrics
+            continue
+        
+        assert test[key].failure_rate == pytest.approx(metrics.failure_rate,
+                                                       rel=1e-12)
+        assert test[key].mttf == pytest.approx(metrics.mttf, rel=1e-12)
+        assert test[key].rpn == metrics.rpn
+        assert test[key].reliability == pytest.approx(metrics.reliability,
+                                                      rel=1e-12)
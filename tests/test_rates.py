@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# pylint: disable=redefined-outer-name
+
+import numpy as np
+import pytest
+
+from dtocean_reliability.rates import (DESIGNED_FAILURE_RATE,
+                                       FailureRateTable,
+                                       get_scenario_indices)
+
+
+@pytest.fixture(scope="module")
+def table():
+    
+    database = {'full': {'item10': {'failratecrit': [4, 5, 6],
+                                    'failratenoncrit': [1, 2, 3]}},
+                'mean': {'item10': {'failratecrit': [-1, 5, -1],
+                                    'failratenoncrit': [1, -1, 3]}},
+                'noncrit': {'item10': {'failratecrit': [-1, -1, -1],
+                                       'failratenoncrit': [1, 2, -1]}},
+                'empty': {'item10': {'failratecrit': [-1, -1, -1],
+                                     'failratenoncrit': [-1, -1, -1]}},
+                'grout': {'item10': {'failratecrit': [1, 1, 1],
+                                     'failratenoncrit': [1, 1, 1]}}}
+    
+    return FailureRateTable(database)
+
+
+@pytest.mark.parametrize("label, expected", [
+    ('full', [[4, 5, 6], [1, 2, 3]]),
+    ('mean', [[5, 5, 5], [1, 5, 3]]),
+    ('noncrit', [[1, 2, 2], [1, 2, 2]]),
+    ('grout', [[DESIGNED_FAILURE_RATE] * 3] * 2),
+    ('ideal', [[0] * 3] * 2)])
+def test_FailureRateTable_rates(table, label, expected):
+    
+    row = table.index[label]
+    expected = np.array(expected, dtype=float)
+    
+    assert np.allclose(table.rates[row], expected)
+
+
+def test_FailureRateTable_fallback(table):
+    
+    assert not table.fallback[table.index['full']].any()
+    assert list(table.fallback[table.index['mean'], 1]) == [False,
+                                                           True,
+                                                           False]
+    assert table.fallback[table.index['noncrit'], 0].all()
+    assert np.isnan(table.rates[table.index['empty']]).all()
+
+
+def test_FailureRateTable_get_failure_rates(table):
+    
+    rows = table.get_rows(['full', 'noncrit', 'grout', 'full'])
+    failure_rates, severity_levels = table.get_failure_rates(
+                                                    rows,
+                                                    'critical',
+                                                    'upper',
+                                                    markers=[0, 1, 2, 3],
+                                                    k_factors={0: 2, 2: 2})
+    
+    assert np.allclose(failure_rates, [12, 2, DESIGNED_FAILURE_RATE, 6])
+    assert severity_levels == ['critical',
+                               'noncritical',
+                               'critical',
+                               'critical']
+
+
+def test_FailureRateTable_get_failure_rates_missing(table):
+    
+    rows = table.get_rows(['full', 'empty'])
+    
+    with pytest.raises(RuntimeError) as excinfo:
+        table.get_failure_rates(rows)
+    
+    assert "'empty'" in str(excinfo.value)
+
+
+def test_FailureRateTable_get_rows_unknown(table):
+    with pytest.raises(KeyError):
+        table.get_rows(['unknown'])
+
+
+@pytest.mark.parametrize("severitylevel, calcscenario", [
+    ('unknown', 'mean'),
+    ('critical', 'unknown')])
+def test_get_scenario_indices_bad(severitylevel, calcscenario):
+    with pytest.raises(ValueError):
+        get_scenario_indices(severitylevel, calcscenario)
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+#    Copyright (C) 2021 Mathew Topper
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU General Public License as published by
+#    the Free Software Foundation, either version 3 of the License, or
+#    (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU General Public License for more details.
+#
+#    You should have received a copy of the GNU General Public License
+#    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# pylint: disable=redefined-outer-name,protected-access,eval-used
+
+import os
+import cPickle as pickle
+from collections import Counter # pylint: disable=unused-import
+
+import numpy as np
+import pytest
+
+import dtocean_reliability.store
+from dtocean_reliability import Network, SubNetwork
+from dtocean_reliability.store import (DictComponentStore,
+                                       MemmapComponentStore,
+                                       SQLiteComponentStore,
+                                       export_catalogue,
+                                       import_database)
+
+THIS_DIR = os.path.dirname(os.path.realpath(__file__))
+DATA_DIR = os.path.join(THIS_DIR, "..", "example_data")
+
+
+def _read_data(file_name):
+    return eval(open(os.path.join(DATA_DIR, file_name)).read())
+
+
+@pytest.fixture
+def database():
+    
+    return {'id1': {'item10': {'failratecrit': [4, 5, 6],
+                               'failratenoncrit': [1, 2, 3]}},
+            2: {'item10': {'failratecrit': [-1, 5., -1],
+                           'failratenoncrit': [1, None, 3]}},
+            'id3': {'item1': 'no failure rates'}}
+
+
+@pytest.fixture
+def store(tmpdir, database):
+    
+    store = import_database(database, str(tmpdir.join("db.sqlite")))
+    yield store
+    store.close()
+
+
+def test_import_database(store):
+    assert len(store) == 3
+    assert set(store.get_ids()) == set(['id1', 2, 'id3'])
+
+
+def test_SQLiteComponentStore_get_failure_rates(store, database):
+    
+    test = store.get_failure_rates(['id1', 2, 'id3', 'missing', '2'])
+    
+    assert set(test) == set(['id1', 2, 'id3'])
+    assert test['id1'] == database['id1']['item10']
+    assert test[2] == database[2]['item10']
+    assert test['id3'] == {'failratecrit': [None] * 3,
+                           'failratenoncrit': [None] * 3}
+
+
+def test_SQLiteComponentStore_get_failure_rates_chunks(monkeypatch, store):
+    
+    monkeypatch.setattr(dtocean_reliability.store, "_MAX_VARIABLES", 2)
+    test = store.get_failure_rates(['id1', 2, 'id3', 'missing'])
+    
+    assert set(test) == set(['id1', 2, 'id3'])
+
+
+def test_SQLiteComponentStore_reopen(tmpdir, store):
+    
+    test = SQLiteComponentStore(store.path)
+    
+    assert len(test) == 3
+    test.close()
+
+
+def test_DictComponentStore_get_failure_rates(database):
+    
+    test = DictComponentStore(database).get_failure_rates(['id1',
+                                                           'id3',
+                                                           'missing'])
+    
+    assert test == {'id1': database['id1']['item10'], 'id3': None}
+
+
+@pytest.fixture
+def catalogue(tmpdir, database):
+    return export_catalogue(database, str(tmpdir.join("db.catalogue")))
+
+
+def test_export_catalogue(catalogue):
+    
+    assert isinstance(catalogue._rates, np.memmap)
+    assert len(catalogue) == 3
+    assert set(catalogue.get_ids()) == set(['id1', 2, 'id3'])
+
+
+def test_export_catalogue_store(tmpdir, store):
+    
+    test = export_catalogue(store, str(tmpdir.join("db.catalogue")))
+    
+    assert set(test.get_ids()) == set(['id1', 2, 'id3'])
+
+
+def test_export_catalogue_bad_id(tmpdir, database):
+    
+    database[('id', 4)] = database['id1']
+    
+    with pytest.raises(ValueError) as excinfo:
+        export_catalogue(database, str(tmpdir.join("db.catalogue")))
+    
+    assert "('id', 4)" in str(excinfo.value)
+    assert not tmpdir.listdir()
+
+
+def test_export_catalogue_error(monkeypatch, tmpdir, database):
+    
+    def rename(*args):
+        raise OSError("rename failed")
+    
+    monkeypatch.setattr(dtocean_reliability.store.os, "rename", rename)
+    
+    with pytest.raises(OSError):
+        export_catalogue(database, str(tmpdir.join("db.catalogue")))
+    
+    assert not tmpdir.listdir()
+
+
+def test_MemmapComponentStore_get_raw_rates(catalogue):
+    
+    ids, raw_rates = catalogue.get_raw_rates(['id3', 'missing', 'id1', 2])
+    
+    assert ids == ['id3', 'id1', 2]
+    assert raw_rates.shape == (3, 2, 3)
+    assert np.isnan(raw_rates[0]).all()
+    assert raw_rates[1].tolist() == [[4, 5, 6], [1, 2, 3]]
+    assert raw_rates[2, 0].tolist() == [-1, 5, -1]
+    assert np.isnan(raw_rates[2, 1, 1])
+
+
+def test_MemmapComponentStore_get_failure_rates(catalogue, database):
+    
+    test = catalogue.get_failure_rates(['id1', 'missing'])
+    
+    assert test == {'id1': database['id1']['item10']}
+
+
+def test_MemmapComponentStore_pickle(catalogue):
+    
+    data = pickle.dumps(catalogue, pickle.HIGHEST_PROTOCOL)
+    test = pickle.loads(data)
+    
+    assert catalogue.path in data
+    assert len(data) < 1000
+    assert test.get_ids() == catalogue.get_ids()
+    assert isinstance(test._rates, np.memmap)
+
+
+def test_MemmapComponentStore_not_catalogue(tmpdir):
+    
+    path = tmpdir.join("db.catalogue")
+    path.write("not a catalogue")
+    
+    with pytest.raises(ValueError) as excinfo:
+        MemmapComponentStore(str(path))
+    
+    assert "is not a component catalogue" in str(excinfo)
+
+
+@pytest.mark.parametrize("store_type", ["sqlite", "catalogue"])
+def test_network_store(tmpdir, store_type):
+    
+    database = _read_data('dummydb.txt')
+    
+    if store_type == "sqlite":
+        store = import_database(database, str(tmpdir.join("db.sqlite")))
+    else:
+        store = export_catalogue(database, str(tmpdir.join("db.catalogue")))
+    
+    electrical_network = SubNetwork(_read_data('dummyelechier.txt'),
+                                    _read_data('dummyelecbom.txt'))
+    moorings_network = SubNetwork(_read_data('dummymoorhier.txt'),
+                                  _read_data('dummymoorbom.txt'))
+    
+    expected = Network(database, electrical_network, moorings_network)
+    test = Network(store, electrical_network, moorings_network)
+    
+    for severitylevel in ('critical', 'noncritical'):
+        for calcscenario in ('lower', 'mean', 'upper'):
+            
+            test_metrics = test.set_failure_rates(
+                                    severitylevel,
+                                    calcscenario).get_systems_metrics(720)
+            expected_metrics = expected.set_failure_rates(
+                                    severitylevel,
+                                    calcscenario).get_systems_metrics(720)
+            
+            assert test_metrics == expected_metrics
+    
+    if store_type == "sqlite": store.close()
+
+
+def test_network_store_ids(database):
+    
+    class RecordingStore(DictComponentStore):
+        
+        def __init__(self, database):
+            super(RecordingStore, self).__init__(database)
+            self.requests = []
+        
+        def get_failure_rates(self, ids):
+            self.requests.append(sorted(ids))
+            return super(RecordingStore, self).get_failure_rates(ids)
+    
+    store = RecordingStore(dict(database, unused=database['id1']))
+    hierarchy = {'array': {'Export cable': ['id1'],
+                           'Substation': ['grout'],
+                           'layout': [['device001']]},
+                 'device001': {'Elec sub-system': ['id1']}}
+    bom = {'array': {'Export cable': {'quantity': Counter({'id1': 1})},
+                     'Substation': {'quantity': Counter({'grout': 1})}},
+           'device001': {'quantity': Counter({'id1': 1})}}
+    
+    network = Network(store, SubNetwork(hierarchy, bom))
+    network.set_failure_rates()
+    network.set_failure_rates(severitylevel='noncritical')
+    
+    assert store.requests == [['id1']]